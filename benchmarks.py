@@ -0,0 +1,561 @@
+import argparse
+import asyncio
+import csv
+import gc
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+from pycharts.aio import AsyncCompanyClient
+from pycharts.batching import BatchingClient
+from pycharts.clients import CompanyClient
+from pycharts.decoding import DECODER_CLASSES
+from pycharts.throttling import Throttle
+from pycharts.transport import ConnectionPool
+
+# metrics that are compared between runs, and whether lower is better
+COMPARED_METRICS = {
+    'p50_seconds': True,
+    'p99_seconds': True,
+    'peak_memory_mb': True,
+    'throughput': False,
+}
+
+
+#########################################
+#####      PAYLOAD UTILITIES        #####
+#########################################
+def build_dates(num_days):
+    return ['{0:04d}-{1:02d}-{2:02d}'.format(2000 + i // 336, i // 28 % 12 + 1, i % 28 + 1) for i in range(num_days)]
+
+
+def build_points_payload(security_symbols, calculation_codes):
+    response = {}
+    for i, security_symbol in enumerate(security_symbols):
+        results = dict((calculation_code, {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 100.0 + i * 0.01]})
+            for calculation_code in calculation_codes)
+        response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+    return {'response': response, 'meta': {'status': 'ok'}}
+
+
+def build_series_payload(security_symbols, calculation_codes, num_days):
+    dates = build_dates(num_days)
+    response = {}
+    for security_symbol in security_symbols:
+        results = {}
+        for calculation_code in calculation_codes:
+            data = [[date, 100.0 + i * 0.01] for i, date in enumerate(dates)]
+            results[calculation_code] = {'meta': {'status': 'ok'}, 'data': data}
+        response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+    return {'response': response, 'meta': {'status': 'ok'}}
+
+
+def build_info_payload(security_symbols, info_field_codes):
+    response = {}
+    for security_symbol in security_symbols:
+        results = dict((info_field_code, {'meta': {'status': 'ok'},
+            'data': '{0} {1} of a realistically long description'.format(security_symbol, info_field_code)})
+            for info_field_code in info_field_codes)
+        response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+    return {'response': response, 'meta': {'status': 'ok'}}
+
+
+def build_events_payload(security_symbols, num_events=40):
+    dates = build_dates(num_events * 90)[::90]
+    response = {}
+    for security_symbol in security_symbols:
+        results = [{
+            'adjusted_dividend_amount': 0.47, 'currency_code': 'USD', 'declared_date': date,
+            'dividend_amount': 0.47, 'dividend_type': 'normal', 'ex_date': date, 'pay_date': date,
+            'record_date': date,
+        } for date in dates]
+        response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+    return {'response': response, 'meta': {'status': 'ok'}}
+
+
+def build_securities_payload(page, num_pages, page_size):
+    start_index = (page - 1) * page_size + 1
+    securities = [{'name': 'Company {0}'.format(i), 'symbol': 'SYM{0}'.format(i)}
+        for i in range(start_index, start_index + page_size)]
+    pagination_info = {
+        'start_index': start_index, 'end_index': start_index + page_size - 1,
+        'num_items': num_pages * page_size, 'num_pages': num_pages, 'current_page_num': page,
+    }
+
+    return {'response': securities, 'meta': {'status': 'ok', 'pagination_info': pagination_info}}
+
+
+#########################################
+#####         MOCK SERVER           #####
+#########################################
+class MockYChartsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves synthetic payloads for every endpoint of the YCharts api over
+    keep-alive connections.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, which nagle and delayed acks
+    # would otherwise stall for ~40ms on every keep-alive request.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            is_throttled = self.server.throttle_every and self.server.requests % self.server.throttle_every == 0
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if is_throttled:
+            self.send_body(429, b'', {'Retry-After': '0'})
+        elif 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self.send_body(200, self.server.get_body(self.path, 'gzip'), {'Content-Encoding': 'gzip'})
+        else:
+            self.send_body(200, self.server.get_body(self.path))
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockYChartsServer(ThreadingMixIn, HTTPServer):
+    """
+    Local stand-in for the YCharts api. Bodies are built once per url and
+    then served from memory, so that building them is not part of what is
+    measured.
+    """
+
+    daemon_threads = True
+    # the default backlog of 5 drops the connections that concurrent requests
+    # open all at once, which are then only retried after a second
+    request_queue_size = 128
+
+    def __init__(self, num_days=500, num_pages=20, page_size=100, latency=0, throttle_every=0):
+        """
+        Args:
+            num_days (int): Number of dates of every series.
+            num_pages (int): Number of pages of the securities endpoint.
+            page_size (int): Number of securities per page.
+            latency (float): Seconds every response is delayed by.
+            throttle_every (int): Answers every nth request with a 429, if set.
+        """
+        HTTPServer.__init__(self, ('127.0.0.1', 0), MockYChartsRequestHandler)
+        self.num_days = num_days
+        self.num_pages = num_pages
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._bodies = {}
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/api'.format(self.server_address[1])
+
+    def get_body(self, path, content_encoding=None):
+        with self.lock:
+            body = self._bodies.get((path, content_encoding))
+        if body is None:
+            if content_encoding == 'gzip':
+                body = gzip.compress(self.get_body(path))
+            else:
+                body = json.dumps(self.build_payload(path)).encode('utf-8')
+            with self.lock:
+                self._bodies[path, content_encoding] = body
+
+        return body
+
+    def build_payload(self, path):
+        split_url = urlsplit(path)
+        # /api/v3/<security_type>/<symbols>/<query_type>/<codes>
+        url_path_parts = split_url.path.split('/')[3:]
+        if len(url_path_parts) == 1:
+            params = dict(param.split('=') for param in split_url.query.split('&') if param)
+            return build_securities_payload(int(params.get('page', 1)), self.num_pages, self.page_size)
+
+        security_symbols = url_path_parts[1].split(',')
+        query_type_path = url_path_parts[2]
+        query_keys = url_path_parts[3].split(',') if len(url_path_parts) > 3 else []
+        if query_type_path == 'points':
+            return build_points_payload(security_symbols, query_keys)
+        elif query_type_path == 'series':
+            return build_series_payload(security_symbols, query_keys, self.num_days)
+        elif query_type_path == 'info':
+            return build_info_payload(security_symbols, query_keys)
+        return build_events_payload(security_symbols)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+#########################################
+#####         MEASUREMENT           #####
+#########################################
+def measure(run, repeat):
+    """
+    Times repeat runs, then makes one more run under tracemalloc for its
+    peak memory and the number of memory blocks its result holds on to.
+    The timed runs are not traced, since tracing slows them down.
+    """
+    # warms up the server's bodies and the client's connections
+    run()
+    latencies = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started_at)
+
+    gc.collect()
+    allocated_blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = run()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated_blocks = sys.getallocatedblocks() - allocated_blocks
+    del result
+
+    latencies.sort()
+    return {
+        'runs': repeat,
+        'throughput': repeat / sum(latencies),
+        'p50_seconds': percentile(latencies, 50),
+        'p99_seconds': percentile(latencies, 99),
+        'peak_memory_mb': peak_memory / 1024.0 / 1024.0,
+        'allocated_blocks': allocated_blocks,
+    }
+
+
+def percentile(sorted_values, percent):
+    return sorted_values[int(round(percent / 100.0 * (len(sorted_values) - 1)))]
+
+
+def build_client(server, **kwargs):
+    client = CompanyClient('api_key', **kwargs)
+    client.BASE_URL = server.base_url
+    return client
+
+
+def run_async(server, query):
+    async def run():
+        client = AsyncCompanyClient('api_key')
+        client.BASE_URL = server.base_url
+        try:
+            return await query(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+
+    def call(i):
+        results[i] = calls[i]()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def build_symbols(num_symbols):
+    return ['SYM{0}'.format(i) for i in range(num_symbols)]
+
+
+def build_codes(num_codes):
+    return ['code{0}'.format(i) for i in range(num_codes)]
+
+
+#########################################
+#####          BENCHMARKS           #####
+#########################################
+def benchmark_points(server, options):
+    """
+    A universe wide points query, through each way of making requests.
+    """
+    security_symbols = build_symbols(options.num_symbols)
+    calculation_codes = build_codes(options.num_codes)
+    client = build_client(server)
+    pooled_client = build_client(server, connection_pool=ConnectionPool())
+    compact_client = build_client(server, compact_results=True)
+    batching_client = BatchingClient(client)
+
+    def get_points_batched():
+        # every symbol is asked for by its own caller and merged by the batching client
+        return run_concurrently([lambda security_symbol=security_symbol: batching_client.get_points(
+            security_symbol, calculation_codes) for security_symbol in security_symbols])
+
+    return {
+        'get_points': measure(lambda: client.get_points(security_symbols, calculation_codes), options.repeat),
+        'get_points_pooled': measure(lambda: pooled_client.get_points(security_symbols, calculation_codes),
+            options.repeat),
+        'get_points_compact': measure(lambda: compact_client.get_points(security_symbols, calculation_codes),
+            options.repeat),
+        'get_points_async': measure(lambda: run_async(server, lambda async_client: async_client.get_points(
+            security_symbols, calculation_codes)), options.repeat),
+        'get_points_batched': measure(get_points_batched, options.repeat),
+    }
+
+
+def benchmark_series(server, options):
+    """
+    A universe wide series query, decoded to dicts or columnar series,
+    streamed, or written to csv from the response dict or by export_series.
+    """
+    security_symbols = build_symbols(options.num_symbols)
+    calculation_codes = build_codes(2)
+    client = build_client(server)
+    pooled_client = build_client(server, connection_pool=ConnectionPool())
+    columnar_client = build_client(server, columnar_series=True)
+    uncompressed_client = build_client(server, compression=False)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'series.csv')
+
+    def get_series_to_csv():
+        series_rsp = client.get_series(security_symbols, calculation_codes)
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            for security_symbol, security_data in series_rsp['response'].items():
+                for calculation_code, calculation_data in security_data['results'].items():
+                    for date, value in calculation_data['data']:
+                        writer.writerow((security_symbol, calculation_code, date, value))
+
+    def stream_series():
+        for _ in client.stream_series(security_symbols, calculation_codes):
+            pass
+
+    results = {
+        'get_series': measure(lambda: client.get_series(security_symbols, calculation_codes), options.repeat),
+        'get_series_pooled': measure(lambda: pooled_client.get_series(security_symbols, calculation_codes),
+            options.repeat),
+        'get_series_uncompressed': measure(lambda: uncompressed_client.get_series(security_symbols,
+            calculation_codes), options.repeat),
+        'get_series_columnar': measure(lambda: columnar_client.get_series(security_symbols, calculation_codes),
+            options.repeat),
+        'get_series_async': measure(lambda: run_async(server, lambda async_client: async_client.get_series(
+            security_symbols, calculation_codes)), options.repeat),
+        'stream_series': measure(stream_series, options.repeat),
+        'get_series_to_csv': measure(get_series_to_csv, options.repeat),
+        'export_series_csv': measure(lambda: client.export_series(security_symbols, calculation_codes, path),
+            options.repeat),
+    }
+    os.remove(path)
+    os.rmdir(directory)
+
+    return results
+
+
+def benchmark_info(server, options):
+    security_symbols = build_symbols(options.num_symbols)
+    info_field_codes = ['name', 'description', 'sector', 'industry', 'exchange']
+    client = build_client(server)
+    compact_client = build_client(server, compact_results=True)
+
+    return {
+        'get_info': measure(lambda: client.get_info(security_symbols, info_field_codes), options.repeat),
+        'get_info_compact': measure(lambda: compact_client.get_info(security_symbols, info_field_codes),
+            options.repeat),
+        'get_info_async': measure(lambda: run_async(server, lambda async_client: async_client.get_info(
+            security_symbols, info_field_codes)), options.repeat),
+    }
+
+
+def benchmark_events(server, options):
+    security_symbols = build_symbols(options.num_symbols)
+    client = build_client(server)
+
+    return {
+        'get_dividends': measure(lambda: client.get_dividends(security_symbols), options.repeat),
+        'get_stock_splits': measure(lambda: client.get_stock_splits(security_symbols), options.repeat),
+        'get_stock_spinoffs': measure(lambda: client.get_stock_spinoffs(security_symbols), options.repeat),
+    }
+
+
+def benchmark_securities(server, options):
+    client = build_client(server)
+
+    return {
+        'get_securities': measure(lambda: client.get_securities(), options.repeat),
+        'iter_securities': measure(lambda: list(client.iter_securities()), options.repeat),
+        'stream_securities': measure(lambda: list(client.stream_securities()), options.repeat),
+    }
+
+
+def benchmark_throttled(server, options):
+    """
+    A points query split into many requests, against a server that throttles
+    every throttle_every-th request.
+    """
+    security_symbols = build_symbols(options.num_symbols)
+    calculation_codes = build_codes(options.num_codes)
+    client = build_client(server, throttle=Throttle(max_retries=10, backoff_base=0.01))
+    client.MAX_LIST_LENGTH = 10
+
+    server.throttle_every = options.throttle_every
+    try:
+        return {
+            'get_points_throttled': measure(lambda: client.get_points(security_symbols, calculation_codes),
+                options.repeat),
+        }
+    finally:
+        server.throttle_every = 0
+
+
+def benchmark_decoding(server, options):
+    """
+    Decoding of series bodies of different sizes with every installed json
+    decoder, with and without the garbage collector paused, and a series
+    query end to end with each of them.
+    """
+    decoders = []
+    for name, decoder_class in sorted(DECODER_CLASSES.items()):
+        try:
+            decoders.extend([('', decoder_class()), ('_paused_gc', decoder_class(pause_gc=True))])
+        except ImportError:
+            continue
+
+    sizes = {'small': (10, 1, 250), 'medium': (100, 2, 1000), 'large': (100, 2, 5000)}
+    security_symbols = build_symbols(options.num_symbols)
+    calculation_codes = build_codes(2)
+    results = {}
+    for size, (num_symbols, num_codes, num_days) in sorted(sizes.items()):
+        body = json.dumps(build_series_payload(build_symbols(num_symbols), build_codes(num_codes),
+            num_days)).encode('utf-8')
+        for suffix, decoder in decoders:
+            results['{0}_{1}{2}'.format(decoder.name, size, suffix)] = measure(lambda: decoder.decode(body),
+                options.repeat)
+
+    for suffix, decoder in decoders:
+        client = build_client(server, json_decoder=decoder)
+        results['get_series_{0}{1}'.format(decoder.name, suffix)] = measure(
+            lambda: client.get_series(security_symbols, calculation_codes), options.repeat)
+
+    return results
+
+
+def benchmark_import(server, options):
+    """
+    Cold start of a fresh interpreter importing the package, and importing a
+    client, next to that of an interpreter that imports nothing.
+    """
+    def run_python(code):
+        return subprocess.check_call([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    return {
+        'interpreter': measure(lambda: run_python('pass'), options.repeat),
+        'import_package': measure(lambda: run_python('import pycharts'), options.repeat),
+        'import_client': measure(lambda: run_python('from pycharts import CompanyClient'), options.repeat),
+    }
+
+
+BENCHMARKS = {
+    'decoding': benchmark_decoding,
+    'import': benchmark_import,
+    'points': benchmark_points,
+    'series': benchmark_series,
+    'info': benchmark_info,
+    'events': benchmark_events,
+    'securities': benchmark_securities,
+    'throttled': benchmark_throttled,
+}
+
+
+#########################################
+#####          COMPARISON           #####
+#########################################
+def compare(baseline, results, tolerance):
+    """
+    Returns:
+        descriptions of the metrics of results that are worse than in the
+        baseline results by more than the tolerated fraction.
+    """
+    regressions = []
+    for name, cases in sorted(results.items()):
+        for case, case_results in sorted(cases.items()):
+            baseline_results = baseline.get(name, {}).get(case)
+            if baseline_results is None:
+                continue
+            for metric, lower_is_better in sorted(COMPARED_METRICS.items()):
+                baseline_value = baseline_results.get(metric)
+                value = case_results.get(metric)
+                if not baseline_value or value is None:
+                    continue
+                change = (value - baseline_value) / baseline_value
+                if (change if lower_is_better else -change) > tolerance:
+                    regressions.append('{0}.{1} {2}: {3:.4g} -> {4:.4g} ({5:+.1%})'.format(
+                        name, case, metric, baseline_value, value, change))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the pycharts benchmarks against a local mock api.')
+    parser.add_argument('benchmarks', nargs='*', default=sorted(BENCHMARKS), help='Names of the benchmarks to run.')
+    parser.add_argument('--output', help='Path of a json file to write the results to.')
+    parser.add_argument('--compare', help='Path of the json results of an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Fraction a metric may worsen by.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs of every case.')
+    parser.add_argument('--num-symbols', type=int, default=200, help='Number of symbols queried.')
+    parser.add_argument('--num-codes', type=int, default=4, help='Number of codes of point queries.')
+    parser.add_argument('--num-days', type=int, default=500, help='Number of dates of every series.')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds every response is delayed by.')
+    parser.add_argument('--throttle-every', type=int, default=10,
+        help='Every nth request of the throttled benchmark is answered with a 429.')
+    options = parser.parse_args()
+
+    results = {}
+    with MockYChartsServer(num_days=options.num_days, latency=options.latency) as server:
+        for name in options.benchmarks:
+            results[name] = BENCHMARKS[name](server, options)
+            for case, case_results in sorted(results[name].items()):
+                print('{0:<12} {1:<22} {2:>8.1f}/s  p50 {3:>7.4f}s  p99 {4:>7.4f}s {5:>8.1f}MB {6:>9} blocks'.format(
+                    name, case, case_results['throughput'], case_results['p50_seconds'],
+                    case_results['p99_seconds'], case_results['peak_memory_mb'], case_results['allocated_blocks']))
+
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, options.tolerance)
+        for regression in regressions:
+            print('REGRESSION {0}'.format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,81 @@
+import importlib
+import sys
 from pycharts import exceptions
-from pycharts.clients import *
 
-__all__ = ['exceptions', 'CompanyClient', 'MutualFundClient', 'IndicatorClient']
+# module every public name is imported from on first access, so that
+# importing the package does not import the clients and their dependencies
+LAZY_ATTRIBUTES = {
+    'BaseSecurityClient': 'pycharts.base',
+    'CompanyClient': 'pycharts.clients',
+    'MutualFundClient': 'pycharts.clients',
+    'IndicatorClient': 'pycharts.clients',
+    'AdjustedSeries': 'pycharts.adjustment',
+    'AdjustmentEngine': 'pycharts.adjustment',
+    'BatchingClient': 'pycharts.batching',
+    'BulkJob': 'pycharts.bulk',
+    'run_bulk_job': 'pycharts.bulk',
+    'ResponseCache': 'pycharts.cache',
+    'RequestCoalescer': 'pycharts.coalescing',
+    'ColumnarSeries': 'pycharts.columnar',
+    'errors_to_frame': 'pycharts.frames',
+    'events_to_frame': 'pycharts.frames',
+    'info_to_frame': 'pycharts.frames',
+    'points_to_frame': 'pycharts.frames',
+    'series_to_frame': 'pycharts.frames',
+    'LoggingHook': 'pycharts.instrumentation',
+    'MetricsCollector': 'pycharts.instrumentation',
+    'PointInTimeStore': 'pycharts.point_in_time',
+    'aggregate': 'pycharts.resampling',
+    'resample': 'pycharts.resampling',
+    'InfoTable': 'pycharts.results',
+    'PointsTable': 'pycharts.results',
+    'SeriesStore': 'pycharts.series_store',
+    'AdaptiveConcurrencyLimiter': 'pycharts.throttling',
+    'Throttle': 'pycharts.throttling',
+    'ConnectionPool': 'pycharts.transport',
+    'AsyncCompanyClient': 'pycharts.aio',
+    'AsyncConnectionPool': 'pycharts.aio',
+    'AsyncIndicatorClient': 'pycharts.aio',
+    'AsyncMutualFundClient': 'pycharts.aio',
+}
+SUBMODULES = ('adjustment', 'aio', 'base', 'batching', 'bulk', 'cache', 'clients', 'coalescing', 'columnar',
+    'compression', 'decoding', 'export', 'frames', 'instrumentation', 'point_in_time', 'resampling', 'results',
+    'series_store', 'streaming', 'throttling', 'transport')
+
+# names the package imported before the rest were added and loaded lazily
+CLIENT_ATTRIBUTES = ('CompanyClient', 'MutualFundClient', 'IndicatorClient')
+
+# the asyncio clients, bulk jobs and frame helpers are left out, so that
+# `from pycharts import *` does not import asyncio, multiprocessing or pandas
+__all__ = ['exceptions', 'CompanyClient', 'MutualFundClient', 'IndicatorClient',
+    'ConnectionPool', 'ResponseCache', 'SeriesStore', 'ColumnarSeries',
+    'RequestCoalescer', 'BatchingClient', 'Throttle', 'AdaptiveConcurrencyLimiter',
+    'MetricsCollector', 'LoggingHook', 'PointsTable', 'InfoTable', 'PointInTimeStore',
+    'AdjustmentEngine', 'AdjustedSeries', 'resample', 'aggregate']
+
+
+def __getattr__(name):
+    module_name = LAZY_ATTRIBUTES.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name), name)
+    elif name in SUBMODULES:
+        value = importlib.import_module('pycharts.' + name)
+    else:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    # later lookups find the attribute without going through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES) | set(SUBMODULES))
+
+
+if sys.version_info < (3, 7):
+    # module __getattr__ (PEP 562) is only called from python 3.7 on, so the
+    # clients are imported with the package and every other name has to be
+    # imported from its own module
+    for name in CLIENT_ATTRIBUTES:
+        __getattr__(name)
+    __all__ = ['exceptions'] + list(CLIENT_ATTRIBUTES)
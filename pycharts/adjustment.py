@@ -0,0 +1,269 @@
+import bisect
+import datetime
+import math
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pycharts import exceptions
+from pycharts.columnar import EPOCH_ORDINAL, ColumnarSeries, _get_numpy, _parse_date
+from pycharts.results import _is_error
+
+
+class AdjustedSeries(ColumnarSeries):
+    """
+    ColumnarSeries of unadjusted values along with the cumulative factor
+    every value is multiplied by to adjust it for the splits and cash
+    dividends that went ex after it.
+
+    Factors are backward adjustments, so the latest value is its own
+    adjusted value and earlier values are scaled to be comparable with it.
+    A split of ratio r scales the values before its day by 1 / r, and a
+    dividend of amount d scales the values before its ex date by
+    1 - d / c, where c is the last unadjusted value before the ex date.
+    """
+
+    __slots__ = ('factors', 'events')
+
+    def __init__(self, days, raw_values, factors=None):
+        """
+        Args:
+            factors (array): float64 array of the factor of every value, all 1.0 by default.
+        """
+        super(AdjustedSeries, self).__init__(days, raw_values)
+        self.factors = factors if factors is not None else array('d', [1.0]) * len(days)
+        # (day, factor) of every event the factors account for, by event key
+        self.events = {}
+
+    @property
+    def adjusted_values(self):
+        numpy = _get_numpy()
+        if numpy is not None:
+            return numpy.frombuffer(self.raw_values, dtype='float64') * numpy.frombuffer(self.factors, dtype='float64')
+        return array('d', [value * factor for value, factor in zip(self.raw_values, self.factors)])
+
+    def to_adjusted(self):
+        """
+        Returns:
+            ColumnarSeries of the adjusted values.
+        """
+        adjusted_values = self.adjusted_values
+        if _get_numpy() is not None:
+            adjusted_values = array('d', adjusted_values.tobytes())
+        return ColumnarSeries(array('q', self.days), adjusted_values)
+
+    def splice(self, data):
+        """
+        Replaces the values from the first date of data onwards with data, a
+        list of [date, value] pairs or a ColumnarSeries, giving the new values
+        the factors of the events after them.
+        """
+        tail = _to_columnar(data)
+        if not len(tail):
+            return
+
+        splice_row = bisect.bisect_left(self.days, tail.days[0])
+        tail_factors = array('d', [1.0]) * len(tail)
+        for day, factor in self.events.values():
+            for i in range(bisect.bisect_left(tail.days, day)):
+                tail_factors[i] *= factor
+
+        # new arrays rather than resized ones, which numpy views may still be held of
+        self.days = self.days[:splice_row] + tail.days
+        self.raw_values = self.raw_values[:splice_row] + tail.raw_values
+        self.factors = self.factors[:splice_row] + tail_factors
+
+    def apply_events(self, events):
+        """
+        Scales the factors by the events that are not accounted for yet, in
+        one pass over the series however many events there are. Events after
+        the last date are left for once their day is in the series.
+
+        Args:
+            events (list): (key, kind, day, amount) tuples, where kind is
+                'split' with the split ratio as amount, or 'dividend' with
+                the cash amount.
+        """
+        scaled_rows = {}
+        last_day = self.days[-1] if len(self.days) else None
+        for key, kind, day, amount in events:
+            if key in self.events or last_day is None or day > last_day:
+                continue
+
+            row = bisect.bisect_left(self.days, day)
+            factor = self._get_event_factor(kind, row, amount)
+            self.events[key] = (day, factor)
+            if row > 0 and factor != 1.0:
+                scaled_rows[row] = scaled_rows.get(row, 1.0) * factor
+
+        if scaled_rows:
+            self._scale_factors(scaled_rows)
+
+    def _get_event_factor(self, kind, row, amount):
+        if kind == 'split':
+            return 1.0 / amount if amount and amount > 0 else 1.0
+
+        # the last close before the ex date, skipping missing values
+        for previous_row in range(row - 1, -1, -1):
+            close = self.raw_values[previous_row]
+            if not math.isnan(close):
+                return 1.0 - amount / close if 0 < amount < close else 1.0
+        return 1.0
+
+    def _scale_factors(self, scaled_rows):
+        """
+        Scales the factors of the rows before each of scaled_rows by its
+        factor, which comes down to a reverse cumulative product.
+        """
+        num_rows = len(self.days)
+        numpy = _get_numpy()
+        if numpy is not None:
+            row_factors = numpy.ones(num_rows + 1)
+            for row, factor in scaled_rows.items():
+                row_factors[row] = factor
+            scales = numpy.cumprod(row_factors[::-1])[::-1][1:]
+            numpy.frombuffer(self.factors, dtype='float64')[:] *= scales
+            return
+
+        scale = 1.0
+        for row in range(num_rows - 1, -1, -1):
+            scale *= scaled_rows.get(row + 1, 1.0)
+            if scale != 1.0:
+                self.factors[row] *= scale
+
+    def __repr__(self):
+        return '<AdjustedSeries: {0} points, {1} events>'.format(len(self), len(self.events))
+
+
+class AdjustmentEngine(object):
+    """
+    Split and dividend adjusted series of a client's securities, computed
+    locally from the unadjusted series and the split and dividend histories,
+    which are fetched concurrently.
+
+    Adjusted series are kept in memory. Later queries for a symbol only
+    fetch the values and events from its last date onwards, append the new
+    values and apply the new events to the kept factors, instead of
+    adjusting the whole history again.
+
+    Spinoffs are not adjusted for. Their adjustment factor depends on the
+    value of the spun off shares on the distribution date, which takes the
+    child company's series, and the child is often not listed yet on that
+    date.
+    """
+
+    def __init__(self, client, calculation_code='price', adjust_dividends=True):
+        """
+        Args:
+            client: Client of the securities, such as a CompanyClient or MutualFundClient.
+            calculation_code (str): Code of the unadjusted series to adjust.
+            adjust_dividends (bool): Whether series are adjusted for cash dividends
+                on top of splits.
+        """
+        if not hasattr(client, 'get_dividends'):
+            error_message = 'Series can only be adjusted for securities with dividends.'
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+
+        self.client = client
+        self.calculation_code = calculation_code
+        self.adjust_dividends = adjust_dividends
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def get_adjusted_series(self, security_symbols):
+        """
+        Args:
+            security_symbols (list): List of string symbols
+
+        Returns:
+            dict of symbol to AdjustedSeries. Symbols whose series errored are left out.
+        """
+        security_symbols = self.client._str_or_list(security_symbols)
+        with self._lock:
+            new_symbols = [security_symbol for security_symbol in security_symbols
+                if security_symbol not in self._series]
+            kept_symbols = [security_symbol for security_symbol in security_symbols
+                if security_symbol in self._series]
+            # refetch from the earliest last date, since the last value may
+            # have been revised since it was fetched
+            last_days = [self._series[security_symbol].days[-1] for security_symbol in kept_symbols
+                if len(self._series[security_symbol])]
+            start_date = (datetime.datetime.fromordinal(min(last_days) + EPOCH_ORDINAL) if last_days
+                else None)
+
+        queries = []
+        if new_symbols:
+            queries.extend(self._build_queries(new_symbols, None))
+        if kept_symbols:
+            queries.extend(self._build_queries(kept_symbols, start_date))
+        with ThreadPoolExecutor(max_workers=len(queries) or 1) as executor:
+            responses = list(executor.map(lambda query: query(), queries))
+
+        series_data = {}
+        events = dict((security_symbol, []) for security_symbol in security_symbols)
+        for kind, rsp in responses:
+            for security_symbol, security_data in rsp['response'].items():
+                if _is_error(security_data):
+                    continue
+                if kind == 'series':
+                    calculation_data = (security_data.get('results') or {}).get(self.calculation_code)
+                    if calculation_data is not None and not _is_error(calculation_data):
+                        series_data[security_symbol] = calculation_data['data']
+                elif security_symbol in events:
+                    events[security_symbol].extend(_parse_events(kind, security_data.get('results') or []))
+
+        adjusted_series = {}
+        with self._lock:
+            for security_symbol in security_symbols:
+                series = self._series.get(security_symbol)
+                data = series_data.get(security_symbol)
+                if series is None:
+                    if data is None:
+                        continue
+                    data = _to_columnar(data)
+                    series = self._series[security_symbol] = AdjustedSeries(data.days, data.raw_values)
+                elif data is not None:
+                    series.splice(data)
+                series.apply_events(events[security_symbol])
+                adjusted_series[security_symbol] = series
+
+        return adjusted_series
+
+    def _build_queries(self, security_symbols, start_date):
+        client = self.client
+        queries = [lambda: ('series', client.get_series(security_symbols, [self.calculation_code],
+            query_start_date=start_date))]
+        if self.adjust_dividends:
+            queries.append(lambda: ('dividend', client.get_dividends(security_symbols, ex_start_date=start_date)))
+        if hasattr(client, 'get_stock_splits'):
+            queries.append(lambda: ('split', client.get_stock_splits(security_symbols, split_start_date=start_date)))
+        return queries
+
+
+def _to_columnar(data):
+    if isinstance(data, ColumnarSeries):
+        return ColumnarSeries(array('q', data.days), array('d', data.raw_values))
+    return ColumnarSeries.from_data(data)
+
+
+def _parse_events(kind, results):
+    """
+    Returns:
+        the (key, kind, day, amount) tuples of the dividends or executed
+        splits of an events response, keyed by their own fields so that
+        events fetched again are recognized.
+    """
+    events = []
+    for event in results:
+        if kind == 'split':
+            if event.get('status', 'executed') != 'executed' or not event.get('day'):
+                continue
+            date, amount = event['day'], event.get('ratio')
+        else:
+            if not event.get('ex_date') or event.get('dividend_amount') is None:
+                continue
+            date, amount = event['ex_date'], event['dividend_amount']
+
+        key = (kind, date, amount, event.get('dividend_type'))
+        events.append((key, kind, _parse_date(date).toordinal() - EPOCH_ORDINAL, amount))
+
+    return events
@@ -0,0 +1,372 @@
+import asyncio
+import ssl
+import time
+from collections import deque
+from email.parser import Parser
+from http.client import HTTPMessage
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.request import Request
+from pycharts import exceptions
+from pycharts.clients import CompanyClient, IndicatorClient, MutualFundClient
+from pycharts.compression import decompress, get_content_encoding
+
+
+class AsyncConnectionPool(object):
+    """
+    Pool of persistent http connections for asyncio clients. The number of
+    connections, and so the number of requests in flight at the same time,
+    is bounded by a semaphore shared by every client using the pool.
+    """
+
+    def __init__(self, max_connections=10, idle_timeout=30, timeout=None):
+        """
+        Args:
+            max_connections (int): Max number of requests in flight at the same time.
+            idle_timeout (int): Seconds after which an idle connection is closed instead of reused.
+            timeout (int): Timeout in seconds for each request.
+        """
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle_connections = {}
+        self._semaphore = None
+
+    async def request(self, req, transfer_stats=None):
+        """
+        Sends a request over a pooled connection.
+
+        Args:
+            req (Request): urllib request object
+            transfer_stats (TransferStats): Optional stats the response is counted in.
+
+        Returns:
+            bytes of the response body, decompressed per its Content-Encoding.
+
+        Raises:
+            HTTPError for any response with a 4xx or 5xx status code.
+        """
+        # the semaphore has to be created by a running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            status, reason, headers, body = await asyncio.wait_for(self._send(req), self.timeout)
+
+        if status >= 400:
+            raise HTTPError(req.get_full_url(), status, reason, headers, BytesIO(body))
+
+        raw_body = decompress(body, get_content_encoding(headers))
+        if transfer_stats is not None:
+            transfer_stats.add(len(body), len(raw_body))
+
+        return raw_body
+
+    async def close(self):
+        """
+        Closes all the idle connections of the pool.
+        """
+        idle_connections = self._idle_connections
+        self._idle_connections = {}
+        for connections in idle_connections.values():
+            for _, writer, _ in connections:
+                writer.close()
+                # wait_closed was only added in python 3.7
+                if hasattr(writer, 'wait_closed'):
+                    await writer.wait_closed()
+
+    async def _send(self, req):
+        pool_key = (req.type, req.host)
+        request_head = self._build_request_head(req)
+        while True:
+            reader, writer, is_reused = await self._get_connection(pool_key)
+            try:
+                writer.write(request_head)
+                await writer.drain()
+                status, reason, headers, body, is_reusable = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # the server may have dropped an idle keep-alive connection,
+                # in which case the request is retried on a fresh one.
+                if is_reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            if is_reusable:
+                self._idle_connections.setdefault(pool_key, []).append((reader, writer, time.time()))
+            else:
+                writer.close()
+
+            return status, reason, headers, body
+
+    async def _get_connection(self, pool_key):
+        now = time.time()
+        connections = self._idle_connections.get(pool_key, [])
+        while connections:
+            reader, writer, released_at = connections.pop()
+            if now - released_at < self.idle_timeout and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+
+        self.connections_opened += 1
+        scheme, host = pool_key
+        hostname, _, port = host.partition(':')
+        if scheme == 'https':
+            reader, writer = await asyncio.open_connection(hostname, int(port or 443),
+                ssl=ssl.create_default_context())
+        else:
+            reader, writer = await asyncio.open_connection(hostname, int(port or 80))
+
+        return reader, writer, False
+
+    def _build_request_head(self, req):
+        lines = ['{0} {1} HTTP/1.1'.format(req.get_method(), req.selector), 'Host: {0}'.format(req.host)]
+        for name, value in req.header_items():
+            lines.append('{0}: {1}'.format(name, value))
+        lines.append('Connection: keep-alive')
+
+        return '{0}\r\n\r\n'.format('\r\n'.join(lines)).encode('latin-1')
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by the server.')
+
+        version, status, reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        header_lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            header_lines.append(line.decode('latin-1'))
+        headers = Parser(_class=HTTPMessage).parsestr(''.join(header_lines))
+
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = await self._read_chunked_body(reader)
+        elif headers.get('Content-Length') is not None:
+            body = await reader.readexactly(int(headers['Content-Length']))
+        else:
+            body = await reader.read()
+
+        is_reusable = (version == 'HTTP/1.1' and headers.get('Connection', '').lower() != 'close'
+            and not reader.at_eof())
+
+        return int(status), reason, headers, body, is_reusable
+
+    async def _read_chunked_body(self, reader):
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            chunk_size = int(size_line.split(b';')[0].strip(), 16)
+            if chunk_size == 0:
+                # skip trailers
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(chunk_size))
+            await reader.readexactly(2)
+
+        return b''.join(chunks)
+
+
+# methods of the sync clients that stream responses, which asyncio clients do not support
+STREAMING_METHODS = ('stream_securities', 'stream_series', 'export_series')
+
+
+class UnsupportedMethod(object):
+    """
+    Hides a method of the sync clients from asyncio clients, so that looking
+    it up raises an AttributeError rather than the method failing once called.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        error_message = '{0} has no {1}, streaming queries are not supported by asyncio clients.'
+        raise AttributeError(error_message.format(owner.__name__, self.name))
+
+
+class AsyncClientMixin(object):
+    """
+    Turns a security client into an asyncio client. Every public query
+    method of the client returns an awaitable of the decoded json response
+    and the url building and error handling of the sync client is reused.
+    The streaming methods of the sync client are not available.
+    """
+
+    stream_securities = UnsupportedMethod('stream_securities')
+    stream_series = UnsupportedMethod('stream_series')
+    export_series = UnsupportedMethod('export_series')
+
+    def __init__(self, api_key, connection_pool=None, max_concurrency=10, cache=None, hooks=None,
+        json_decoder=None, compression=True):
+        """
+        Args:
+            api_key (str): The API key that authorizes a client to query security data
+            connection_pool (AsyncConnectionPool): Optional pool to share between clients.
+            max_concurrency (int): Max number of requests in flight when the client
+                creates its own pool.
+            cache (ResponseCache): Optional cache of responses shared by every query.
+            hooks (list): Optional callables that every RequestEvent of the client's
+                requests is passed to.
+            json_decoder: Name of the json decoder responses are decoded with, or a
+                decoder instance. Defaults to the fastest one installed.
+            compression (bool): Whether responses are requested compressed.
+        """
+        super(AsyncClientMixin, self).__init__(api_key, cache=cache, hooks=hooks, json_decoder=json_decoder,
+            compression=compression)
+        if connection_pool is None:
+            connection_pool = AsyncConnectionPool(max_connections=max_concurrency)
+        self.connection_pool = connection_pool
+
+    async def close(self):
+        """
+        Closes the idle connections of the client's pool.
+        """
+        await self.connection_pool.close()
+
+    def __dir__(self):
+        return [name for name in super(AsyncClientMixin, self).__dir__() if name not in STREAMING_METHODS]
+
+    async def get_securities(self, page=1, **filter_param):
+        url_path = self._build_url_path(None, None)
+        params = self._build_securities_params(page, filter_param)
+        if len(filter_param) <= 1:
+            return await self._get_data(url_path, params)
+
+        try:
+            return await self._get_data(url_path, params)
+        except exceptions.PyChartsRequestException as request_error:
+            if request_error.error_code != 400:
+                raise
+
+        async def scan_filter(query_filter):
+            filter_rsp = await self.get_securities(1, **dict([query_filter]))
+            num_pages = filter_rsp['meta']['pagination_info']['num_pages']
+            page_rsps = await asyncio.gather(*[self.get_securities(page, **dict([query_filter]))
+                for page in range(2, num_pages + 1)])
+            securities = list(filter_rsp['response'])
+            for page_rsp in page_rsps:
+                securities.extend(page_rsp['response'])
+            return securities
+
+        filter_scans = await asyncio.gather(*[scan_filter(query_filter) for query_filter in filter_param.items()])
+        return self._build_intersected_securities_response(filter_scans, page, self._build_url(url_path, params))
+
+    def iter_securities(self, prefetch_pages=4, **filter_param):
+        """
+        Returns:
+            SecuritiesIterator, an async iterator of the security dicts of every page.
+        """
+        return SecuritiesIterator(self, prefetch_pages, filter_param)
+
+    async def _get_batched_data(self, security_symbols, query_type_path, query_keys=None, params=None):
+        url_paths = self._build_batched_url_paths(security_symbols, query_type_path, query_keys)
+        responses = await asyncio.gather(*[self._get_data(url_path, params) for url_path in url_paths])
+        if len(responses) == 1:
+            return responses[0]
+
+        return self._merge_responses(responses)
+
+    async def _get_data(self, url_path, params=None):
+        tracker = self._track_request(url_path, params)
+        try:
+            cached_response = self._get_cached_response(url_path, params)
+            if cached_response is not None:
+                tracker.response_received(len(cached_response), cache_hit=True)
+                parsed_rsp = self._load_response(cached_response)
+                tracker.parse_complete()
+                return parsed_rsp
+
+            req = Request(self._build_url(url_path, params), headers=self.header)
+            response = await self._read_response(req)
+            tracker.response_received(len(response))
+            parsed_rsp = self._load_response(response)
+            tracker.parse_complete()
+        except Exception as exception:
+            tracker.error(exception)
+            raise
+        self._cache_response(url_path, params, response)
+
+        return parsed_rsp
+
+    async def _read_response(self, req):
+        try:
+            return await self.connection_pool.request(req, self.transfer_stats)
+        except HTTPError as http_error:
+            self._raise_for_http_error(http_error)
+
+
+class SecuritiesIterator(object):
+    """
+    Async iterator over the securities of every page of the /<security_type>
+    endpoint. Once the first page reveals the number of pages, up to
+    prefetch_pages upcoming pages are fetched concurrently while the current
+    one is consumed.
+
+    It is written as a class rather than an async generator, which python 3.5
+    does not support.
+    """
+
+    def __init__(self, client, prefetch_pages, filter_param):
+        self.client = client
+        self.prefetch_pages = prefetch_pages
+        self.filter_param = filter_param
+        self._securities = deque()
+        self._page_tasks = deque()
+        self._next_page = 1
+        self._num_pages = None
+        self._is_closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._securities:
+            if self._is_closed:
+                raise StopAsyncIteration
+            elif self._num_pages is None:
+                securities_rsp = await self.client.get_securities(1, **self.filter_param)
+                self._num_pages = securities_rsp['meta']['pagination_info']['num_pages']
+                self._next_page = 2
+            elif self._next_page <= self._num_pages or self._page_tasks:
+                while self._next_page <= self._num_pages and len(self._page_tasks) < self.prefetch_pages:
+                    self._page_tasks.append(asyncio.ensure_future(
+                        self.client.get_securities(self._next_page, **self.filter_param)))
+                    self._next_page += 1
+                try:
+                    securities_rsp = await self._page_tasks.popleft()
+                except BaseException:
+                    await self.aclose()
+                    raise
+            else:
+                raise StopAsyncIteration
+            self._securities.extend(securities_rsp['response'])
+
+        return self._securities.popleft()
+
+    async def aclose(self):
+        """
+        Stops fetching pages, for callers that stop iterating early.
+        """
+        self._is_closed = True
+        for page_task in self._page_tasks:
+            page_task.cancel()
+        self._page_tasks.clear()
+
+
+class AsyncCompanyClient(AsyncClientMixin, CompanyClient):
+    pass
+
+
+class AsyncMutualFundClient(AsyncClientMixin, MutualFundClient):
+    pass
+
+
+class AsyncIndicatorClient(AsyncClientMixin, IndicatorClient):
+    pass
@@ -1,5 +1,6 @@
 import datetime
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pycharts import exceptions
 try:
     # Python 3
@@ -23,34 +24,154 @@ class BaseSecurityClient(object):
     BASE_URL = 'https://ycharts.com/api'
     SECURITY_TYPE_PATH = None
     VALID_SECURITY_FILTERS = None
-
-    def __init__(self, api_key):
+    # max number of symbols or codes the api accepts in a single list arg
+    MAX_LIST_LENGTH = 100
+    # containers of the responses that are decoded member by member when streaming
+    SECURITIES_STREAM_PATHS = [('response',)]
+    SERIES_STREAM_PATHS = [('response',), ('response', '*'), ('response', '*', 'results')]
+
+    def __init__(self, api_key, max_workers=8, connection_pool=None, cache=None, series_store=None,
+        columnar_series=False, coalescer=None, throttle=None, series_window=None, hooks=None, json_decoder=None,
+        compression=True, compact_results=False, point_in_time_store=None, local_resampling=False):
         """
         Args:
             api_key (str): The API key that authorizes a client to query security data
+            max_workers (int): Max number of concurrent requests used when a query
+                has to be split into several batches.
+            connection_pool (ConnectionPool): Optional pool of keep-alive connections
+                used for every request of the client.
+            cache (ResponseCache): Optional cache of responses shared by every query.
+            series_store (SeriesStore): Optional disk store of series, so that later
+                series queries only fetch the data after the last stored date.
+            columnar_series (bool): Whether series data is returned as ColumnarSeries
+                instead of lists of [date, value] pairs.
+            coalescer (RequestCoalescer): Optional single flight layer, so that concurrent
+                identical queries share one request.
+            throttle (Throttle): Optional rate limiting, adaptive concurrency and retries
+                for every request of the client.
+            series_window (timedelta): Optional length of the sub ranges that series
+                queries with a start date are split into and fetched concurrently.
+            hooks (list): Optional callables that every RequestEvent of the client's
+                requests is passed to, such as a MetricsCollector or LoggingHook.
+            json_decoder: Name of the json decoder responses are decoded with, out of
+                json, orjson and msgspec, or a decoder instance. Defaults to the
+                fastest one installed.
+            compression (bool): Whether responses are requested gzip, deflate or,
+                when brotli is installed, brotli compressed.
+            compact_results (bool): Whether points and info queries return a PointsTable
+                or InfoTable instead of the decoded json.
+            point_in_time_store (PointInTimeStore): Optional in memory index of fetched
+                series and points that answers the point queries it covers without a request.
+            local_resampling (bool): Whether series queries with resampling or aggregation
+                fetch the unresampled series and resample it locally, so that with a cache
+                or series store every view of a series is derived from one request.
         """
+        if series_window is not None and series_window <= datetime.timedelta(0):
+            error_message = 'Invalid series window. Must be a positive timedelta.'
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+
+        # the feature modules are imported on first use, so that importing the
+        # clients stays cheap, and the json decoder is resolved in here
+        from pycharts.compression import ACCEPT_ENCODING, TransferStats
+        from pycharts.decoding import get_json_decoder
+
         self.header = {'X-YCHARTSAUTHORIZATION': api_key}
+        if compression:
+            self.header['Accept-Encoding'] = ACCEPT_ENCODING
+        self.max_workers = max_workers
+        self.connection_pool = connection_pool
+        self.cache = cache
+        self.series_store = series_store
+        self.columnar_series = columnar_series
+        self.coalescer = coalescer
+        self.throttle = throttle
+        self.series_window = series_window
+        self.hooks = list(hooks or [])
+        self.json_decoder = get_json_decoder(json_decoder)
+        # bytes of every response as received and once decompressed
+        self.transfer_stats = TransferStats()
+        self.compact_results = compact_results
+        self.point_in_time_store = point_in_time_store
+        self.local_resampling = local_resampling
 
     def get_securities(self, page=1, **filter_param):
         """
         Queries /<security_type> endpoint to return a paged
         list of securities.
+
+        Notes:
+            Every filter is passed to the endpoint. If the endpoint rejects a
+            combination of filters, each filter is scanned on its own and the
+            securities matching all of them are returned as a single page.
         """
         url_path = self._build_url_path(None, None)
-        params = {'page': page}
-        # the endpoints respond just fine to invaliid query params,
-        # they just ignore them, but the the real value of the endpoints
-        # is only revealed when using the filters, so let's not waste
-        # requests on filters that don't do anything.
-        if filter_param:
-            query_filter = filter_param.popitem()
-            if query_filter[0] in self.VALID_SECURITY_FILTERS:
-                params[query_filter[0]] = query_filter[1]
-            else:
-                error_msg = 'Invalid filter param. Must be one of: {0}'.format(','.join(self.VALID_SECURITY_FILTERS))
-                raise exceptions.PyChartsRequestException(error_msg)
+        params = self._build_securities_params(page, filter_param)
+        if len(filter_param) <= 1:
+            return self._get_data(url_path, params)
+
+        try:
+            return self._get_data(url_path, params)
+        except exceptions.PyChartsRequestException as request_error:
+            if request_error.error_code != 400:
+                raise
+
+        max_workers = min(self.max_workers, len(filter_param))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            filter_scans = list(executor.map(lambda query_filter: list(self.iter_securities(**dict([query_filter]))),
+                filter_param.items()))
 
-        return self._get_data(url_path, params)
+        return self._build_intersected_securities_response(filter_scans, page, self._build_url(url_path, params))
+
+    def iter_securities(self, prefetch_pages=4, **filter_param):
+        """
+        Iterates over the securities of every page of the /<security_type> endpoint.
+        Once the first page reveals the number of pages, up to prefetch_pages
+        upcoming pages are fetched concurrently while the current one is consumed.
+
+        Args:
+            prefetch_pages (int): Max number of pages fetched ahead of the one being consumed.
+
+        Returns:
+            generator of the security dicts of every page, in page order.
+        """
+        securities_rsp = self.get_securities(1, **filter_param)
+        for security in securities_rsp['response']:
+            yield security
+
+        num_pages = securities_rsp['meta']['pagination_info']['num_pages']
+        if num_pages <= 1:
+            return
+
+        page_futures = deque()
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, prefetch_pages)) as executor:
+            try:
+                while next_page <= num_pages or page_futures:
+                    while next_page <= num_pages and len(page_futures) < prefetch_pages:
+                        page_futures.append(executor.submit(self.get_securities, next_page, **filter_param))
+                        next_page += 1
+
+                    for security in page_futures.popleft().result()['response']:
+                        yield security
+            finally:
+                # stop fetching if the caller stops iterating
+                for page_future in page_futures:
+                    page_future.cancel()
+
+    def stream_securities(self, page=1, **filter_param):
+        """
+        Queries /<security_type> endpoint like get_securities, decoding
+        the response incrementally as it is read from the network.
+
+        Returns:
+            generator of the security dicts of the page.
+        """
+        url_path = self._build_url_path(None, None)
+        params = self._build_securities_params(page, filter_param)
+
+        for path, security in self._stream_data(url_path, params, self.SECURITIES_STREAM_PATHS):
+            if len(path) == 2:
+                yield security
 
     def get_points(self, security_symbols, calculation_codes, query_date=None):
         """
@@ -64,23 +185,31 @@ class BaseSecurityClient(object):
                 (int): Negative integer representing relative periods(as it relates to each calc code) in the past.
 
         Returns:
-            dict of the decoded json from server response.
+            dict of the decoded json from server response, or a PointsTable if
+            the client was created with compact_results.
 
         Notes:
-            The max length of any list arg is 100
+            List args longer than 100 are split into batches that are queried
+            concurrently and merged back into a single response.
+
+            With a point in time store, the points it can answer are not fetched,
+            and the fetched ones are added to it. Points of relative periods are
+            always fetched.
         """
         security_symbols = self._str_or_list(security_symbols)
         calculation_codes = self._str_or_list(calculation_codes)
 
-        url_path = self._build_url_path(security_symbols,
-            'points', calculation_codes)
-
         if query_date:
             params = {'date': self._format_query_date_for_url(query_date)}
         else:
             params = None
 
-        return self._get_data(url_path, params)
+        points_rsp = self._get_points_data(security_symbols, calculation_codes, query_date, params)
+        if self.compact_results:
+            from pycharts.results import PointsTable
+            return PointsTable.from_response(points_rsp)
+
+        return points_rsp
 
     def get_series(self, security_symbols, calculation_codes, query_start_date=None, query_end_date=None,
         resample_frequency=None, resample_function=None, fill_method=None, aggregate_function=None):
@@ -98,17 +227,184 @@ class BaseSecurityClient(object):
                 (int): Negative integer representing relative periods(as it relates to each calc code) in the past.
 
         Returns:
-            dict of the decoded json from server response.
+            dict of the decoded json from server response. The data of each calculation
+            is a ColumnarSeries if the client was created with columnar_series.
 
         Notes:
-            The max length of any list arg is 100
+            List args longer than 100 are split into batches that are queried
+            concurrently and merged back into a single response.
+
+            With a series window, queries with a datetime start date and no resampling
+            or aggregation are split into sub ranges that are fetched concurrently
+            and stitched back together.
+
+            With a series store, queries with datetime or no start and end dates
+            are served from the stored series, and only the data from the last
+            stored date onwards is fetched.
+
+            With a point in time store, series queried with datetime or no start
+            and end dates and no resampling or aggregation are added to it.
+
+            With local resampling, queries with datetime or no start and end dates
+            fetch the series without resampling or aggregation, which is then
+            resampled and aggregated by the client.
+        """
+        security_symbols = self._str_or_list(security_symbols)
+        calculation_codes = self._str_or_list(calculation_codes)
+
+        is_locally_resampled = (self.local_resampling and (resample_frequency or resample_function or fill_method
+            or aggregate_function) and not isinstance(query_start_date, int) and not isinstance(query_end_date, int))
+        if is_locally_resampled:
+            from pycharts.resampling import resample_response, validate_resample_settings
+            validate_resample_settings(resample_frequency, resample_function, fill_method, aggregate_function)
+            # the indicator client's get_series takes no codes
+            series_rsp = BaseSecurityClient.get_series(self, security_symbols, calculation_codes, query_start_date,
+                query_end_date)
+            return resample_response(series_rsp, resample_frequency, resample_function, fill_method,
+                aggregate_function)
+
+        params = self._build_series_params(query_start_date, query_end_date,
+            resample_frequency, resample_function, fill_method, aggregate_function)
+
+        is_storable = (self.series_store is not None and calculation_codes and not aggregate_function
+            and not isinstance(query_start_date, int) and not isinstance(query_end_date, int))
+        if is_storable:
+            resample_settings = (resample_frequency, resample_function, fill_method)
+            series_rsp = self._get_stored_series(security_symbols, calculation_codes, params, resample_settings)
+        else:
+            series_rsp = self._get_series_data(security_symbols, calculation_codes, params)
+
+        if self.columnar_series:
+            from pycharts.columnar import to_columnar
+            to_columnar(series_rsp)
+
+        is_point_in_time = (self.point_in_time_store is not None and not isinstance(query_start_date, int)
+            and not isinstance(query_end_date, int) and not (resample_frequency or resample_function
+            or fill_method or aggregate_function))
+        if is_point_in_time:
+            self._add_point_in_time_series(series_rsp, params)
+
+        return series_rsp
+
+    def stream_series(self, security_symbols, calculation_codes, query_start_date=None, query_end_date=None,
+        resample_frequency=None, resample_function=None, fill_method=None, aggregate_function=None):
+        """
+        Queries data from a /<security_type>/series endpoint like get_series,
+        decoding the response incrementally as it is read from the network so
+        that only one calculation's data has to be held in memory at a time.
+
+        Returns:
+            generator of (security_symbol, calculation_code, calculation_data) tuples,
+            where calculation_data holds the meta and data of the calculation.
+            Securities with an error status are yielded as (security_symbol, None, {'meta': meta}).
         """
         security_symbols = self._str_or_list(security_symbols)
         calculation_codes = self._str_or_list(calculation_codes)
+        params = self._build_series_params(query_start_date, query_end_date,
+            resample_frequency, resample_function, fill_method, aggregate_function)
+
+        for url_path in self._build_batched_url_paths(security_symbols, 'series', calculation_codes):
+            for path, value in self._stream_data(url_path, params, self.SERIES_STREAM_PATHS):
+                if len(path) == 4:
+                    yield path[1], path[3], value
+                elif len(path) == 3 and path[2] == 'meta' and value['status'] == 'error':
+                    yield path[1], None, {'meta': value}
+
+    def export_series(self, security_symbols, calculation_codes, path, format='csv', query_start_date=None,
+        query_end_date=None, resample_frequency=None, resample_function=None, fill_method=None,
+        aggregate_function=None):
+        """
+        Queries data from a /<security_type>/series endpoint and writes it to a
+        file in a long (symbol, code, date, value) layout. Responses are streamed
+        one batch of symbols at a time and each calculation is written as soon
+        as it is decoded, so memory use stays flat however many symbols are exported.
+
+        Args:
+            path (str): Path of the file to write.
+            format (str): One of 'csv', 'parquet' or 'arrow' (Arrow IPC). Parquet and
+                Arrow IPC require pyarrow.
 
-        url_path = self._build_url_path(security_symbols, 
-            'series', calculation_codes)
+        Returns:
+            the number of rows written.
+        """
+        # imported on first export, since most clients never export
+        from pycharts.export import get_series_writer
+
+        writer = get_series_writer(path, format)
+        try:
+            # the indicator client's stream_series takes no codes
+            series_results = BaseSecurityClient.stream_series(self, security_symbols, calculation_codes,
+                query_start_date, query_end_date, resample_frequency, resample_function, fill_method,
+                aggregate_function)
+            for security_symbol, calculation_code, calculation_data in series_results:
+                if calculation_code is not None and calculation_data['meta']['status'] == 'ok':
+                    writer.write_series(security_symbol, calculation_code, calculation_data['data'])
+        finally:
+            writer.close()
+
+        return writer.num_rows
+
+    def get_info(self, security_symbols, info_field_codes):
+        """
+        Queries data from a /<security_type>/info endpoint.
+
+        Args:
+            security_symbols (list): List of string symbols
+            info_field_codes (list): List of string info field codes
+
+        Returns:
+            dict of the decoded json from server response, or an InfoTable if
+            the client was created with compact_results.
 
+        Notes:
+            List args longer than 100 are split into batches that are queried
+            concurrently and merged back into a single response.
+
+        """
+        security_symbols = self._str_or_list(security_symbols)
+        info_field_codes = self._str_or_list(info_field_codes)
+
+        info_rsp = self._get_batched_data(security_symbols, 'info', info_field_codes)
+        if self.compact_results:
+            from pycharts.results import InfoTable
+            return InfoTable.from_response(info_rsp)
+
+        return info_rsp
+
+    # Private Helper Methods
+    def _build_securities_params(self, page, filter_param):
+        params = {'page': page}
+        # the endpoints respond just fine to invaliid query params,
+        # they just ignore them, but the the real value of the endpoints
+        # is only revealed when using the filters, so let's not waste
+        # requests on filters that don't do anything.
+        for filter_name, filter_value in filter_param.items():
+            if filter_name in self.VALID_SECURITY_FILTERS:
+                params[filter_name] = filter_value
+            else:
+                error_msg = 'Invalid filter param. Must be one of: {0}'.format(','.join(self.VALID_SECURITY_FILTERS))
+                raise exceptions.PyChartsRequestException(error_msg)
+
+        return params
+
+    def _build_intersected_securities_response(self, filter_scans, page, url):
+        matching_symbols = set.intersection(*[set(security['symbol'] for security in filter_scan)
+            for filter_scan in filter_scans])
+        securities = [security for security in filter_scans[0] if security['symbol'] in matching_symbols]
+        if page != 1:
+            securities = []
+
+        pagination_info = {
+            'start_index': 1 if securities else 0,
+            'end_index': len(securities),
+            'num_items': len(matching_symbols),
+            'num_pages': 1,
+            'current_page_num': page,
+        }
+        return {'response': securities, 'meta': {'status': 'ok', 'url': url, 'pagination_info': pagination_info}}
+
+    def _build_series_params(self, query_start_date, query_end_date,
+        resample_frequency, resample_function, fill_method, aggregate_function):
         params = {}
         if query_start_date:
             params['start_date'] = self._format_query_date_for_url(query_start_date)
@@ -123,69 +419,436 @@ class BaseSecurityClient(object):
         if aggregate_function:
             params['aggregate_function'] = aggregate_function
 
-        return self._get_data(url_path, params)  
+        return params
 
-    def get_info(self, security_symbols, info_field_codes):
+    def _get_batched_data(self, security_symbols, query_type_path, query_keys=None, params=None):
         """
-        Queries data from a /<security_type>/info endpoint.
+        Queries a symbol based endpoint, splitting symbol and key lists that are
+        longer than MAX_LIST_LENGTH into batches that are fetched concurrently.
+        The batch responses are merged into one response shaped like a single call.
+        """
+        url_paths = self._build_batched_url_paths(security_symbols, query_type_path, query_keys)
+        if len(url_paths) == 1:
+            return self._get_data(url_paths[0], params)
+
+        max_workers = min(self.max_workers, len(url_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda url_path: self._get_data(url_path, params), url_paths))
+
+        return self._merge_responses(responses)
+
+    def _build_batched_url_paths(self, security_symbols, query_type_path, query_keys=None):
+        symbol_batches = self._chunk_list(security_symbols)
+        key_batches = self._chunk_list(query_keys) if query_keys else [query_keys]
+
+        return [self._build_url_path(symbol_batch, query_type_path, key_batch)
+            for symbol_batch in symbol_batches for key_batch in key_batches]
+
+    def _chunk_list(self, list_param):
+        if not list_param:
+            return [list_param]
+        return [list_param[i:i + self.MAX_LIST_LENGTH]
+            for i in range(0, len(list_param), self.MAX_LIST_LENGTH)]
+
+    def _merge_responses(self, responses):
+        merged_response = {}
+        for response in responses:
+            for security_symbol, security_data in response['response'].items():
+                merged_security_data = merged_response.get(security_symbol)
+                if merged_security_data is None:
+                    merged_response[security_symbol] = security_data
+                elif isinstance(security_data.get('results'), dict):
+                    # the same symbol shows up once per batch of codes
+                    merged_security_data['results'].update(security_data['results'])
+
+        return {'response': merged_response, 'meta': responses[0]['meta']}
+
+    def _get_series_data(self, security_symbols, calculation_codes, params):
+        windows = self._build_series_windows(params)
+        if len(windows) <= 1:
+            return self._get_batched_data(security_symbols, 'series', calculation_codes, params)
+
+        window_params = []
+        for window_start_date, window_end_date in windows:
+            window_param = dict(params, start_date=window_start_date)
+            if window_end_date is None:
+                window_param.pop('end_date', None)
+            else:
+                window_param['end_date'] = window_end_date
+            window_params.append(window_param)
 
-        Args:
-            security_symbols (list): List of string symbols
-            info_field_codes (list): List of string info field codes
+        max_workers = min(self.max_workers, len(window_params))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda window_param: self._get_batched_data(
+                security_symbols, 'series', calculation_codes, window_param), window_params))
 
-        Returns:
-            dict of the decoded json from server response.
+        return self._stitch_series_responses(responses)
 
-        Notes:
-            The max length of any list arg is 100
+    def _build_series_windows(self, params):
+        """
+        Splits the date range of a series query into windows of series_window
+        length. Consecutive windows share their boundary date.
+        """
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        # resampled, filled and aggregated series depend on the values before
+        # a window, so they are only right when queried whole
+        is_splittable = (self.series_window and isinstance(start_date, str) and not isinstance(end_date, int)
+            and not any(key in params for key in ('resample_frequency', 'resample_function', 'fill_method',
+            'aggregate_function')))
+        if not is_splittable:
+            return []
+
+        window_start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+        last_date = datetime.datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.datetime.now()
+        windows = []
+        while True:
+            window_end = window_start + self.series_window
+            if window_end >= last_date:
+                windows.append((self._format_query_date_for_url(window_start), end_date))
+                return windows
+            windows.append((self._format_query_date_for_url(window_start), self._format_query_date_for_url(window_end)))
+            window_start = window_end
+
+    def _stitch_series_responses(self, responses):
+        """
+        Joins the responses of consecutive windows. A symbol or calculation
+        that errors in any window leaves a gap in its series, so it gets the
+        error of the first window it errors in instead of the partial data.
+        """
+        stitched_rsp = responses[0]
+        for response in responses[1:]:
+            for security_symbol, security_data in response['response'].items():
+                stitched_security_data = stitched_rsp['response'].setdefault(security_symbol, security_data)
+                stitched_results = stitched_security_data.get('results')
+                if stitched_security_data is security_data or not isinstance(stitched_results, dict):
+                    continue
+                elif not isinstance(security_data.get('results'), dict):
+                    stitched_rsp['response'][security_symbol] = security_data
+                    continue
+
+                for calculation_code, calculation_data in security_data['results'].items():
+                    stitched_data = stitched_results.get(calculation_code)
+                    if stitched_data is None:
+                        stitched_results[calculation_code] = calculation_data
+                    elif stitched_data['meta']['status'] != 'ok':
+                        continue
+                    elif calculation_data['meta']['status'] != 'ok':
+                        stitched_results[calculation_code] = calculation_data
+                    else:
+                        # skip the boundary dates the windows share
+                        last_date = stitched_data['data'][-1][0] if stitched_data['data'] else ''
+                        stitched_data['data'].extend(point for point in calculation_data['data'] if point[0] > last_date)
+
+        return stitched_rsp
+
+    def _get_stored_series(self, security_symbols, calculation_codes, params, resample_settings):
+        from pycharts.series_store import is_covered, slice_series, splice_series
+
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        stored_series = {}
+        for security_symbol in security_symbols:
+            for calculation_code in calculation_codes:
+                stored_series[security_symbol, calculation_code] = self.series_store.load(
+                    self.SECURITY_TYPE_PATH, security_symbol, calculation_code, resample_settings)
+
+        if not all(is_covered(series, start_date) for series in stored_series.values()):
+            series_rsp = self._get_series_data(security_symbols, calculation_codes, params)
+            # only open ended series can be topped up later on
+            if end_date is None:
+                self._store_series(series_rsp, resample_settings, start_date)
+            return series_rsp
+
+        # refetch from the earliest last stored date, since the last stored
+        # value may have been revised since it was fetched. Series without
+        # data are refetched from the date they were fetched up to.
+        splice_date = min(series['data'][-1][0] if series['data']
+            else series.get('fetched_date') or series['start_date'] or ''
+            for series in stored_series.values())
+        if end_date is not None and splice_date and end_date < splice_date:
+            # the whole range is on disk already
+            return self._build_stored_series_response(security_symbols, calculation_codes, params, stored_series)
+
+        tail_params = dict(params)
+        if splice_date:
+            tail_params['start_date'] = splice_date
+        else:
+            tail_params.pop('start_date', None)
+        series_rsp = self._get_series_data(security_symbols, calculation_codes, tail_params)
+
+        for security_symbol, security_data in series_rsp['response'].items():
+            for calculation_code, calculation_data in security_data.get('results', {}).items():
+                series = stored_series.get((security_symbol, calculation_code))
+                if series is None or calculation_data['meta']['status'] != 'ok':
+                    continue
+
+                data = splice_series(series['data'], calculation_data['data'], splice_date)
+                # series without data are saved again to move their fetched date on
+                if data != series['data'] or not data:
+                    self.series_store.save(self.SECURITY_TYPE_PATH, security_symbol, calculation_code,
+                        resample_settings, series['start_date'], data, end_date or _get_today())
+                calculation_data['data'] = slice_series(data, start_date, end_date)
+
+        return series_rsp
+
+    def _store_series(self, series_rsp, resample_settings, start_date):
+        for security_symbol, security_data in series_rsp['response'].items():
+            for calculation_code, calculation_data in security_data.get('results', {}).items():
+                if calculation_data['meta']['status'] == 'ok':
+                    self.series_store.save(self.SECURITY_TYPE_PATH, security_symbol, calculation_code,
+                        resample_settings, start_date, calculation_data['data'], _get_today())
+
+    def _build_stored_series_response(self, security_symbols, calculation_codes, params, stored_series):
+        from pycharts.series_store import slice_series
+
+        response = {}
+        for security_symbol in security_symbols:
+            results = {}
+            for calculation_code in calculation_codes:
+                data = slice_series(stored_series[security_symbol, calculation_code]['data'],
+                    params.get('start_date'), params.get('end_date'))
+                results[calculation_code] = {'meta': {'status': 'ok'}, 'data': data}
+            response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+        url_path = self._build_url_path(security_symbols, 'series', calculation_codes)
+        return {'response': response, 'meta': {'status': 'ok', 'url': self._build_url(url_path, params)}}
+
+    def _get_points_data(self, security_symbols, calculation_codes, query_date, params):
+        # relative periods are resolved by the server, so they are always fetched
+        if (self.point_in_time_store is not None and security_symbols and calculation_codes and
+                not isinstance(query_date, int)):
+            return self._get_point_in_time_points(security_symbols, calculation_codes, query_date or None, params)
+        return self._get_batched_data(security_symbols, 'points', calculation_codes, params)
+
+    def _get_point_in_time_points(self, security_symbols, calculation_codes, query_date, params):
+        """
+        Answers the points the point in time store covers from it, and fetches
+        the rest. Only the symbols and codes with a point missing from the store
+        are fetched, and the fetched points are added to it.
+        """
+        stored_points = {}
+        missing_symbols = []
+        missing_codes = []
+        for security_symbol in security_symbols:
+            for calculation_code in calculation_codes:
+                point = self.point_in_time_store.get_point(self.SECURITY_TYPE_PATH, security_symbol,
+                    calculation_code, query_date)
+                if point is not None:
+                    stored_points[security_symbol, calculation_code] = point
+                    continue
+
+                if security_symbol not in missing_symbols:
+                    missing_symbols.append(security_symbol)
+                if calculation_code not in missing_codes:
+                    missing_codes.append(calculation_code)
+
+        if missing_symbols:
+            points_rsp = self._get_batched_data(missing_symbols, 'points', missing_codes, params)
+            self._add_point_in_time_points(points_rsp, query_date)
+        else:
+            url_path = self._build_url_path(security_symbols, 'points', calculation_codes)
+            points_rsp = {'response': {}, 'meta': {'status': 'ok', 'url': self._build_url(url_path, params)}}
+
+        for (security_symbol, calculation_code), point in stored_points.items():
+            security_data = points_rsp['response'].setdefault(security_symbol,
+                {'meta': {'status': 'ok'}, 'results': {}})
+            if isinstance(security_data.get('results'), dict):
+                security_data['results'].setdefault(calculation_code, {'meta': {'status': 'ok'}, 'data': point})
+
+        return points_rsp
+
+    def _add_point_in_time_points(self, points_rsp, query_date):
+        for security_symbol, security_data in points_rsp['response'].items():
+            if not isinstance(security_data.get('results'), dict):
+                continue
+            for calculation_code, calculation_data in security_data['results'].items():
+                if calculation_data['meta']['status'] == 'ok':
+                    self.point_in_time_store.ingest_point(self.SECURITY_TYPE_PATH, security_symbol,
+                        calculation_code, calculation_data['data'], query_date)
+
+    def _add_point_in_time_series(self, series_rsp, params):
+        for security_symbol, security_data in series_rsp['response'].items():
+            if not isinstance(security_data.get('results'), dict):
+                continue
+            for calculation_code, calculation_data in security_data['results'].items():
+                if calculation_data['meta']['status'] == 'ok':
+                    self.point_in_time_store.ingest_series(self.SECURITY_TYPE_PATH, security_symbol,
+                        calculation_code, calculation_data['data'], params.get('start_date'),
+                        params.get('end_date'))
 
+    def _get_data(self, url_path, params=None):
+        tracker = self._track_request(url_path, params)
+        try:
+            cached_response = self._get_cached_response(url_path, params)
+            if cached_response is not None:
+                tracker.response_received(len(cached_response), cache_hit=True)
+                parsed_rsp = self._load_response(cached_response)
+                tracker.parse_complete()
+                return parsed_rsp
+
+            req = Request(self._build_url(url_path, params), headers=self.header)
+            if self.coalescer is not None:
+                # callers share the response body but each decodes its own copy
+                response = self.coalescer.do(self._get_request_key(url_path, params),
+                    lambda: self._read_response(req))
+            else:
+                response = self._read_response(req)
+            tracker.response_received(len(response))
+            parsed_rsp = self._load_response(response)
+            tracker.parse_complete()
+        except Exception as exception:
+            tracker.error(exception)
+            raise
+        # only responses without payload level errors make it to the cache
+        self._cache_response(url_path, params, response)
+
+        return parsed_rsp
+
+    def _track_request(self, url_path, params=None):
         """
-        security_symbols = self._str_or_list(security_symbols)
-        info_field_codes = self._str_or_list(info_field_codes)
+        Returns:
+            a RequestTracker that emits the events of a request to the
+            client's hooks, or a no-op tracker when it has none.
+        """
+        from pycharts.instrumentation import NULL_REQUEST_TRACKER, RequestTracker
 
-        url_path = self._build_url_path(security_symbols,
-            'info', info_field_codes)
+        if not self.hooks:
+            return NULL_REQUEST_TRACKER
 
-        return self._get_data(url_path, None)
+        url_path_parts = url_path.split('/')
+        # <security_type>/<symbols>/<query_type>/<codes>
+        num_symbols = len(url_path_parts[1].split(',')) if len(url_path_parts) > 1 else 0
+        num_codes = len(url_path_parts[3].split(',')) if len(url_path_parts) > 3 else 0
+        return RequestTracker(self.hooks, self._get_endpoint(url_path), self._build_url(url_path, params),
+            num_symbols, num_codes)
 
-    # Private Helper Methods
-    def _get_data(self, url_path, params=None):
+    def _build_url(self, url_path, params=None):
         url = '{0}/{1}/{2}'.format(self.BASE_URL, self.API_VERSION, url_path)
         if params:
             encoded_params = urlencode(params)
             url = '{0}?{1}'.format(url, encoded_params)
 
-        url = url.replace(' ', '')
-        req = Request(url, headers=self.header)
-        response = self._parse_response(req)
-        
-        return response
+        return url.replace(' ', '')
+
+    def _build_normalized_url(self, url_path, params=None):
+        """
+        Builds the url of a query with its symbols, codes and params sorted,
+        so that queries that only differ by argument order share the same url.
+        """
+        url_path_parts = url_path.split('/')
+        # <security_type>/<symbols>/<query_type>/<codes>
+        for i in (1, 3):
+            if i < len(url_path_parts):
+                url_path_parts[i] = ','.join(sorted(url_path_parts[i].split(',')))
+
+        sorted_params = sorted(params.items()) if params else None
+        return self._build_url('/'.join(url_path_parts), sorted_params)
+
+    def _get_request_key(self, url_path, params=None):
+        """
+        Returns:
+            the (api key, normalized url) key a query's response is shared
+            under, so that clients with different keys never share responses.
+        """
+        return self.header['X-YCHARTSAUTHORIZATION'], self._build_normalized_url(url_path, params)
+
+    def _get_endpoint(self, url_path):
+        url_path_parts = url_path.split('/')
+        if len(url_path_parts) > 2:
+            return url_path_parts[2]
+        return 'securities'
+
+    def _get_cached_response(self, url_path, params=None):
+        if self.cache is None:
+            return None
+        return self.cache.get(self._get_request_key(url_path, params))
 
-    def _parse_response(self, req):
+    def _cache_response(self, url_path, params, response):
+        if self.cache is not None:
+            self.cache.set(self._get_request_key(url_path, params), response, self._get_endpoint(url_path))
+
+    def _stream_data(self, url_path, params, stream_paths):
+        from pycharts.compression import DecompressingReader, get_content_encoding
+        from pycharts.streaming import iter_json_items
+
+        tracker = self._track_request(url_path, params)
+        req = Request(self._build_url(url_path, params), headers=self.header)
+        try:
+            try:
+                response = self._urlopen(req)
+            except HTTPError as http_error:
+                self._raise_for_http_error(http_error)
+            reader = None
+            try:
+                # the reader is built in here, so that the response is closed
+                # even when its Content-Encoding is not supported
+                reader = DecompressingReader(response, get_content_encoding(getattr(response, 'headers', None)),
+                    self.transfer_stats)
+                tracker.response_received()
+                for path, value in iter_json_items(reader, stream_paths):
+                    if path == ('meta',):
+                        self._raise_for_payload_error(value)
+                    else:
+                        yield path, value
+            finally:
+                if reader is not None:
+                    reader.close()
+                else:
+                    response.close()
+        except Exception as exception:
+            tracker.error(exception)
+            raise
+        tracker.parse_complete()
+
+    def _read_response(self, req):
         try:
-            response = urlopen(req).read().decode('utf-8')
+            if self.throttle is not None:
+                api_key = self.header['X-YCHARTSAUTHORIZATION']
+                return self.throttle.call(api_key, lambda: self._read_body(self._urlopen(req)))
+            return self._read_body(self._urlopen(req))
         except HTTPError as http_error:
-            if http_error.code == 404:
-                raise exceptions.PyChartsRequestUrlNotFoundException()
-            elif http_error.code == 401:
-                raise exceptions.PyChartsRequestUnauthorizedException()
-            elif http_error.code == 400:
-                raise exceptions.PyChartsRequestException()
-            else:
-                raise
+            self._raise_for_http_error(http_error)
 
-        parsed_rsp = json.loads(response)
-        # raise any payload level errors
-        if parsed_rsp['meta']['status'] == 'error':
-            error_code = parsed_rsp['meta']['error_code']
-            error_message = parsed_rsp['meta']['error_message']
+    def _read_body(self, response):
+        from pycharts.compression import decompress, get_content_encoding
+
+        body = response.read()
+        raw_body = decompress(body, get_content_encoding(getattr(response, 'headers', None)))
+        self.transfer_stats.add(len(body), len(raw_body))
+
+        return raw_body
+
+    def _raise_for_http_error(self, http_error):
+        if http_error.code == 404:
+            raise exceptions.PyChartsRequestUrlNotFoundException()
+        elif http_error.code == 401:
+            raise exceptions.PyChartsRequestUnauthorizedException()
+        elif http_error.code == 400:
+            raise exceptions.PyChartsRequestException()
+        else:
+            raise http_error
+
+    def _load_response(self, response):
+        parsed_rsp = self.json_decoder.decode(response)
+        self._raise_for_payload_error(parsed_rsp['meta'])
+
+        return parsed_rsp
+
+    def _raise_for_payload_error(self, meta):
+        if meta['status'] == 'error':
+            error_code = meta['error_code']
+            error_message = meta['error_message']
             if error_code == 400:
                 raise exceptions.PyChartsRequestException(error_message=error_message)
             elif error_code == 414:
                 raise exceptions.PyChartsRequestTooLongException(error_message=error_message)
 
-        return parsed_rsp
-    
+    def _urlopen(self, req):
+        if self.connection_pool is not None:
+            return self.connection_pool.urlopen(req)
+        return urlopen(req)
+
     def _build_url_path(self, security_symbols, query_type_path, query_keys=None):
 
         url_path = self.SECURITY_TYPE_PATH
@@ -216,3 +879,7 @@ class BaseSecurityClient(object):
         if not isinstance(arg, (list, tuple)) and arg is not None:
             arg = [arg]
         return arg
+
+
+def _get_today():
+    return datetime.date.today().isoformat()
@@ -0,0 +1,158 @@
+import threading
+from concurrent.futures import Future
+from pycharts.results import InfoTable, PointsTable
+
+# table the responses of each endpoint are turned into for clients with compact results
+RESULT_TABLES = {'points': PointsTable, 'info': InfoTable}
+
+
+class BatchingClient(object):
+    """
+    Wraps a security client and merges the point and info queries made within
+    a short window into as few wide queries as possible. Queries are grouped
+    by endpoint and params, each group is queried once for the union of its
+    symbols and codes, and every caller gets back the slice of the combined
+    response it asked for.
+
+    Since a merged query covers every symbol of the group for every code of
+    the group, it may return more data than the callers asked for in total.
+
+    Merged point queries go through the point in time store of the wrapped
+    client, and callers get PointsTable and InfoTable results when it was
+    created with compact_results.
+    """
+
+    def __init__(self, client, window=0.01):
+        """
+        Args:
+            client (BaseSecurityClient): The client queries are dispatched with.
+            window (float): Seconds queries are collected for before being dispatched.
+        """
+        self.client = client
+        self.window = window
+        self.queries = 0
+        self.dispatched_queries = 0
+        self._pending_queries = {}
+        self._lock = threading.Lock()
+
+    def get_points(self, security_symbols, calculation_codes=None, query_date=None):
+        """
+        Same as the get_points of the wrapped client, blocking until the merged
+        query the call is part of has been dispatched.
+        """
+        return self.submit_points(security_symbols, calculation_codes, query_date).result()
+
+    def get_info(self, security_symbols, info_field_codes):
+        """
+        Same as the get_info of the wrapped client, blocking until the merged
+        query the call is part of has been dispatched.
+        """
+        return self.submit_info(security_symbols, info_field_codes).result()
+
+    def submit_points(self, security_symbols, calculation_codes=None, query_date=None):
+        """
+        Returns:
+            Future of the points response for the symbols and codes.
+        """
+        if query_date:
+            params = {'date': self.client._format_query_date_for_url(query_date)}
+        else:
+            params = None
+
+        return self._submit('points', security_symbols, calculation_codes, params, query_date)
+
+    def submit_info(self, security_symbols, info_field_codes):
+        """
+        Returns:
+            Future of the info response for the symbols and codes.
+        """
+        return self._submit('info', security_symbols, info_field_codes, None, None)
+
+    def flush(self):
+        """
+        Dispatches every pending query right away.
+        """
+        with self._lock:
+            group_keys = list(self._pending_queries)
+
+        for group_key in group_keys:
+            self._dispatch(group_key)
+
+    def _submit(self, query_type_path, security_symbols, query_keys, params, query_date):
+        future = Future()
+        query = (self.client._str_or_list(security_symbols), self.client._str_or_list(query_keys), query_date,
+            future)
+        group_key = (query_type_path, tuple(sorted(params.items())) if params else ())
+        with self._lock:
+            self.queries += 1
+            pending_queries = self._pending_queries.get(group_key)
+            if pending_queries is None:
+                pending_queries = self._pending_queries[group_key] = []
+                timer = threading.Timer(self.window, self._dispatch, args=(group_key,))
+                timer.daemon = True
+                timer.start()
+            pending_queries.append(query)
+
+        return future
+
+    def _dispatch(self, group_key):
+        with self._lock:
+            pending_queries = self._pending_queries.pop(group_key, None)
+            if not pending_queries:
+                return
+            self.dispatched_queries += 1
+
+        query_type_path, params = group_key
+        try:
+            security_symbols = self._merge_lists(query[0] for query in pending_queries)
+            query_keys = self._merge_lists(query[1] for query in pending_queries if query[1]) or None
+            if query_type_path == 'points':
+                # the queries of a group are for the same date
+                merged_rsp = self.client._get_points_data(security_symbols, query_keys, pending_queries[0][2],
+                    dict(params) or None)
+            else:
+                merged_rsp = self.client._get_batched_data(security_symbols, query_type_path, query_keys,
+                    dict(params) or None)
+        except Exception as exception:
+            for _, _, _, future in pending_queries:
+                future.set_exception(exception)
+            return
+
+        try:
+            for query_symbols, query_keys, _, future in pending_queries:
+                query_rsp = self._slice_response(merged_rsp, query_symbols, query_keys)
+                if self.client.compact_results:
+                    query_rsp = RESULT_TABLES[query_type_path].from_response(query_rsp)
+                future.set_result(query_rsp)
+        except Exception as exception:
+            # callers block on their future, so none can be left unresolved
+            for _, _, _, future in pending_queries:
+                if not future.done():
+                    future.set_exception(exception)
+
+    def _merge_lists(self, lists):
+        merged_list = []
+        seen = set()
+        for list_param in lists:
+            for item in list_param:
+                if item not in seen:
+                    seen.add(item)
+                    merged_list.append(item)
+
+        return merged_list
+
+    def _slice_response(self, merged_rsp, security_symbols, query_keys):
+        response = {}
+        for security_symbol in security_symbols:
+            security_data = merged_rsp['response'].get(security_symbol)
+            if security_data is None:
+                continue
+
+            results = security_data.get('results')
+            if query_keys and isinstance(results, dict):
+                security_data = dict(security_data)
+                security_data['results'] = dict((query_key, results[query_key])
+                    for query_key in query_keys if query_key in results)
+            response[security_symbol] = security_data
+
+        return {'response': response, 'meta': merged_rsp['meta']}
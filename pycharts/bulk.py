@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pycharts import exceptions
+from pycharts.clients import CompanyClient, IndicatorClient, MutualFundClient
+
+logger = logging.getLogger('pycharts')
+
+CLIENT_CLASSES = {
+    'companies': CompanyClient,
+    'mutual_funds': MutualFundClient,
+    'indicators': IndicatorClient,
+}
+MANIFEST_FILE_NAME = 'manifest.json'
+# job args that do not change what is exported, and may differ between runs of a job
+RUN_OPTIONS = ('base_url', 'client_options')
+
+
+class BulkJob(object):
+    """
+    Series export of a universe of securities, split into shards of
+    shard_size symbols that are exported by worker processes to a file per
+    shard. A job is built from a json spec keyed by the args below, and run
+    with run_bulk_job or `python -m pycharts.bulk job.json output_dir`.
+    """
+
+    def __init__(self, security_type, calculation_codes=None, security_symbols=None, security_filters=None,
+        query_start_date=None, query_end_date=None, format='csv', shard_size=500, base_url=None,
+        client_options=None):
+        """
+        Args:
+            security_type (str): One of companies, mutual_funds and indicators.
+            calculation_codes (list): Codes to export, not used by indicators.
+            security_symbols (list): Symbols to export.
+            security_filters (dict): Discovery filters the symbols to export are found
+                with, when no symbols are given.
+            query_start_date (str): YYYY-MM-DD date or negative relative period to export from.
+            query_end_date (str): YYYY-MM-DD date or negative relative period to export up to.
+            format (str): One of 'csv', 'parquet' or 'arrow', the format of the shard files.
+            shard_size (int): Number of symbols of every shard.
+            base_url (str): Optional base url of the api, in place of the client's.
+            client_options (dict): Keyword args every worker's client is created with.
+        """
+        if security_type not in CLIENT_CLASSES:
+            error_message = 'Invalid security type. Must be one of: {0}'.format(','.join(sorted(CLIENT_CLASSES)))
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+        if not security_symbols and security_filters is None:
+            error_message = 'A bulk job needs security symbols or security filters.'
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+        if not calculation_codes and security_type != 'indicators':
+            error_message = 'A bulk job needs calculation codes.'
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+
+        self.security_type = security_type
+        self.calculation_codes = calculation_codes
+        self.security_symbols = security_symbols
+        self.security_filters = security_filters
+        self.query_start_date = query_start_date
+        self.query_end_date = query_end_date
+        self.format = format
+        self.shard_size = shard_size
+        self.base_url = base_url
+        self.client_options = client_options or {}
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Args:
+            spec (dict): Decoded json job spec, keyed by the args of BulkJob.
+        """
+        try:
+            return cls(**spec)
+        except TypeError as type_error:
+            raise exceptions.PyChartsRequestException(error_message='Invalid job spec: {0}'.format(type_error))
+
+    def to_spec(self):
+        return {
+            'security_type': self.security_type,
+            'calculation_codes': self.calculation_codes,
+            'security_symbols': self.security_symbols,
+            'security_filters': self.security_filters,
+            'query_start_date': self.query_start_date,
+            'query_end_date': self.query_end_date,
+            'format': self.format,
+            'shard_size': self.shard_size,
+            'base_url': self.base_url,
+            'client_options': self.client_options,
+        }
+
+    def create_client(self, api_key):
+        client = CLIENT_CLASSES[self.security_type](api_key, **self.client_options)
+        if self.base_url:
+            client.BASE_URL = self.base_url
+        return client
+
+    def build_shards(self, api_key):
+        """
+        Returns:
+            list of the symbol lists of every shard, with the symbols found by
+            discovery when the job has filters instead of symbols.
+        """
+        security_symbols = self.security_symbols
+        if not security_symbols:
+            client = self.create_client(api_key)
+            security_symbols = [security['symbol'] for security in client.iter_securities(**self.security_filters)]
+
+        return [security_symbols[i:i + self.shard_size] for i in range(0, len(security_symbols), self.shard_size)]
+
+    def export_shard(self, api_key, security_symbols, path):
+        """
+        Exports the series of a shard's symbols to path.
+
+        Returns:
+            the number of rows written.
+        """
+        client = self.create_client(api_key)
+        query_start_date = _parse_query_date(self.query_start_date)
+        query_end_date = _parse_query_date(self.query_end_date)
+        if self.security_type == 'indicators':
+            return client.export_series(security_symbols, path, self.format, query_start_date, query_end_date)
+        return client.export_series(security_symbols, self.calculation_codes, path, self.format, query_start_date,
+            query_end_date)
+
+
+def run_bulk_job(job, api_key, output_dir, processes=None):
+    """
+    Exports the shards of a job that are not done yet in output_dir over a
+    pool of processes. The shards are fixed by the manifest written on the
+    first run, so that a rerun picks up where the last one left off even if
+    discovery would now find other symbols.
+
+    Args:
+        job (BulkJob): The job to run.
+        api_key (str): The API key every worker's client is created with.
+        output_dir (str): Directory of the manifest, shard files and checkpoints.
+        processes (int): Number of worker processes, by default the number of cpus.
+
+    Returns:
+        dict of the number of shards, the indexes of the shards exported and
+        skipped, the errors of the shards that failed by index, and the number
+        of rows written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shards = _load_or_create_manifest(job, api_key, output_dir)
+    result = {'num_shards': len(shards), 'exported': [], 'skipped': [], 'failed': {}, 'num_rows': 0}
+    pending_shards = []
+    for shard_index in range(len(shards)):
+        if os.path.exists(_get_checkpoint_path(output_dir, shard_index)):
+            result['skipped'].append(shard_index)
+        else:
+            pending_shards.append(shard_index)
+
+    if not pending_shards:
+        return result
+
+    job_spec = job.to_spec()
+    max_workers = min(processes or os.cpu_count() or 1, len(pending_shards))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((executor.submit(_export_shard, job_spec, api_key, output_dir, shard_index,
+            shards[shard_index]), shard_index) for shard_index in pending_shards)
+        for future in as_completed(futures):
+            shard_index = futures[future]
+            try:
+                num_rows = future.result()
+            except Exception as shard_error:
+                logger.warning('Shard %s of %s failed: %s', shard_index, len(shards), shard_error)
+                result['failed'][shard_index] = str(shard_error)
+            else:
+                logger.info('Shard %s of %s exported %s rows', shard_index, len(shards), num_rows)
+                result['exported'].append(shard_index)
+                result['num_rows'] += num_rows
+
+    result['exported'].sort()
+    return result
+
+
+def get_shard_path(output_dir, shard_index, format):
+    return os.path.join(output_dir, 'shard-{0:05d}.{1}'.format(shard_index, format))
+
+
+def _get_checkpoint_path(output_dir, shard_index):
+    return os.path.join(output_dir, 'shard-{0:05d}.done'.format(shard_index))
+
+
+def _export_shard(job_spec, api_key, output_dir, shard_index, security_symbols):
+    """
+    Runs in a worker process. The shard file is written under a temporary
+    name and moved into place before the checkpoint is written, so that a
+    shard interrupted half way is exported again in full.
+    """
+    job = BulkJob.from_spec(job_spec)
+    shard_path = get_shard_path(output_dir, shard_index, job.format)
+    num_rows = job.export_shard(api_key, security_symbols, shard_path + '.tmp')
+    os.replace(shard_path + '.tmp', shard_path)
+    _write_json(_get_checkpoint_path(output_dir, shard_index), {
+        'num_rows': num_rows,
+        'completed_at': datetime.datetime.now().isoformat(),
+    })
+    return num_rows
+
+
+def _load_or_create_manifest(job, api_key, output_dir):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if _get_export_spec(manifest['job']) != _get_export_spec(job.to_spec()):
+            error_message = 'Output directory {0} holds the shards of another job.'.format(output_dir)
+            raise exceptions.PyChartsRequestException(error_message=error_message)
+        return manifest['shards']
+
+    shards = job.build_shards(api_key)
+    _write_json(manifest_path, {'job': job.to_spec(), 'shards': shards})
+    return shards
+
+
+def _get_export_spec(job_spec):
+    return dict((key, value) for key, value in job_spec.items() if key not in RUN_OPTIONS)
+
+
+def _write_json(path, value):
+    with open(path + '.tmp', 'w') as json_file:
+        json.dump(value, json_file)
+    os.replace(path + '.tmp', path)
+
+
+def _parse_query_date(query_date):
+    if isinstance(query_date, str):
+        return datetime.datetime.strptime(query_date, '%Y-%m-%d')
+    return query_date
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m pycharts.bulk',
+        description='Exports the series of a job spec over a pool of processes.')
+    parser.add_argument('job', help='Path of the json job spec.')
+    parser.add_argument('output_dir', help='Directory the shard files and checkpoints are written to.')
+    parser.add_argument('--processes', type=int, help='Number of worker processes, by default the number of cpus.')
+    parser.add_argument('--api-key', default=os.environ.get('YCHARTS_API_KEY'),
+        help='The API key, by default the YCHARTS_API_KEY environment variable.')
+    options = parser.parse_args(args)
+    if not options.api_key:
+        parser.error('an API key is required, pass --api-key or set YCHARTS_API_KEY')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    with open(options.job) as job_file:
+        job = BulkJob.from_spec(json.load(job_file))
+
+    result = run_bulk_job(job, options.api_key, options.output_dir, options.processes)
+    json.dump(result, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """
+    Thread safe in memory cache of raw api responses with a time to live per
+    endpoint and least recently used eviction bounded by the number of
+    entries and by their total size in bytes.
+
+    Clients key responses by the (api key, url) of their query. Any object
+    with the same `get(key)` and `set(key, value, endpoint)` methods can be
+    passed to a client in place of this class.
+    """
+
+    # seconds a response stays valid, by endpoint
+    DEFAULT_TTLS = {
+        'info': 6 * 60 * 60,
+        'points': 5 * 60,
+        'series': 5 * 60,
+        'dividends': 60 * 60,
+        'splits': 60 * 60,
+        'spinoffs': 60 * 60,
+        'securities': 60 * 60,
+    }
+
+    def __init__(self, ttls=None, default_ttl=60, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            ttls (dict): Seconds a response stays valid by endpoint, overriding DEFAULT_TTLS.
+                A ttl of 0 turns caching off for the endpoint.
+            default_ttl (int): Seconds a response stays valid for endpoints missing from ttls.
+            max_entries (int): Max number of cached responses.
+            max_bytes (int): Max total size of the cached responses.
+        """
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.num_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns:
+            the cached bytes for the key, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, endpoint=None):
+        """
+        Caches the bytes of a response for the ttl of its endpoint.
+        """
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        size = self._get_size(key, value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self.num_bytes += size
+            while len(self._entries) > self.max_entries or self.num_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.num_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self.num_bytes -= self._get_size(key, value)
+
+    def _get_size(self, key, value):
+        key_size = sum(len(part) for part in key) if isinstance(key, tuple) else len(key)
+        return key_size + len(value)
@@ -10,8 +10,6 @@ class CompanyClient(BaseSecurityClient):
     def get_dividends(self, security_symbols, ex_start_date=None, ex_end_date=None, dividend_type=None):
         security_symbols = self._str_or_list(security_symbols)
 
-        url_path = self._build_url_path(security_symbols, 'dividends')
-
         params = {}
         if ex_start_date:
             params['start_date'] = self._format_query_date_for_url(ex_start_date)
@@ -20,33 +18,29 @@ class CompanyClient(BaseSecurityClient):
         if dividend_type:
             params['dividend_type'] = dividend_type
 
-        return self._get_data(url_path, params)
+        return self._get_batched_data(security_symbols, 'dividends', params=params)
 
     def get_stock_splits(self, security_symbols, split_start_date=None, split_end_date=None):
         security_symbols = self._str_or_list(security_symbols)
 
-        url_path = self._build_url_path(security_symbols, 'splits')
-
         params = {}
         if split_start_date:
             params['start_date'] = self._format_query_date_for_url(split_start_date)
         if split_end_date:
             params['end_date'] = self._format_query_date_for_url(split_end_date)
 
-        return self._get_data(url_path, params)
+        return self._get_batched_data(security_symbols, 'splits', params=params)
 
     def get_stock_spinoffs(self, security_symbols, spinoff_start_date=None, spinoff_end_date=None):
         security_symbols = self._str_or_list(security_symbols)
 
-        url_path = self._build_url_path(security_symbols, 'spinoffs')
-
         params = {}
         if spinoff_start_date:
             params['start_date'] = self._format_query_date_for_url(spinoff_start_date)
         if spinoff_end_date:
             params['end_date'] = self._format_query_date_for_url(spinoff_end_date)
 
-        return self._get_data(url_path, params)   
+        return self._get_batched_data(security_symbols, 'spinoffs', params=params)   
 
 class MutualFundClient(BaseSecurityClient):
     
@@ -58,8 +52,6 @@ class MutualFundClient(BaseSecurityClient):
     def get_dividends(self, security_symbols, ex_start_date=None, ex_end_date=None, dividend_type=None):
         security_symbols = self._str_or_list(security_symbols)
 
-        url_path = self._build_url_path(security_symbols, 'dividends')
-
         params = {}
         if ex_start_date:
             params['start_date'] = self._format_query_date_for_url(ex_start_date)
@@ -68,7 +60,7 @@ class MutualFundClient(BaseSecurityClient):
         if dividend_type:
             params['dividend_type'] = dividend_type
 
-        return self._get_data(url_path, params)  
+        return self._get_batched_data(security_symbols, 'dividends', params=params)  
 
 
 class IndicatorClient(BaseSecurityClient):
@@ -83,3 +75,13 @@ class IndicatorClient(BaseSecurityClient):
         resample_frequency=None, resample_function=None, fill_method=None, aggregate_function=None):
         return super(IndicatorClient, self).get_series(security_symbols, None, query_start_date, query_end_date,
             resample_frequency, resample_function, fill_method, aggregate_function)
+
+    def stream_series(self, security_symbols, query_start_date=None, query_end_date=None,
+        resample_frequency=None, resample_function=None, fill_method=None, aggregate_function=None):
+        return super(IndicatorClient, self).stream_series(security_symbols, None, query_start_date, query_end_date,
+            resample_frequency, resample_function, fill_method, aggregate_function)
+
+    def export_series(self, security_symbols, path, format='csv', query_start_date=None, query_end_date=None,
+        resample_frequency=None, resample_function=None, fill_method=None, aggregate_function=None):
+        return super(IndicatorClient, self).export_series(security_symbols, None, path, format, query_start_date,
+            query_end_date, resample_frequency, resample_function, fill_method, aggregate_function)
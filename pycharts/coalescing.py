@@ -0,0 +1,59 @@
+import threading
+
+
+class RequestCoalescer(object):
+    """
+    Single flight deduplication of identical requests. While a request for
+    a key is in flight, concurrent calls for the same key wait for it and
+    share its result or exception instead of issuing their own request.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fetch):
+        """
+        Args:
+            key: Hashable identity of the request.
+            fetch (callable): Performs the request when no identical one is in flight.
+
+        Returns:
+            the result of fetch, possibly shared with concurrent callers.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = fetch()
+        except BaseException as exception:
+            call.exception = exception
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+        return call.result
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
@@ -0,0 +1,110 @@
+import datetime
+import math
+from array import array
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# numpy once _get_numpy has tried to import it, None if it is not installed
+_numpy = False
+
+
+class ColumnarSeries(object):
+    """
+    Compact columnar form of the date-value pairs of a series. Dates are held
+    as days since the epoch in an int64 array and values in a float64 array,
+    with NaN standing in for nulls, which takes a fraction of the memory of
+    a list of [date, value] lists.
+
+    When numpy is installed, `dates` and `values` are zero-copy
+    `datetime64[D]` and `float64` numpy views of the arrays.
+    """
+
+    __slots__ = ('days', 'raw_values')
+
+    def __init__(self, days, raw_values):
+        """
+        Args:
+            days (array): int64 array of days since the epoch
+            raw_values (array): float64 array of values
+        """
+        self.days = days
+        self.raw_values = raw_values
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Args:
+            data (list): List of [date, value] pairs as returned by the api.
+        """
+        days = array('q', [0]) * len(data)
+        raw_values = array('d', [0.0]) * len(data)
+        for i, (date, value) in enumerate(data):
+            days[i] = _parse_date(date).toordinal() - EPOCH_ORDINAL
+            raw_values[i] = float('nan') if value is None else value
+
+        return cls(days, raw_values)
+
+    @property
+    def dates(self):
+        numpy = _get_numpy()
+        if numpy is not None:
+            return numpy.frombuffer(self.days, dtype='datetime64[D]')
+        return self.days
+
+    @property
+    def values(self):
+        numpy = _get_numpy()
+        if numpy is not None:
+            return numpy.frombuffer(self.raw_values, dtype='float64')
+        return self.raw_values
+
+    def to_data(self):
+        """
+        Returns:
+            list of [date, value] pairs as returned by the api.
+        """
+        return [[datetime.date.fromordinal(day + EPOCH_ORDINAL).isoformat(), None if math.isnan(value) else value]
+            for day, value in zip(self.days, self.raw_values)]
+
+    def __len__(self):
+        return len(self.days)
+
+    def __repr__(self):
+        return '<ColumnarSeries: {0} points>'.format(len(self))
+
+
+def to_columnar(series_rsp):
+    """
+    Replaces the data of every calculation of a series response with a
+    ColumnarSeries, in place.
+
+    Returns:
+        the series response.
+    """
+    for security_data in series_rsp['response'].values():
+        for calculation_data in (security_data.get('results') or {}).values():
+            if isinstance(calculation_data.get('data'), list):
+                calculation_data['data'] = ColumnarSeries.from_data(calculation_data['data'])
+
+    return series_rsp
+
+
+def _get_numpy():
+    """
+    Returns:
+        numpy, or None if it is not installed. It is imported on first use
+        rather than with the module, since it takes longer to import than
+        the whole client.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+
+    return _numpy
+
+
+def _parse_date(date):
+    return datetime.date(int(date[:4]), int(date[5:7]), int(date[8:10]))
@@ -0,0 +1,190 @@
+import threading
+import zlib
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_ENCODINGS = ('gzip', 'deflate', 'br') if brotli is not None else ('gzip', 'deflate')
+ACCEPT_ENCODING = ', '.join(CONTENT_ENCODINGS)
+
+
+class TransferStats(object):
+    """
+    Thread safe counts of the bytes of the responses of a client, both as
+    sent over the wire and once decompressed.
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.compressed_bytes = 0
+        self.raw_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, compressed_bytes, raw_bytes):
+        with self._lock:
+            self.responses += 1
+            self.compressed_bytes += compressed_bytes
+            self.raw_bytes += raw_bytes
+
+    @property
+    def compression_ratio(self):
+        return self.raw_bytes / float(self.compressed_bytes) if self.compressed_bytes else None
+
+
+class DecompressingReader(object):
+    """
+    File like wrapper around a response that decompresses its body as it is
+    read, so that compressed responses can be decoded incrementally.
+    """
+
+    def __init__(self, fileobj, content_encoding=None, transfer_stats=None, chunk_size=64 * 1024):
+        """
+        Args:
+            fileobj: File like response with a compressed body.
+            content_encoding (str): Content-Encoding of the body.
+            transfer_stats (TransferStats): Stats the body is counted in once read.
+            chunk_size (int): Number of compressed bytes read at a time.
+        """
+        self.fileobj = fileobj
+        self.decompressor = get_decompressor(content_encoding)
+        self.transfer_stats = transfer_stats
+        self.chunk_size = chunk_size
+        self.compressed_bytes = 0
+        self.raw_bytes = 0
+        self.is_eof = False
+        # decompressed bytes not read yet. A bytearray is appended to in place
+        # and drops its read prefix without copying the rest, so reading a
+        # body stays linear in its size.
+        self._buffer = bytearray()
+        self._is_counted = False
+
+    def read(self, size=-1):
+        while not self.is_eof and (size is None or size < 0 or len(self._buffer) < size):
+            # highly compressed bodies are decompressed a bounded amount at a
+            # time, leaving the rest of the chunk in the decompressor's tail
+            max_length = 0 if size is None or size < 0 else max(size, self.chunk_size)
+            if self.decompressor.unconsumed_tail:
+                data = self.decompressor.decompress(self.decompressor.unconsumed_tail, max_length)
+            else:
+                chunk = self.fileobj.read(self.chunk_size)
+                if chunk:
+                    self.compressed_bytes += len(chunk)
+                    data = self.decompressor.decompress(chunk, max_length)
+                else:
+                    data = self.decompressor.flush()
+                    self.is_eof = True
+            self._buffer += data
+
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.raw_bytes += len(data)
+        if self.is_eof and not self._buffer:
+            self._count()
+
+        return data
+
+    def close(self):
+        self._count()
+        self.fileobj.close()
+
+    def _count(self):
+        if self.transfer_stats is not None and not self._is_counted:
+            self._is_counted = True
+            self.transfer_stats.add(self.compressed_bytes, self.raw_bytes)
+
+
+def get_content_encoding(headers):
+    """
+    Args:
+        headers: Headers of a response, or None for a response without any.
+
+    Returns:
+        the lowercased Content-Encoding of the response, or None.
+    """
+    content_encoding = headers.get('Content-Encoding') if headers is not None else None
+    return content_encoding.strip().lower() if content_encoding else None
+
+
+def get_decompressor(content_encoding):
+    """
+    Returns:
+        an object with the decompress and flush methods and unconsumed_tail
+        of a zlib decompressor for the given Content-Encoding.
+    """
+    if content_encoding in (None, '', 'identity'):
+        return IdentityDecompressor()
+    elif content_encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif content_encoding == 'deflate':
+        return DeflateDecompressor()
+    elif content_encoding == 'br' and brotli is not None:
+        return BrotliDecompressor()
+
+    raise ValueError('Unsupported Content-Encoding: {0}'.format(content_encoding))
+
+
+def decompress(body, content_encoding):
+    """
+    Decompresses a whole response body.
+    """
+    if content_encoding in (None, '', 'identity'):
+        return body
+
+    decompressor = get_decompressor(content_encoding)
+    return decompressor.decompress(body, 0) + decompressor.flush()
+
+
+class IdentityDecompressor(object):
+
+    unconsumed_tail = b''
+
+    def decompress(self, data, max_length=0):
+        return data
+
+    def flush(self):
+        return b''
+
+
+class DeflateDecompressor(object):
+    """
+    Decompressor of the deflate Content-Encoding, which should be a zlib
+    stream, but is sent as a raw deflate stream by some servers.
+    """
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj()
+        self._is_first_chunk = True
+
+    @property
+    def unconsumed_tail(self):
+        return self._decompressor.unconsumed_tail
+
+    def decompress(self, data, max_length=0):
+        if self._is_first_chunk:
+            self._is_first_chunk = False
+            try:
+                return self._decompressor.decompress(data, max_length)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+
+        return self._decompressor.decompress(data, max_length)
+
+    def flush(self):
+        return self._decompressor.flush()
+
+
+class BrotliDecompressor(object):
+
+    unconsumed_tail = b''
+
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data, max_length=0):
+        return self._decompressor.process(data)
+
+    def flush(self):
+        return b''
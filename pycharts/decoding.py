@@ -0,0 +1,186 @@
+import gc
+import json
+import sys
+import threading
+from pycharts import exceptions
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# bodies from this size on are decoded with the cyclic garbage collector
+# paused by decoders created with pause_gc, see _gc_paused
+GC_PAUSE_MIN_BYTES = 1024 * 1024
+
+
+class JsonDecoder(object):
+    """
+    Decodes response bodies with the standard library json module, which
+    reads utf-8 bytes directly.
+    """
+
+    name = 'json'
+
+    def __init__(self, pause_gc=False):
+        """
+        Args:
+            pause_gc (bool): Whether bodies of GC_PAUSE_MIN_BYTES or more are decoded
+                with the cyclic garbage collector paused, see _gc_paused.
+        """
+        self.pause_gc = pause_gc
+
+    def decode(self, data):
+        # json.loads only takes bytes from python 3.6 on
+        if sys.version_info < (3, 6):
+            data = data.decode('utf-8')
+        with _gc_paused(data, self.pause_gc):
+            return json.loads(data)
+
+
+class OrjsonDecoder(object):
+    """
+    Decodes response bodies with orjson. Requires orjson.
+    """
+
+    name = 'orjson'
+
+    def __init__(self, pause_gc=False):
+        if orjson is None:
+            raise ImportError('orjson is required to decode with orjson: pip install pycharts[fast]')
+        self.pause_gc = pause_gc
+
+    def decode(self, data):
+        with _gc_paused(data, self.pause_gc):
+            return orjson.loads(data)
+
+
+class MsgspecDecoder(object):
+    """
+    Decodes response bodies with msgspec. Requires msgspec.
+
+    With typed set, the envelope of every response is validated against
+    the Envelope struct while it is decoded, so that a malformed meta fails
+    to decode instead of surfacing later as a KeyError. The decoded envelope
+    is returned as the same dict as the untyped decoders return.
+    """
+
+    name = 'msgspec'
+
+    def __init__(self, typed=False, pause_gc=False):
+        if msgspec is None:
+            raise ImportError('msgspec is required to decode with msgspec: pip install msgspec')
+
+        from typing import Any
+
+        self.typed = typed
+        self.pause_gc = pause_gc
+        self._decoder = msgspec.json.Decoder(_get_envelope_type() if typed else Any)
+
+    def decode(self, data):
+        with _gc_paused(data, self.pause_gc):
+            envelope = self._decoder.decode(data)
+        if not self.typed:
+            return envelope
+
+        meta = dict((field, value) for field, value in msgspec.structs.asdict(envelope.meta).items()
+            if value is not None)
+        return {'response': envelope.response, 'meta': meta}
+
+
+DECODER_CLASSES = {
+    'json': JsonDecoder,
+    'orjson': OrjsonDecoder,
+    'msgspec': MsgspecDecoder,
+}
+
+
+def get_json_decoder(json_decoder=None):
+    """
+    Args:
+        json_decoder: Name of a decoder, a decoder instance, or None for the
+            fastest installed one out of orjson, msgspec and json.
+
+    Returns:
+        a decoder with a `decode(bytes)` method.
+    """
+    if json_decoder is None:
+        if orjson is not None:
+            return OrjsonDecoder()
+        elif msgspec is not None:
+            return MsgspecDecoder()
+        return JsonDecoder()
+    elif not isinstance(json_decoder, str):
+        return json_decoder
+
+    decoder_class = DECODER_CLASSES.get(json_decoder)
+    if decoder_class is None:
+        error_message = 'Invalid json decoder. Must be one of: {0}'.format(','.join(sorted(DECODER_CLASSES)))
+        raise exceptions.PyChartsRequestException(error_message=error_message)
+    return decoder_class()
+
+
+class _gc_paused(object):
+    """
+    Pauses the cyclic garbage collector while a large body is decoded. A
+    decoded json document cannot hold reference cycles, but allocating its
+    millions of containers sets off collections that rescan every object
+    of the process over and over, which takes most of the decoding time.
+    Pauses of concurrent decodes are counted so that the collector is only
+    re-enabled by the last one, and only if it was enabled to begin with.
+
+    The collector is process wide, so this is off unless a decoder is
+    created with pause_gc: an application that turns the collector on or
+    off from another thread while a decode holds the pause has its change
+    undone once the pause ends.
+    """
+
+    _lock = threading.Lock()
+    _num_paused = 0
+    _was_enabled = False
+
+    def __init__(self, data, pause_gc):
+        self.is_pausing = pause_gc and len(data) >= GC_PAUSE_MIN_BYTES
+
+    def __enter__(self):
+        if self.is_pausing:
+            with self._lock:
+                if _gc_paused._num_paused == 0:
+                    _gc_paused._was_enabled = gc.isenabled()
+                    gc.disable()
+                _gc_paused._num_paused += 1
+
+    def __exit__(self, *args):
+        if self.is_pausing:
+            with self._lock:
+                _gc_paused._num_paused -= 1
+                if _gc_paused._num_paused == 0 and _gc_paused._was_enabled:
+                    gc.enable()
+
+
+_envelope_type = None
+
+
+def _get_envelope_type():
+    """
+    Builds the msgspec structs of the response envelope on first use. They
+    are built with defstruct rather than class annotations, which python 3.5
+    does not parse.
+    """
+    global _envelope_type
+    if _envelope_type is None:
+        from typing import Any, Optional
+
+        meta_type = msgspec.defstruct('Meta', [
+            ('status', str),
+            ('url', Optional[str], None),
+            ('error_code', Optional[int], None),
+            ('error_message', Optional[str], None),
+            ('pagination_info', Optional[dict], None),
+        ])
+        _envelope_type = msgspec.defstruct('Envelope', [('meta', meta_type), ('response', Any, None)])
+
+    return _envelope_type
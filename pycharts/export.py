@@ -0,0 +1,93 @@
+import csv
+from pycharts import exceptions
+
+EXPORT_COLUMNS = ('symbol', 'code', 'date', 'value')
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+
+
+class CsvSeriesWriter(object):
+    """
+    Writes series rows to a csv file in a long (symbol, code, date, value) layout.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+        self.num_rows = 0
+
+    def write_series(self, security_symbol, calculation_code, data):
+        self.writer.writerows((security_symbol, calculation_code, date, value) for date, value in data)
+        self.num_rows += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowSeriesWriter(object):
+    """
+    Writes series rows to a Parquet or Arrow IPC file in a long
+    (symbol, code, date, value) layout. Rows are buffered and written as
+    record batches of rows_per_batch rows. Requires pyarrow.
+    """
+
+    def __init__(self, path, format, rows_per_batch=64 * 1024):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError('pyarrow is required to export to {0}: pip install pycharts[arrow]'.format(format))
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ('symbol', pyarrow.string()),
+            ('code', pyarrow.string()),
+            ('date', pyarrow.date32()),
+            ('value', pyarrow.float64()),
+        ])
+        if format == 'parquet':
+            import pyarrow.parquet
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            import pyarrow.ipc
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+        self.rows_per_batch = rows_per_batch
+        self.num_rows = 0
+        self._columns = dict((column, []) for column in EXPORT_COLUMNS)
+
+    def write_series(self, security_symbol, calculation_code, data):
+        self._columns['symbol'].extend([security_symbol] * len(data))
+        self._columns['code'].extend([calculation_code] * len(data))
+        self._columns['date'].extend(date for date, _ in data)
+        self._columns['value'].extend(value for _, value in data)
+        self.num_rows += len(data)
+        if len(self._columns['symbol']) >= self.rows_per_batch:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+    def _flush(self):
+        if not self._columns['symbol']:
+            return
+
+        pyarrow = self.pyarrow
+        arrays = [
+            pyarrow.array(self._columns['symbol'], pyarrow.string()),
+            pyarrow.array(self._columns['code'], pyarrow.string()),
+            pyarrow.array(self._columns['date'], pyarrow.string()).cast(pyarrow.date32()),
+            pyarrow.array(self._columns['value'], pyarrow.float64()),
+        ]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        for column in self._columns.values():
+            del column[:]
+
+
+def get_series_writer(path, format='csv'):
+    if format == 'csv':
+        return CsvSeriesWriter(path)
+    elif format in ('parquet', 'arrow'):
+        return ArrowSeriesWriter(path, format)
+
+    error_message = 'Invalid export format. Must be one of: {0}'.format(','.join(EXPORT_FORMATS))
+    raise exceptions.PyChartsRequestException(error_message=error_message)
@@ -0,0 +1,252 @@
+from array import array
+from pycharts import exceptions
+from pycharts.columnar import EPOCH_ORDINAL, ColumnarSeries, _parse_date
+from pycharts.results import _is_error
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+SERIES_COLUMNS = ('symbol', 'code', 'date', 'value')
+POINT_COLUMNS = ('symbol', 'code', 'date', 'value')
+INFO_COLUMNS = ('symbol', 'code', 'value')
+ERROR_COLUMNS = ('symbol', 'code', 'error_code', 'error_message')
+
+
+#########################################
+#####       COLUMN BUILDERS         #####
+#########################################
+def series_columns(series_rsp):
+    """
+    Builds the columns of a long (symbol, code, date, value) table from a
+    get_series response. Every column is allocated once at its final length
+    and filled in place: dates are days since the epoch in an int64 array
+    and values a float64 array, with NaN standing in for nulls. Symbols and
+    codes that errored are left out, see error_columns.
+
+    Returns:
+        dict of column name to column.
+    """
+    results = list(_iter_ok_results(series_rsp))
+    num_rows = sum(len(data) for _, _, data in results)
+    columns = _allocate_columns(num_rows)
+
+    row = 0
+    for security_symbol, calculation_code, data in results:
+        next_row = row + len(data)
+        columns['symbol'][row:next_row] = [security_symbol] * len(data)
+        columns['code'][row:next_row] = [calculation_code] * len(data)
+        if isinstance(data, ColumnarSeries):
+            columns['date'][row:next_row] = data.days
+            columns['value'][row:next_row] = data.raw_values
+        else:
+            for i, (date, value) in enumerate(data, row):
+                columns['date'][i] = _parse_date(date).toordinal() - EPOCH_ORDINAL
+                columns['value'][i] = float('nan') if value is None else value
+        row = next_row
+
+    return columns
+
+
+def point_columns(points_rsp):
+    """
+    Builds the columns of a long (symbol, code, date, value) table from a
+    get_points response, laid out like series_columns.
+
+    Returns:
+        dict of column name to column.
+    """
+    results = [result for result in _iter_ok_results(points_rsp) if result[2]]
+    columns = _allocate_columns(len(results))
+    for i, (security_symbol, calculation_code, (date, value)) in enumerate(results):
+        columns['symbol'][i] = security_symbol
+        columns['code'][i] = calculation_code
+        columns['date'][i] = _parse_date(date).toordinal() - EPOCH_ORDINAL
+        columns['value'][i] = float('nan') if value is None else value
+
+    return columns
+
+
+def info_columns(info_rsp):
+    """
+    Builds the columns of a long (symbol, code, value) table from a get_info
+    response. Info values can be of any type, so they are kept as is.
+
+    Returns:
+        dict of column name to column.
+    """
+    results = list(_iter_ok_results(info_rsp))
+    columns = dict((column, [None] * len(results)) for column in INFO_COLUMNS)
+    for i, (security_symbol, info_field_code, value) in enumerate(results):
+        columns['symbol'][i] = security_symbol
+        columns['code'][i] = info_field_code
+        columns['value'][i] = value
+
+    return columns
+
+
+def event_columns(events_rsp):
+    """
+    Builds the columns of a table with one row per event from a
+    get_dividends, get_stock_splits or get_stock_spinoffs response. The
+    columns are the symbol followed by the union of the event fields, in
+    the order they are first seen, with None for fields an event lacks.
+
+    Returns:
+        dict of column name to column.
+    """
+    events = []
+    fields = {}
+    for security_symbol, security_data in events_rsp['response'].items():
+        if _is_error(security_data):
+            continue
+        for event in security_data.get('results') or []:
+            events.append((security_symbol, event))
+            for field in event:
+                fields.setdefault(field, len(fields))
+
+    columns = {'symbol': [security_symbol for security_symbol, _ in events]}
+    for field in sorted(fields, key=fields.get):
+        columns[field] = [None] * len(events)
+    for i, (_, event) in enumerate(events):
+        for field, value in event.items():
+            columns[field][i] = value
+
+    return columns
+
+
+def error_columns(rsp):
+    """
+    Builds the columns of a (symbol, code, error_code, error_message) table
+    of the symbols and codes of a response whose meta is an error. The code
+    is None when the whole symbol errored.
+
+    Returns:
+        dict of column name to column.
+    """
+    errors = []
+    for security_symbol, security_data in rsp['response'].items():
+        if _is_error(security_data):
+            errors.append((security_symbol, None, security_data['meta']))
+            continue
+        results = security_data.get('results')
+        if isinstance(results, dict):
+            for query_key, query_data in results.items():
+                if _is_error(query_data):
+                    errors.append((security_symbol, query_key, query_data['meta']))
+
+    return {
+        'symbol': [security_symbol for security_symbol, _, _ in errors],
+        'code': [query_key for _, query_key, _ in errors],
+        'error_code': [meta.get('error_code') for _, _, meta in errors],
+        'error_message': [meta.get('error_message') for _, _, meta in errors],
+    }
+
+
+#########################################
+#####         DATAFRAMES            #####
+#########################################
+def series_to_frame(series_rsp, layout='long'):
+    """
+    Converts a get_series response to a pandas DataFrame.
+
+    Args:
+        series_rsp (dict): Response of get_series.
+        layout (str): 'long' for (symbol, code, date, value) rows, or 'wide'
+            for a date index with a (symbol, code) column per calculation.
+    """
+    frame = _build_dated_frame(series_columns(series_rsp))
+    return _pivot(frame, layout, index='date', columns=['symbol', 'code'])
+
+
+def points_to_frame(points_rsp, layout='long'):
+    """
+    Converts a get_points response to a pandas DataFrame.
+
+    Args:
+        points_rsp (dict): Response of get_points.
+        layout (str): 'long' for (symbol, code, date, value) rows, or 'wide'
+            for a symbol index with a column of values per code.
+    """
+    frame = _build_dated_frame(point_columns(points_rsp))
+    return _pivot(frame, layout, index='symbol', columns='code')
+
+
+def info_to_frame(info_rsp, layout='wide'):
+    """
+    Converts a get_info response to a pandas DataFrame.
+
+    Args:
+        info_rsp (dict): Response of get_info.
+        layout (str): 'long' for (symbol, code, value) rows, or 'wide' for
+            a symbol index with a column per info field.
+    """
+    frame = _get_pandas().DataFrame(info_columns(info_rsp), columns=INFO_COLUMNS)
+    return _pivot(frame, layout, index='symbol', columns='code')
+
+
+def events_to_frame(events_rsp):
+    """
+    Converts a get_dividends, get_stock_splits or get_stock_spinoffs
+    response to a pandas DataFrame with one row per event.
+    """
+    return _get_pandas().DataFrame(event_columns(events_rsp))
+
+
+def errors_to_frame(rsp):
+    """
+    Converts the symbol and code errors of any symbol based response to a
+    pandas DataFrame of (symbol, code, error_code, error_message) rows.
+    """
+    return _get_pandas().DataFrame(error_columns(rsp), columns=ERROR_COLUMNS)
+
+
+#########################################
+#####           HELPERS             #####
+#########################################
+def _iter_ok_results(rsp):
+    for security_symbol, security_data in rsp['response'].items():
+        if _is_error(security_data):
+            continue
+        for query_key, query_data in (security_data.get('results') or {}).items():
+            if not _is_error(query_data):
+                yield security_symbol, query_key, query_data.get('data')
+
+
+def _allocate_columns(num_rows):
+    return {
+        'symbol': [None] * num_rows,
+        'code': [None] * num_rows,
+        'date': array('q', [0]) * num_rows,
+        'value': array('d', [0.0]) * num_rows,
+    }
+
+
+def _get_pandas():
+    if pandas is None:
+        raise ImportError('pandas is required to build DataFrames: pip install pycharts[pandas]')
+    return pandas
+
+
+def _build_dated_frame(columns):
+    pandas = _get_pandas()
+    import numpy
+
+    dates = numpy.frombuffer(columns['date'], dtype='int64').astype('datetime64[D]')
+    values = numpy.frombuffer(columns['value'], dtype='float64')
+    return pandas.DataFrame({
+        'symbol': columns['symbol'],
+        'code': columns['code'],
+        'date': pandas.to_datetime(dates),
+        'value': values,
+    }, columns=SERIES_COLUMNS)
+
+
+def _pivot(frame, layout, index, columns):
+    if layout == 'long':
+        return frame
+    elif layout == 'wide':
+        return frame.pivot(index=index, columns=columns, values='value')
+
+    error_message = "Invalid frame layout. Must be one of: long,wide"
+    raise exceptions.PyChartsRequestException(error_message=error_message)
@@ -0,0 +1,260 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+
+REQUEST_START = 'request_start'
+RESPONSE_RECEIVED = 'response_received'
+PARSE_COMPLETE = 'parse_complete'
+ERROR = 'error'
+
+# 1ms to ~65s and 1KB to 512MB, doubling from one bucket to the next
+LATENCY_BOUNDS = tuple(0.001 * 2 ** i for i in range(17))
+SIZE_BOUNDS = tuple(1024 * 2 ** i for i in range(20))
+
+
+class RequestEvent(object):
+    """
+    Event of a request made by a client, passed to every hook of the client.
+
+    Attributes:
+        name (str): One of request_start, response_received, parse_complete or error.
+        request_id (int): Id shared by the events of the same request.
+        endpoint (str): points, series, info, dividends, ... or securities.
+        url (str): Url of the request.
+        num_symbols (int): Number of symbols in the request.
+        num_codes (int): Number of codes in the request.
+        num_bytes (int): Size of the response body, once received. None for
+            streamed responses, which are decoded as they are read.
+        cache_hit (bool): Whether the response came from the client's cache.
+        elapsed (float): Seconds since the request started.
+        parse_time (float): Seconds the response took to decode, once parsed.
+        exception (Exception): The exception raised by an errored request.
+    """
+
+    __slots__ = ('name', 'request_id', 'endpoint', 'url', 'num_symbols', 'num_codes', 'num_bytes',
+        'cache_hit', 'elapsed', 'parse_time', 'exception')
+
+    def __init__(self, name, request_id, endpoint, url, num_symbols, num_codes, num_bytes=None,
+        cache_hit=False, elapsed=0.0, parse_time=None, exception=None):
+        self.name = name
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.url = url
+        self.num_symbols = num_symbols
+        self.num_codes = num_codes
+        self.num_bytes = num_bytes
+        self.cache_hit = cache_hit
+        self.elapsed = elapsed
+        self.parse_time = parse_time
+        self.exception = exception
+
+    def __repr__(self):
+        return '<RequestEvent: {0} {1} {2}>'.format(self.name, self.endpoint, self.request_id)
+
+
+class RequestTracker(object):
+    """
+    Times a single request and emits its events to a list of hooks.
+    """
+
+    _request_ids = itertools.count(1)
+
+    def __init__(self, hooks, endpoint, url, num_symbols, num_codes):
+        self.hooks = hooks
+        self.request_id = next(self._request_ids)
+        self.endpoint = endpoint
+        self.url = url
+        self.num_symbols = num_symbols
+        self.num_codes = num_codes
+        self.num_bytes = None
+        self.cache_hit = False
+        self.started_at = time.perf_counter()
+        self.received_at = None
+        self._emit(REQUEST_START)
+
+    def response_received(self, num_bytes=None, cache_hit=False):
+        self.received_at = time.perf_counter()
+        self.num_bytes = num_bytes
+        self.cache_hit = cache_hit
+        self._emit(RESPONSE_RECEIVED)
+
+    def parse_complete(self):
+        parse_time = time.perf_counter() - (self.received_at or self.started_at)
+        self._emit(PARSE_COMPLETE, parse_time=parse_time)
+
+    def error(self, exception):
+        self._emit(ERROR, exception=exception)
+
+    def _emit(self, name, parse_time=None, exception=None):
+        event = RequestEvent(name, self.request_id, self.endpoint, self.url, self.num_symbols, self.num_codes,
+            self.num_bytes, self.cache_hit, time.perf_counter() - self.started_at, parse_time, exception)
+        for hook in self.hooks:
+            hook(event)
+
+
+class NullRequestTracker(object):
+    """
+    Stands in for a RequestTracker when a client has no hooks.
+    """
+
+    def response_received(self, num_bytes=None, cache_hit=False):
+        pass
+
+    def parse_complete(self):
+        pass
+
+    def error(self, exception):
+        pass
+
+
+NULL_REQUEST_TRACKER = NullRequestTracker()
+
+
+class Histogram(object):
+    """
+    Fixed bucket histogram. Values are counted in the first bucket whose
+    upper bound they do not exceed, with an overflow bucket past the last
+    bound, so percentiles are approximated by bucket upper bounds.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent):
+        """
+        Returns:
+            the upper bound of the bucket the percentile falls in, capped by
+            the max value, or None if no values were added.
+        """
+        if not self.count:
+            return None
+
+        rank = percent / 100.0 * self.count
+        cumulative_count = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank and bucket_count:
+                if i == len(self.bounds):
+                    return self.max
+                return min(self.bounds[i], self.max)
+
+        return self.max
+
+
+class MetricsCollector(object):
+    """
+    Hook that aggregates request events in memory, per endpoint, into
+    request, error and cache hit counts and histograms of total latency,
+    network time, parse time and response size.
+    """
+
+    HISTOGRAM_BOUNDS = {
+        'latency': LATENCY_BOUNDS,
+        'network_time': LATENCY_BOUNDS,
+        'parse_time': LATENCY_BOUNDS,
+        'response_bytes': SIZE_BOUNDS,
+    }
+
+    def __init__(self):
+        self.counts = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if event.name == REQUEST_START:
+                self._count(event.endpoint, 'requests')
+            elif event.name == RESPONSE_RECEIVED:
+                if event.cache_hit:
+                    self._count(event.endpoint, 'cache_hits')
+                else:
+                    self._observe(event.endpoint, 'network_time', event.elapsed)
+                if event.num_bytes is not None:
+                    self._observe(event.endpoint, 'response_bytes', event.num_bytes)
+            elif event.name == PARSE_COMPLETE:
+                self._observe(event.endpoint, 'latency', event.elapsed)
+                self._observe(event.endpoint, 'parse_time', event.parse_time)
+            elif event.name == ERROR:
+                self._count(event.endpoint, 'errors')
+
+    def get_histogram(self, endpoint, metric):
+        return self.histograms.get((endpoint, metric))
+
+    def summary(self):
+        """
+        Returns:
+            dict of endpoint to its counts along with the p50, p99 and max of
+            each of its histograms.
+        """
+        with self._lock:
+            summary = {}
+            for (endpoint, name), count in self.counts.items():
+                summary.setdefault(endpoint, {})[name] = count
+            for (endpoint, metric), histogram in self.histograms.items():
+                endpoint_summary = summary.setdefault(endpoint, {})
+                endpoint_summary['{0}_p50'.format(metric)] = histogram.percentile(50)
+                endpoint_summary['{0}_p99'.format(metric)] = histogram.percentile(99)
+                endpoint_summary['{0}_max'.format(metric)] = histogram.max
+
+            return summary
+
+    def _count(self, endpoint, name):
+        self.counts[endpoint, name] = self.counts.get((endpoint, name), 0) + 1
+
+    def _observe(self, endpoint, metric, value):
+        histogram = self.histograms.get((endpoint, metric))
+        if histogram is None:
+            histogram = self.histograms[endpoint, metric] = Histogram(self.HISTOGRAM_BOUNDS[metric])
+        histogram.add(value)
+
+
+class LoggingHook(object):
+    """
+    Hook that logs every completed and errored request. Requests slower than
+    slow_request_time or with responses larger than large_response_bytes are
+    logged as warnings.
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG, slow_request_time=None, large_response_bytes=None):
+        """
+        Args:
+            logger (Logger): Logger to log to, the pycharts logger by default.
+            level (int): Level completed requests are logged at.
+            slow_request_time (float): Seconds past which a request is logged as a warning.
+            large_response_bytes (int): Size past which a response is logged as a warning.
+        """
+        self.logger = logger or logging.getLogger('pycharts')
+        self.level = level
+        self.slow_request_time = slow_request_time
+        self.large_response_bytes = large_response_bytes
+
+    def __call__(self, event):
+        if event.name == PARSE_COMPLETE:
+            is_slow = self.slow_request_time is not None and event.elapsed > self.slow_request_time
+            is_large = (self.large_response_bytes is not None and event.num_bytes is not None and
+                event.num_bytes > self.large_response_bytes)
+            level = logging.WARNING if is_slow or is_large else self.level
+            self.logger.log(level, '%s request of %d symbols and %d codes took %.3fs (%.3fs parsing), '
+                '%s bytes%s: %s', event.endpoint, event.num_symbols, event.num_codes, event.elapsed,
+                event.parse_time, event.num_bytes, ' from cache' if event.cache_hit else '', event.url)
+        elif event.name == ERROR:
+            self.logger.warning('%s request failed after %.3fs with %r: %s', event.endpoint, event.elapsed,
+                event.exception, event.url)
@@ -0,0 +1,203 @@
+import bisect
+import datetime
+import math
+import threading
+import time
+from array import array
+from pycharts.columnar import EPOCH_ORDINAL, ColumnarSeries, _parse_date
+
+# start of the coverage of series fetched without a start date
+MIN_DAY = -2 ** 62
+
+
+class PointInTimeStore(object):
+    """
+    In memory index of fetched series that answers point queries, which ask
+    for the latest value on or before a date, without a request.
+
+    Every series keeps its dates and values in sorted arrays along with the
+    date ranges it is known to be complete over. A series fetched from a
+    start date to an end date is complete over that range, and a point
+    fetched for a date is complete from its own date to the queried one. A
+    query is answered from memory when the range that holds its date also
+    holds the value found by binary search for it, since no value can then
+    be missing in between.
+
+    Series fetched up to today are complete up to the day they were fetched,
+    but their latest values may still be revised or added to, so queries for
+    that day onwards or for the latest value are only answered for latest_ttl
+    seconds after the fetch.
+
+    Relative periods are counted by the server in calendar periods of the
+    calculation, which the stored values do not record, so queries for them
+    are never answered from memory.
+    """
+
+    def __init__(self, latest_ttl=300):
+        """
+        Args:
+            latest_ttl (int): Seconds the latest values of a series fetched up to
+                today are answered from memory for.
+        """
+        self.latest_ttl = latest_ttl
+        self.hits = 0
+        self.misses = 0
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def ingest_series(self, security_type, security_symbol, calculation_code, data, start_date=None, end_date=None):
+        """
+        Adds the data of a series fetched from start_date to end_date.
+
+        Args:
+            data (list): List of [date, value] pairs, or a ColumnarSeries.
+            start_date (str): Date the series was fetched from, or None for its whole history.
+            end_date (str): Date the series was fetched up to, or None for up to its latest value.
+        """
+        if isinstance(data, ColumnarSeries):
+            days, values = data.days, data.raw_values
+        else:
+            days = array('q', [_to_day(date) for date, _ in data])
+            values = array('d', [float('nan') if value is None else value for _, value in data])
+
+        start_day = _to_day(start_date) if start_date else MIN_DAY
+        end_day = _to_day(end_date) if end_date else None
+        self._ingest(security_type, security_symbol, calculation_code, days, values, start_day, end_day)
+
+    def ingest_point(self, security_type, security_symbol, calculation_code, point, query_date=None):
+        """
+        Adds a point fetched for query_date, or for the latest value if None.
+        Points of relative periods cannot be placed and are left out.
+        """
+        if not point or isinstance(query_date, int):
+            return
+
+        date, value = point
+        day = _to_day(date)
+        query_day = _to_day(query_date) if query_date is not None else None
+        if query_day is None or day <= query_day:
+            self._ingest(security_type, security_symbol, calculation_code, array('q', [day]),
+                array('d', [float('nan') if value is None else value]), day, query_day)
+
+    def get_point(self, security_type, security_symbol, calculation_code, query_date=None):
+        """
+        Args:
+            query_date
+                (datetime): datetime on or before which the value is asked for.
+                (None): for the latest value.
+
+        Returns:
+            the [date, value] pair that answers the query, or None if it cannot
+            be answered from memory.
+        """
+        if isinstance(query_date, int):
+            return None
+
+        with self._lock:
+            indexed_series = self._series.get((security_type, security_symbol, calculation_code))
+            row = None
+            if indexed_series is not None:
+                is_fresh = (indexed_series.fetched_at is not None and
+                    time.monotonic() - indexed_series.fetched_at < self.latest_ttl)
+                query_day = _to_day(query_date) if isinstance(query_date, datetime.date) else _today()
+                if indexed_series.latest_day is not None and query_day >= indexed_series.latest_day:
+                    row = indexed_series.as_of(indexed_series.latest_day) if is_fresh else None
+                else:
+                    row = indexed_series.as_of(query_day)
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return indexed_series.get_point(row)
+
+    def __len__(self):
+        return len(self._series)
+
+    def _ingest(self, security_type, security_symbol, calculation_code, days, values, start_day, end_day):
+        # values up to today may still be revised or added to
+        today = _today()
+        end_day = today if end_day is None else min(end_day, today)
+        with self._lock:
+            key = (security_type, security_symbol, calculation_code)
+            indexed_series = self._series.get(key)
+            if indexed_series is None:
+                indexed_series = self._series[key] = IndexedSeries()
+            indexed_series.ingest(days, values, start_day, end_day)
+            if end_day == today:
+                indexed_series.latest_day = today
+                indexed_series.fetched_at = time.monotonic()
+
+
+class IndexedSeries(object):
+    """
+    Sorted dates and values of a series, along with the sorted, disjoint
+    [start, end] day ranges it is complete over.
+    """
+
+    __slots__ = ('days', 'values', 'range_starts', 'range_ends', 'latest_day', 'fetched_at')
+
+    def __init__(self):
+        self.days = array('q')
+        self.values = array('d')
+        self.range_starts = []
+        self.range_ends = []
+        # day the series was last fetched up to its latest value on
+        self.latest_day = None
+        self.fetched_at = None
+
+    def ingest(self, days, values, start_day, end_day):
+        """
+        Replaces the values from start_day to end_day with the given ones.
+        """
+        if any(days[i] > days[i + 1] for i in range(len(days) - 1)):
+            rows = sorted(range(len(days)), key=days.__getitem__)
+            days = array('q', [days[row] for row in rows])
+            values = array('d', [values[row] for row in rows])
+
+        start_row = bisect.bisect_left(self.days, start_day)
+        stop_row = bisect.bisect_right(self.days, end_day)
+        self.days = self.days[:start_row] + days + self.days[stop_row:]
+        self.values = self.values[:start_row] + values + self.values[stop_row:]
+        self._add_range(start_day, end_day)
+
+    def as_of(self, day):
+        """
+        Returns:
+            the row of the latest value on or before day, or None if the
+            values up to day are not known to be complete.
+        """
+        row = bisect.bisect_right(self.days, day) - 1
+        range_index = bisect.bisect_right(self.range_starts, day) - 1
+        if row < 0 or range_index < 0 or self.range_ends[range_index] < day:
+            return None
+        if self.range_starts[range_index] > self.days[row]:
+            return None
+        return row
+
+    def get_point(self, row):
+        value = self.values[row]
+        return [datetime.date.fromordinal(self.days[row] + EPOCH_ORDINAL).isoformat(),
+            None if math.isnan(value) else value]
+
+    def _add_range(self, start_day, end_day):
+        # merge with every range that overlaps or touches the new one
+        first = bisect.bisect_left(self.range_ends, start_day - 1)
+        last = bisect.bisect_right(self.range_starts, end_day + 1)
+        if first < last:
+            start_day = min(start_day, self.range_starts[first])
+            end_day = max(end_day, self.range_ends[last - 1])
+        self.range_starts[first:last] = [start_day]
+        self.range_ends[first:last] = [end_day]
+
+
+def _to_day(date):
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    elif not isinstance(date, datetime.date):
+        date = _parse_date(date)
+    return date.toordinal() - EPOCH_ORDINAL
+
+
+def _today():
+    return datetime.date.today().toordinal() - EPOCH_ORDINAL
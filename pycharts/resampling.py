@@ -0,0 +1,269 @@
+import datetime
+import math
+from array import array
+from pycharts import exceptions
+from pycharts.columnar import EPOCH_ORDINAL, ColumnarSeries, _get_numpy
+from pycharts.results import _is_error
+
+RESAMPLE_FREQUENCIES = ('daily', 'weekly', 'monthly', 'quarterly', 'yearly')
+RESAMPLE_FUNCTIONS = ('mean', 'sum', 'min', 'max', 'first', 'last')
+AGGREGATE_FUNCTIONS = RESAMPLE_FUNCTIONS
+FILL_METHODS = ('ffill', 'bfill')
+# weekday of the epoch, a thursday, counting from monday as 0
+EPOCH_WEEKDAY = 3
+
+
+def resample(data, resample_frequency='daily', resample_function='last', fill_method=None):
+    """
+    Resamples a series into one value per period, labeled with the last day
+    of the period. Weeks end on sundays and quarters on the last day of
+    march, june, september and december. Null values are skipped by every
+    function, and periods with no value are left out, or filled with the
+    value of the period before or after them with a fill_method of ffill or
+    bfill.
+
+    Args:
+        data (list): List of [date, value] pairs, or a ColumnarSeries.
+        resample_frequency (str): One of daily, weekly, monthly, quarterly and yearly.
+        resample_function (str): One of mean, sum, min, max, first and last.
+        fill_method (str): Optional ffill or bfill.
+
+    Returns:
+        the resampled series, as a list of [date, value] pairs or a
+        ColumnarSeries like data.
+    """
+    validate_resample_settings(resample_frequency, resample_function, fill_method)
+    series = _to_columnar(data)
+    if not len(series):
+        return _from_columnar(series, data)
+
+    if _get_numpy() is not None:
+        period_ends, values = _resample_numpy(series, resample_frequency, resample_function)
+    else:
+        period_ends, values = _resample_arrays(series, resample_frequency, resample_function)
+
+    if fill_method is not None:
+        period_ends, values = _fill(period_ends, values, resample_frequency, fill_method)
+    return _from_columnar(ColumnarSeries(period_ends, values), data)
+
+
+def aggregate(data, aggregate_function):
+    """
+    Aggregates a series into a single [date, value] pair. Min and max are
+    dated on the day of the min or max value, first and last on the day of
+    the first or last value, and mean and sum on the last day of the series.
+    Null values are skipped.
+
+    Returns:
+        the aggregated series, as a list of at most one [date, value] pair
+        or a ColumnarSeries like data.
+    """
+    _validate(aggregate_function, AGGREGATE_FUNCTIONS, 'aggregate function')
+    series = _to_columnar(data)
+    rows = [row for row, value in enumerate(series.raw_values) if not math.isnan(value)]
+    if not rows:
+        return _from_columnar(ColumnarSeries(array('q'), array('d')), data)
+
+    values = series.raw_values
+    if aggregate_function in ('min', 'max'):
+        # the first row of the min or max value
+        row = (min if aggregate_function == 'min' else max)(rows, key=values.__getitem__)
+        day, value = series.days[row], values[row]
+    elif aggregate_function == 'first':
+        day, value = series.days[rows[0]], values[rows[0]]
+    elif aggregate_function == 'last':
+        day, value = series.days[rows[-1]], values[rows[-1]]
+    else:
+        value = math.fsum(values[row] for row in rows)
+        if aggregate_function == 'mean':
+            value /= len(rows)
+        day = series.days[-1]
+
+    return _from_columnar(ColumnarSeries(array('q', [day]), array('d', [value])), data)
+
+
+def resample_response(series_rsp, resample_frequency=None, resample_function=None, fill_method=None,
+    aggregate_function=None):
+    """
+    Resamples, then aggregates, the data of every calculation of a series
+    response, in place. Without a frequency, a function or fill method
+    resamples daily, and without a function, the last value of every period
+    is kept.
+
+    Returns:
+        the series response.
+    """
+    is_resampled = bool(resample_frequency or resample_function or fill_method)
+    for security_data in series_rsp['response'].values():
+        for calculation_data in (security_data.get('results') or {}).values():
+            if _is_error(calculation_data) or calculation_data.get('data') is None:
+                continue
+            if is_resampled:
+                calculation_data['data'] = resample(calculation_data['data'], resample_frequency or 'daily',
+                    resample_function or 'last', fill_method)
+            if aggregate_function:
+                calculation_data['data'] = aggregate(calculation_data['data'], aggregate_function)
+
+    return series_rsp
+
+
+def validate_resample_settings(resample_frequency=None, resample_function=None, fill_method=None,
+    aggregate_function=None):
+    """
+    Raises a PyChartsRequestException for settings resample, aggregate and
+    resample_response do not support.
+    """
+    if resample_frequency is not None:
+        _validate(resample_frequency, RESAMPLE_FREQUENCIES, 'resample frequency')
+    if resample_function is not None:
+        _validate(resample_function, RESAMPLE_FUNCTIONS, 'resample function')
+    if fill_method is not None:
+        _validate(fill_method, FILL_METHODS, 'fill method')
+    if aggregate_function is not None:
+        _validate(aggregate_function, AGGREGATE_FUNCTIONS, 'aggregate function')
+
+
+def get_period_end(day, resample_frequency):
+    """
+    Returns:
+        the last day, in days since the epoch, of the period holding day.
+    """
+    if resample_frequency == 'daily':
+        return day
+    elif resample_frequency == 'weekly':
+        return day + 6 - (day + EPOCH_WEEKDAY) % 7
+
+    date = datetime.date.fromordinal(day + EPOCH_ORDINAL)
+    if resample_frequency == 'monthly':
+        end_month = date.month
+    elif resample_frequency == 'quarterly':
+        end_month = (date.month - 1) // 3 * 3 + 3
+    else:
+        end_month = 12
+    next_period_start = (datetime.date(date.year + 1, 1, 1) if end_month == 12
+        else datetime.date(date.year, end_month + 1, 1))
+    return next_period_start.toordinal() - EPOCH_ORDINAL - 1
+
+
+def _resample_arrays(series, resample_frequency, resample_function):
+    period_ends = array('q')
+    values = array('d')
+    period_end = None
+    period_values = []
+    for day, value in zip(series.days, series.raw_values):
+        if period_end is None or day > period_end:
+            if period_end is not None:
+                values.append(_reduce(period_values, resample_function))
+            # periods are only worked out again once a day is past the current one
+            period_end = get_period_end(day, resample_frequency)
+            period_ends.append(period_end)
+            period_values = []
+        if not math.isnan(value):
+            period_values.append(value)
+    values.append(_reduce(period_values, resample_function))
+
+    return period_ends, values
+
+
+def _reduce(values, resample_function):
+    if not values:
+        return float('nan')
+    elif resample_function == 'mean':
+        return math.fsum(values) / len(values)
+    elif resample_function == 'sum':
+        return math.fsum(values)
+    elif resample_function == 'min':
+        return min(values)
+    elif resample_function == 'max':
+        return max(values)
+    elif resample_function == 'first':
+        return values[0]
+    return values[-1]
+
+
+def _resample_numpy(series, resample_frequency, resample_function):
+    """
+    Same as _resample_arrays, with the period of every day and the
+    reduction of every period worked out a whole array at a time.
+    """
+    numpy = _get_numpy()
+    days = numpy.frombuffer(series.days, dtype='int64')
+    values = numpy.frombuffer(series.raw_values, dtype='float64')
+    period_ends = _get_period_ends_numpy(numpy, days, resample_frequency)
+    starts = numpy.flatnonzero(numpy.concatenate(([True], period_ends[1:] != period_ends[:-1])))
+
+    is_valid = ~numpy.isnan(values)
+    counts = numpy.add.reduceat(is_valid.astype('int64'), starts)
+    positions = numpy.arange(len(values))
+    if resample_function in ('mean', 'sum'):
+        reduced = numpy.add.reduceat(numpy.where(is_valid, values, 0.0), starts)
+        if resample_function == 'mean':
+            reduced = reduced / numpy.maximum(counts, 1)
+    elif resample_function == 'min':
+        reduced = numpy.minimum.reduceat(numpy.where(is_valid, values, numpy.inf), starts)
+    elif resample_function == 'max':
+        reduced = numpy.maximum.reduceat(numpy.where(is_valid, values, -numpy.inf), starts)
+    elif resample_function == 'first':
+        first_rows = numpy.minimum.reduceat(numpy.where(is_valid, positions, len(values) - 1), starts)
+        reduced = values[first_rows]
+    else:
+        last_rows = numpy.maximum.reduceat(numpy.where(is_valid, positions, 0), starts)
+        reduced = values[last_rows]
+    reduced = numpy.where(counts > 0, reduced, numpy.nan)
+
+    return (array('q', period_ends[starts].astype('int64').tobytes()),
+        array('d', reduced.astype('float64').tobytes()))
+
+
+def _get_period_ends_numpy(numpy, days, resample_frequency):
+    if resample_frequency == 'daily':
+        return days
+    elif resample_frequency == 'weekly':
+        return days + 6 - (days + EPOCH_WEEKDAY) % 7
+
+    # months since the epoch, moved to the last month of their period
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    if resample_frequency == 'quarterly':
+        months = months - months % 3 + 2
+    elif resample_frequency == 'yearly':
+        months = months - months % 12 + 11
+    return (months + 1).astype('datetime64[M]').astype('datetime64[D]').astype('int64') - 1
+
+
+def _fill(period_ends, values, resample_frequency, fill_method):
+    """
+    Adds the periods with no value between the first and last ones, and
+    fills them and the periods with a null value from the period before or
+    after them.
+    """
+    period_values = dict(zip(period_ends, values))
+    filled_period_ends = array('q')
+    period_end = period_ends[0]
+    while period_end <= period_ends[-1]:
+        filled_period_ends.append(period_end)
+        period_end = get_period_end(period_end + 1, resample_frequency)
+
+    filled_values = array('d', [float('nan')]) * len(filled_period_ends)
+    rows = range(len(filled_period_ends))
+    fill_value = float('nan')
+    for row in (rows if fill_method == 'ffill' else reversed(rows)):
+        value = period_values.get(filled_period_ends[row], float('nan'))
+        if not math.isnan(value):
+            fill_value = value
+        filled_values[row] = fill_value
+
+    return filled_period_ends, filled_values
+
+
+def _validate(value, valid_values, name):
+    if value not in valid_values:
+        error_message = 'Invalid {0}. Must be one of: {1}'.format(name, ','.join(valid_values))
+        raise exceptions.PyChartsRequestException(error_message=error_message)
+
+
+def _to_columnar(data):
+    return data if isinstance(data, ColumnarSeries) else ColumnarSeries.from_data(data)
+
+
+def _from_columnar(series, data):
+    return series if isinstance(data, ColumnarSeries) else series.to_data()
@@ -0,0 +1,252 @@
+import datetime
+import math
+import sys
+from array import array
+from collections import namedtuple
+from pycharts.columnar import EPOCH_ORDINAL, _parse_date
+
+# day of the rows that have no date, such as errored or empty points
+MISSING_DAY = -2 ** 63
+# info values up to this length are interned, since sectors, industries,
+# exchanges and the like repeat across securities
+MAX_INTERNED_LENGTH = 64
+
+Point = namedtuple('Point', ['date', 'value'])
+
+
+class CompactResults(object):
+    """
+    Struct of arrays form of a points or info response, with one row per
+    (symbol, code). Symbols and codes are interned and rows refer to them by
+    index, rows are grouped by symbol, and every code keeps the rows it is
+    in, so that results can be looked up by symbol and by code without the
+    nested dicts of the response.
+
+    Symbols and codes that errored are kept as they were in the response,
+    in `errors`, keyed by (symbol, code), with a code of None for symbols
+    that errored as a whole.
+    """
+
+    __slots__ = ('meta', 'symbols', 'codes', 'errors', 'row_symbols', 'row_codes', '_symbol_rows', '_code_indexes',
+        '_code_rows')
+
+    def __init__(self, meta):
+        self.meta = meta
+        self.symbols = []
+        self.codes = []
+        self.errors = {}
+        self.row_symbols = array('i')
+        self.row_codes = array('i')
+        self._symbol_rows = {}
+        self._code_indexes = {}
+        self._code_rows = {}
+
+    @classmethod
+    def from_response(cls, rsp):
+        """
+        Args:
+            rsp (dict): Response of a points or info query.
+        """
+        results = cls(rsp['meta'])
+        for security_symbol, security_data in rsp['response'].items():
+            security_symbol = sys.intern(security_symbol)
+            symbol_index = len(results.symbols)
+            results.symbols.append(security_symbol)
+            start_row = len(results.row_symbols)
+            if _is_error(security_data) or not isinstance(security_data.get('results'), dict):
+                results.errors[security_symbol, None] = security_data
+            else:
+                for query_key, query_data in security_data['results'].items():
+                    results._append_row(symbol_index, sys.intern(query_key), query_data)
+            results._symbol_rows[security_symbol] = (start_row, len(results.row_symbols))
+
+        return results
+
+    def get(self, security_symbol, query_key):
+        """
+        Returns:
+            the value of a symbol for a code, or None if the response has
+            none or it errored.
+        """
+        row = self._find_row(security_symbol, query_key)
+        return None if row is None else self._get_value(row)
+
+    def for_symbol(self, security_symbol):
+        """
+        Returns:
+            dict of code to value of the codes of a symbol that did not error.
+        """
+        start_row, stop_row = self._symbol_rows.get(security_symbol, (0, 0))
+        values = {}
+        for row in range(start_row, stop_row):
+            query_key = self.codes[self.row_codes[row]]
+            if (security_symbol, query_key) not in self.errors:
+                values[query_key] = self._get_value(row)
+
+        return values
+
+    def for_code(self, query_key):
+        """
+        Returns:
+            dict of symbol to value of the symbols of a code that did not error.
+        """
+        values = {}
+        for row in self._code_rows.get(query_key, ()):
+            security_symbol = self.symbols[self.row_symbols[row]]
+            if (security_symbol, query_key) not in self.errors:
+                values[security_symbol] = self._get_value(row)
+
+        return values
+
+    def to_response(self):
+        """
+        Returns:
+            the results as the dict response they were built from. Metas of
+            symbols and codes that did not error are rebuilt as {'status': 'ok'}.
+        """
+        response = {}
+        for security_symbol in self.symbols:
+            security_error = self.errors.get((security_symbol, None))
+            if security_error is not None:
+                response[security_symbol] = security_error
+                continue
+
+            results = {}
+            start_row, stop_row = self._symbol_rows[security_symbol]
+            for row in range(start_row, stop_row):
+                query_key = self.codes[self.row_codes[row]]
+                query_error = self.errors.get((security_symbol, query_key))
+                if query_error is not None:
+                    results[query_key] = query_error
+                else:
+                    results[query_key] = {'meta': {'status': 'ok'}, 'data': self._get_data(row)}
+            response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+        return {'response': response, 'meta': self.meta}
+
+    def __len__(self):
+        return len(self.row_symbols)
+
+    def _append_row(self, symbol_index, query_key, query_data):
+        code_index = self._code_indexes.get(query_key)
+        if code_index is None:
+            code_index = self._code_indexes[query_key] = len(self.codes)
+            self.codes.append(query_key)
+            self._code_rows[query_key] = array('i')
+
+        row = len(self.row_symbols)
+        self.row_symbols.append(symbol_index)
+        self.row_codes.append(code_index)
+        self._code_rows[query_key].append(row)
+        if _is_error(query_data):
+            self.errors[self.symbols[symbol_index], query_key] = query_data
+            self._append_data(row, None)
+        else:
+            self._append_data(row, query_data.get('data'))
+
+    def _find_row(self, security_symbol, query_key):
+        if (security_symbol, query_key) in self.errors:
+            return None
+
+        code_index = self._code_indexes.get(query_key)
+        start_row, stop_row = self._symbol_rows.get(security_symbol, (0, 0))
+        for row in range(start_row, stop_row):
+            if self.row_codes[row] == code_index:
+                return row
+        return None
+
+    def _append_data(self, row, data):
+        raise NotImplementedError
+
+    def _get_data(self, row):
+        raise NotImplementedError
+
+    def _get_value(self, row):
+        raise NotImplementedError
+
+
+class PointsTable(CompactResults):
+    """
+    Compact form of a points response. Dates are held as days since the
+    epoch in an int64 array and values in a float64 array, with NaN
+    standing in for nulls. The rare point that is not a [date, number]
+    pair is kept as it was in the response.
+    """
+
+    __slots__ = ('days', 'values', '_raw_data')
+
+    def __init__(self, meta):
+        super(PointsTable, self).__init__(meta)
+        self.days = array('q')
+        self.values = array('d')
+        self._raw_data = {}
+
+    def get(self, security_symbol, calculation_code):
+        """
+        Returns:
+            Point of the date and value of a symbol for a code, or None if
+            the response has none or it errored.
+        """
+        return super(PointsTable, self).get(security_symbol, calculation_code)
+
+    def _append_data(self, row, data):
+        try:
+            date, value = data
+            day = _parse_date(date).toordinal() - EPOCH_ORDINAL
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise TypeError('Not a number: {0!r}'.format(value))
+        except (TypeError, ValueError):
+            self.days.append(MISSING_DAY)
+            self.values.append(float('nan'))
+            if data is not None:
+                self._raw_data[row] = data
+            return
+
+        self.days.append(day)
+        self.values.append(float('nan') if value is None else value)
+
+    def _get_data(self, row):
+        if row in self._raw_data or self.days[row] == MISSING_DAY:
+            return self._raw_data.get(row)
+
+        value = self.values[row]
+        date = datetime.date.fromordinal(self.days[row] + EPOCH_ORDINAL).isoformat()
+        return [date, None if math.isnan(value) else value]
+
+    def _get_value(self, row):
+        if row in self._raw_data:
+            return self._raw_data[row]
+        elif self.days[row] == MISSING_DAY:
+            return None
+
+        value = self.values[row]
+        return Point(datetime.date.fromordinal(self.days[row] + EPOCH_ORDINAL), None if math.isnan(value) else value)
+
+
+class InfoTable(CompactResults):
+    """
+    Compact form of an info response. Short string values are interned,
+    so that the values shared by many securities are held once.
+    """
+
+    __slots__ = ('values',)
+
+    def __init__(self, meta):
+        super(InfoTable, self).__init__(meta)
+        self.values = []
+
+    def _append_data(self, row, data):
+        if isinstance(data, str) and len(data) <= MAX_INTERNED_LENGTH:
+            data = sys.intern(data)
+        self.values.append(data)
+
+    def _get_data(self, row):
+        return self.values[row]
+
+    def _get_value(self, row):
+        return self.values[row]
+
+
+def _is_error(data):
+    meta = data.get('meta') if isinstance(data, dict) else None
+    return bool(meta) and meta.get('status') == 'error'
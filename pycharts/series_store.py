@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+from urllib.parse import quote
+
+
+class SeriesStore(object):
+    """
+    Disk backed store of previously fetched series. Each series lives in its
+    own json file, one per security type, symbol, calculation code and
+    resample settings, holding the start date it was fetched from, the date
+    it was fetched up to and its date-value pairs in date order.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Directory the series files are written to.
+        """
+        self.directory = directory
+
+    def load(self, security_type, security_symbol, calculation_code, resample_settings=()):
+        """
+        Returns:
+            dict with the `start_date` the series was fetched from (None for the
+            full history), the `fetched_date` it was fetched up to and its
+            `data`, or None if the series is not stored.
+        """
+        path = self._get_path(security_type, security_symbol, calculation_code, resample_settings)
+        try:
+            with open(path) as series_file:
+                return json.load(series_file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, security_type, security_symbol, calculation_code, resample_settings, start_date, data,
+        fetched_date=None):
+        path = self._get_path(security_type, security_symbol, calculation_code, resample_settings)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temp file first so readers never see a partial series
+        temp_path = '{0}.{1}.{2}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'w') as series_file:
+            json.dump({'start_date': start_date, 'fetched_date': fetched_date, 'data': data}, series_file,
+                separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def _get_path(self, security_type, security_symbol, calculation_code, resample_settings):
+        file_name = '__'.join([calculation_code] + [str(setting) for setting in resample_settings])
+        return os.path.join(self.directory, security_type, quote(security_symbol, safe=''),
+            '{0}.json'.format(quote(file_name, safe='')))
+
+
+def is_covered(stored_series, start_date):
+    """
+    Whether a stored series holds all the data on or after start_date.
+    """
+    if stored_series is None:
+        return False
+    stored_start_date = stored_series['start_date']
+    return stored_start_date is None or (start_date is not None and stored_start_date <= start_date)
+
+
+def splice_series(stored_data, new_data, splice_date):
+    """
+    Replaces the stored date-value pairs on or after splice_date with new_data.
+    """
+    stored_data = [point for point in stored_data if point[0] < splice_date]
+    return stored_data + [point for point in new_data if point[0] >= splice_date]
+
+
+def slice_series(data, start_date=None, end_date=None):
+    return [point for point in data
+        if (start_date is None or point[0] >= start_date) and (end_date is None or point[0] <= end_date)]
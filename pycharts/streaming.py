@@ -0,0 +1,166 @@
+import codecs
+import json
+import re
+
+LITERAL_END_RE = re.compile(r'[,}\]\s]')
+WHITESPACE = ' \t\n\r'
+
+
+class JsonStreamScanner(object):
+    """
+    Pull parser that reads a json document from a file like object in chunks.
+    Containers can be walked member by member with `iter_object` and
+    `iter_array`, and any value can be decoded whole with `read_value`, so
+    only the value being decoded has to be held in memory.
+    """
+
+    def __init__(self, fileobj, chunk_size=64 * 1024):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.is_eof = False
+        self.json_decoder = json.JSONDecoder()
+
+    def peek(self):
+        """
+        Returns:
+            the next non whitespace character, without consuming it.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._fill()
+
+    def iter_object(self):
+        """
+        Walks the members of an object. Each key is yielded once the scanner
+        is positioned at its value, which has to be consumed before moving on.
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if self._read_separator('}'):
+                return
+
+    def iter_array(self):
+        """
+        Walks the items of an array. Each index is yielded once the scanner
+        is positioned at its value, which has to be consumed before moving on.
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self._read_separator(']'):
+                return
+
+    def read_value(self):
+        char = self.peek()
+        # drop what has been consumed already, once it outgrows a chunk
+        if self.pos > self.chunk_size:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        if char not in '{["':
+            end = self._scan_literal(self.pos)
+            value = json.loads(self.buffer[self.pos:end])
+            self.pos = end
+            return value
+
+        while True:
+            try:
+                value, self.pos = self.json_decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except ValueError:
+                if self.is_eof:
+                    raise
+                # the value is incomplete, so read as much again as is buffered
+                # to keep the number of decode attempts logarithmic in its size.
+                self._fill(len(self.buffer) - self.pos)
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expecting {0!r} at {1!r}'.format(char, self.buffer[self.pos:self.pos + 20]))
+        self.pos += 1
+
+    def _read_separator(self, closing_char):
+        char = self.peek()
+        self.pos += 1
+        if char == closing_char:
+            return True
+        elif char != ',':
+            raise ValueError('Expecting {0!r} or \',\' delimiter, got {1!r}'.format(closing_char, char))
+        return False
+
+    def _scan_literal(self, pos):
+        while True:
+            match = LITERAL_END_RE.search(self.buffer, pos)
+            if match is not None:
+                return match.start()
+            elif self.is_eof:
+                return len(self.buffer)
+            self._fill()
+
+    def _fill(self, size=0):
+        if self.is_eof:
+            raise ValueError('Unexpected end of json document')
+
+        chunk = self.fileobj.read(max(size, self.chunk_size))
+        if chunk:
+            self.buffer += self.decoder.decode(chunk)
+        else:
+            self.is_eof = True
+            self.buffer += self.decoder.decode(b'', True)
+
+
+def iter_json_items(fileobj, stream_paths, chunk_size=64 * 1024):
+    """
+    Decodes a json document incrementally.
+
+    Args:
+        fileobj: File like object the document is read from.
+        stream_paths (list): Paths of the containers whose members are walked one
+            by one instead of being decoded whole, as tuples of keys or indexes
+            where '*' matches any key. The root object is always walked.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        generator of (path, value) tuples for every value that is not walked.
+    """
+    scanner = JsonStreamScanner(fileobj, chunk_size)
+    return _iter_items(scanner, (), stream_paths)
+
+
+def _iter_items(scanner, path, stream_paths):
+    char = scanner.peek()
+    is_streamed = not path or any(_match_path(path, stream_path) for stream_path in stream_paths)
+    if is_streamed and char == '{':
+        for key in scanner.iter_object():
+            for item in _iter_items(scanner, path + (key,), stream_paths):
+                yield item
+    elif is_streamed and char == '[':
+        for index in scanner.iter_array():
+            for item in _iter_items(scanner, path + (index,), stream_paths):
+                yield item
+    else:
+        yield path, scanner.read_value()
+
+
+def _match_path(path, stream_path):
+    return len(path) == len(stream_path) and all(
+        stream_key == '*' or stream_key == key for key, stream_key in zip(path, stream_path))
@@ -0,0 +1,181 @@
+import email.utils
+import random
+import threading
+import time
+from http.client import HTTPException
+from urllib.error import HTTPError
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket rate limiter. Tokens are added at `rate` per
+    second up to `capacity`, and every request takes one.
+    """
+
+    _api_key_buckets = {}
+    _api_key_lock = threading.Lock()
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Number of requests allowed per second.
+            capacity (int): Max number of requests that can be made in a burst.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_api_key(cls, api_key, rate, capacity=None):
+        """
+        Returns:
+            the bucket shared by every client of an API key, which is created
+            with the given rate and capacity by the first client that asks for it.
+        """
+        with cls._api_key_lock:
+            bucket = cls._api_key_buckets.get(api_key)
+            if bucket is None:
+                bucket = cls._api_key_buckets[api_key] = cls(rate, capacity)
+            return bucket
+
+    def acquire(self):
+        """
+        Takes a token, waiting for one to be added if the bucket is empty.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            # a negative balance is the time the caller has to wait for its token
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """
+    Bounds the number of requests in flight with an additive increase,
+    multiplicative decrease limit: every successful request raises the limit
+    by 1 / limit, and every throttled request cuts it by backoff_factor.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=64, backoff_factor=0.5):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+
+
+class Throttle(object):
+    """
+    Client side rate limiting, adaptive concurrency and retries with jittered
+    exponential backoff for the requests of one or more clients.
+
+    The rate is enforced by a token bucket shared by every client of the same
+    API key. Requests that are throttled with a 429 or 503 status cut the
+    concurrency limit, and are retried after their Retry-After header, or
+    after a jittered exponential backoff, along with other server errors and
+    connection errors.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, rate=None, burst=None, concurrency_limiter=None, max_retries=3,
+        backoff_base=0.5, backoff_max=30):
+        """
+        Args:
+            rate (float): Max number of requests per second for an API key, unbounded if None.
+            burst (int): Max number of requests that can be made in a burst.
+            concurrency_limiter (AdaptiveConcurrencyLimiter): Limiter of requests in flight.
+            max_retries (int): Max number of times a request is retried.
+            backoff_base (float): Seconds the backoff starts from, doubling with every retry.
+            backoff_max (float): Max number of seconds to wait before a retry.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+
+    def call(self, api_key, fetch):
+        """
+        Calls fetch within the rate and concurrency limits, retrying it on
+        throttling, server and connection errors.
+
+        Args:
+            api_key (str): API key of the client making the request.
+            fetch (callable): Sends the request and reads its response.
+        """
+        attempt = 0
+        while True:
+            if self.rate:
+                TokenBucket.for_api_key(api_key, self.rate, self.burst).acquire()
+
+            self.concurrency_limiter.acquire()
+            try:
+                result = fetch()
+            except HTTPError as http_error:
+                if http_error.code in self.THROTTLE_STATUSES:
+                    self.concurrency_limiter.on_throttle()
+                if http_error.code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                retry_after = http_error.headers.get('Retry-After') if http_error.headers else None
+                delay = self.get_retry_delay(attempt, retry_after)
+            except (OSError, HTTPException):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.get_retry_delay(attempt)
+            else:
+                self.concurrency_limiter.on_success()
+                return result
+            finally:
+                self.concurrency_limiter.release()
+
+            attempt += 1
+            self.retries += 1
+            time.sleep(delay)
+
+    def get_retry_delay(self, attempt, retry_after=None):
+        """
+        Returns:
+            seconds to wait before retrying, from the Retry-After header when
+            given and otherwise a full jitter exponential backoff.
+        """
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, max(0, float(retry_after)))
+            except ValueError:
+                retry_at = email.utils.parsedate_tz(retry_after)
+                if retry_at is not None:
+                    return min(self.backoff_max, max(0, email.utils.mktime_tz(retry_at) - time.time()))
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
@@ -0,0 +1,171 @@
+import threading
+import time
+try:
+    # Python 3
+    from http.client import HTTPConnection, HTTPException, HTTPSConnection
+    from io import BytesIO
+    from urllib.error import HTTPError
+except ImportError:
+    # Python2
+    from httplib import HTTPConnection, HTTPException, HTTPSConnection
+    from io import BytesIO
+    from urllib2 import HTTPError
+
+
+class ConnectionPool(object):
+    """
+    Thread safe pool of persistent http connections that can be shared by
+    all the requests of a client, so that consecutive requests to the same
+    host reuse keep-alive connections instead of opening a new one each time.
+
+    The pool exposes a `urlopen` method that mirrors `urllib.request.urlopen`.
+    """
+
+    def __init__(self, max_connections=10, idle_timeout=30, timeout=None):
+        """
+        Args:
+            max_connections (int): Max number of connections that can be open at the same time.
+                Requests made when all connections are busy wait for one to be released.
+            idle_timeout (int): Seconds after which an idle connection is closed instead of reused.
+            timeout (int): Socket timeout in seconds for every connection.
+        """
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_connections)
+
+    def urlopen(self, req):
+        """
+        Sends a request over a pooled connection.
+
+        Args:
+            req (Request): urllib request object
+
+        Returns:
+            A file like response object. The connection goes back to the pool
+            once the response body has been fully read.
+
+        Raises:
+            HTTPError for any response with a 4xx or 5xx status code.
+        """
+        pool_key = (req.type, req.host)
+        self._semaphore.acquire()
+        try:
+            response = self._send(pool_key, req)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        if response.status >= 400:
+            body = response.read()
+            raise HTTPError(req.get_full_url(), response.status, response.reason,
+                response.headers, BytesIO(body))
+
+        return response
+
+    def close(self):
+        """
+        Closes all the idle connections of the pool.
+        """
+        with self._lock:
+            idle_connections = self._idle_connections
+            self._idle_connections = {}
+
+        for connections in idle_connections.values():
+            for connection, _ in connections:
+                connection.close()
+
+    def _send(self, pool_key, req):
+        headers = dict(req.header_items())
+        while True:
+            connection, is_reused = self._get_connection(pool_key)
+            try:
+                connection.request(req.get_method(), req.selector, headers=headers)
+                http_response = connection.getresponse()
+            except (HTTPException, OSError):
+                connection.close()
+                # the server may have dropped an idle keep-alive connection,
+                # in which case the request is retried on a fresh one.
+                if is_reused:
+                    continue
+                raise
+
+            return PooledResponse(self, pool_key, connection, http_response)
+
+    def _get_connection(self, pool_key):
+        now = time.time()
+        with self._lock:
+            connections = self._idle_connections.get(pool_key, [])
+            while connections:
+                connection, released_at = connections.pop()
+                if now - released_at < self.idle_timeout:
+                    return connection, True
+                connection.close()
+
+            self.connections_opened += 1
+
+        scheme, host = pool_key
+        connection_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+        return connection_class(host, timeout=self.timeout), False
+
+    def _release(self, pool_key, connection, is_reusable):
+        if is_reusable:
+            with self._lock:
+                self._idle_connections.setdefault(pool_key, []).append((connection, time.time()))
+        else:
+            connection.close()
+
+        self._semaphore.release()
+
+
+class PooledResponse(object):
+    """
+    File like wrapper around an http response that hands the underlying
+    connection back to its pool once the body has been consumed.
+    """
+
+    def __init__(self, pool, pool_key, connection, http_response):
+        self.pool = pool
+        self.pool_key = pool_key
+        self.connection = connection
+        self.http_response = http_response
+        self.status = http_response.status
+        self.reason = http_response.reason
+        self.headers = http_response.headers
+        self._is_released = False
+
+    @property
+    def code(self):
+        return self.status
+
+    def getheader(self, name, default=None):
+        return self.http_response.getheader(name, default)
+
+    def info(self):
+        return self.headers
+
+    def read(self, amt=None):
+        data = self.http_response.read(amt)
+        if self.http_response.isclosed():
+            self._release(is_reusable=not self.http_response.will_close)
+        return data
+
+    def close(self):
+        # a partially read body leaves the connection in an unusable state
+        is_reusable = self.http_response.isclosed() and not self.http_response.will_close
+        self.http_response.close()
+        self._release(is_reusable)
+
+    def _release(self, is_reusable):
+        if not self._is_released:
+            self._is_released = True
+            self.pool._release(self.pool_key, self.connection, is_reusable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
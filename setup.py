@@ -11,6 +11,11 @@ setup(
     keywords='development ycharts api rest restful',
     packages = find_packages(),
     install_requires=[],
+    extras_require={
+        'arrow': ['pyarrow'],
+        'fast': ['orjson'],
+        'pandas': ['pandas'],
+    },
     zip_safe=False,
     classifiers=[
         'Development Status :: 5 - Production/Stable',
@@ -1,10 +1,52 @@
+import asyncio
+import csv
 import datetime
+import gc
+import gzip
+import importlib.util
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from io import BytesIO
 from unittest import mock, TestCase
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlsplit
+from urllib.request import Request
 import json
-from pycharts.clients import CompanyClient
+from pycharts import adjustment
+from pycharts.batching import BatchingClient
+from pycharts.bulk import BulkJob, get_shard_path, run_bulk_job
+from pycharts.cache import ResponseCache
+from pycharts.coalescing import RequestCoalescer
+from pycharts.columnar import ColumnarSeries
+from pycharts import frames
+from pycharts import resampling
+from pycharts import decoding
+from pycharts.compression import DecompressingReader, TransferStats
+from pycharts.instrumentation import Histogram, LoggingHook, MetricsCollector
+from pycharts.point_in_time import PointInTimeStore
+from pycharts.results import InfoTable, Point, PointsTable
+from pycharts.series_store import SeriesStore
+from pycharts.streaming import iter_json_items
+from pycharts.throttling import AdaptiveConcurrencyLimiter, Throttle, TokenBucket
+from pycharts.clients import CompanyClient, IndicatorClient
+from pycharts.transport import ConnectionPool
 from pycharts import exceptions
 
+# the asyncio clients use async syntax, which python 3.4 does not parse
+if sys.version_info >= (3, 5):
+    from pycharts import aio
+else:
+    aio = None
+
 
 #########################################
 #####      MOCKING UTILITIES        #####
@@ -69,6 +111,15 @@ class MockHttpResponse(object):
                 'url': 'http://ycharts.com/api/v3/companies/TOOMANY/info/name',
             },
         },
+        'https://ycharts.com/api/v3/companies/TOOMANY/series/price': {
+            'response': {},
+            'meta': {
+                'error_message': 'Too many identifiers. Ensure 100 or less.',
+                'status': 'error',
+                'error_code': 414,
+                'url': 'http://ycharts.com/api/v3/companies/TOOMANY/series/price',
+            },
+        },
         'https://ycharts.com/api/v3/companies?page=1': {
             'response': [{'name': 'Apple', 'symbol': 'AAPL'}, {'name': 'Microsoft', 'symbol': 'MSFT'}],
             'meta': {
@@ -174,6 +225,313 @@ class MockHttpResponse(object):
 def mock_urlopen(request):
     return MockHttpResponse(request)
 
+
+class MockBatchHttpResponse(MockHttpResponse):
+    """
+    Builds a points response for whatever symbols and codes are in the
+    requested url, so that batched requests can be checked.
+    """
+
+    requested_urls = []
+
+    def read(self):
+        url = self.request.get_full_url()
+        self.requested_urls.append(url)
+        security_symbols, _, calculation_codes = url.partition('?')[0].split('/')[-3:]
+        response = {}
+        for security_symbol in security_symbols.split(','):
+            results = {}
+            for calculation_code in calculation_codes.split(','):
+                results[calculation_code] = {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 1.0]}
+            response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+        return json.dumps({'response': response, 'meta': {'url': url, 'status': 'ok'}}).encode('utf-8')
+
+
+def mock_batch_urlopen(request):
+    return MockBatchHttpResponse(request)
+
+
+class MockPagedHttpResponse(MockHttpResponse):
+    """
+    Builds the requested page of a securities response with num_pages pages.
+    """
+
+    requested_urls = []
+    num_pages = 5
+    page_size = 2
+
+    def read(self):
+        url = self.request.get_full_url()
+        self.requested_urls.append(url)
+        page = int(url.split('page=')[1].split('&')[0])
+        start_index = (page - 1) * self.page_size + 1
+        securities = [{'name': 'Company {0}'.format(i), 'symbol': 'SYM{0}'.format(i)}
+            for i in range(start_index, start_index + self.page_size)]
+        pagination_info = {
+            'start_index': start_index, 'end_index': start_index + self.page_size - 1,
+            'num_items': self.num_pages * self.page_size, 'num_pages': self.num_pages, 'current_page_num': page,
+        }
+
+        return json.dumps({'response': securities, 'meta': {'url': url, 'status': 'ok',
+            'pagination_info': pagination_info}}).encode('utf-8')
+
+
+def mock_paged_urlopen(request):
+    return MockPagedHttpResponse(request)
+
+
+class MockFilterHttpResponse(MockHttpResponse):
+    """
+    Filters a small universe of companies by the requested filters, and
+    rejects combinations of filters when reject_combinations is set.
+    """
+
+    requested_urls = []
+    reject_combinations = False
+    companies = [
+        {'name': 'Apple', 'symbol': 'AAPL', 'exchange': 'NASDAQ', 'sector': 'Technology', 'is_reit': 'false'},
+        {'name': 'IBM', 'symbol': 'IBM', 'exchange': 'NYSE', 'sector': 'Technology', 'is_reit': 'false'},
+        {'name': 'Realty Income', 'symbol': 'O', 'exchange': 'NYSE', 'sector': 'Real Estate', 'is_reit': 'true'},
+        {'name': 'Equinix', 'symbol': 'EQIX', 'exchange': 'NASDAQ', 'sector': 'Real Estate', 'is_reit': 'true'},
+        {'name': 'Welltower', 'symbol': 'WELL', 'exchange': 'NYSE', 'sector': 'Real Estate', 'is_reit': 'true'},
+    ]
+
+    def read(self):
+        url = self.request.get_full_url()
+        self.requested_urls.append(url)
+        params = dict(parse_qsl(urlsplit(url).query))
+        page = int(params.pop('page'))
+        securities = [company for company in self.companies
+            if all(company[filter_name] == filter_value for filter_name, filter_value in params.items())]
+        pagination_info = {
+            'start_index': 1, 'end_index': len(securities),
+            'num_items': len(securities), 'num_pages': 1, 'current_page_num': page,
+        }
+
+        return json.dumps({'response': securities, 'meta': {'url': url, 'status': 'ok',
+            'pagination_info': pagination_info}}).encode('utf-8')
+
+
+def mock_filter_urlopen(request):
+    num_filters = len(parse_qsl(urlsplit(request.get_full_url()).query)) - 1
+    if MockFilterHttpResponse.reject_combinations and num_filters > 1:
+        raise HTTPError(request.get_full_url(), 400, 'Bad Request', {}, None)
+    return MockFilterHttpResponse(request)
+
+
+class MockSeriesHttpResponse(MockHttpResponse):
+    """
+    Builds a daily series response from the requested start_date up to
+    last_date for whatever symbols and codes are in the requested url.
+    """
+
+    requested_urls = []
+    first_date = datetime.date(2016, 9, 1)
+    last_date = datetime.date(2016, 9, 15)
+    # symbols whose series have no data
+    empty_symbols = ('NODATA',)
+
+    def read(self):
+        url = self.request.get_full_url()
+        self.requested_urls.append(url)
+        url_path, _, query = url.partition('?')
+        params = dict(param.split('=') for param in query.split('&') if param)
+        security_symbols, _, calculation_codes = url_path.split('/')[-3:]
+        day = self.first_date
+        if 'start_date' in params:
+            day = max(day, datetime.datetime.strptime(params['start_date'], '%Y-%m-%d').date())
+        last_date = self.last_date
+        if 'end_date' in params:
+            last_date = min(last_date, datetime.datetime.strptime(params['end_date'], '%Y-%m-%d').date())
+        data = []
+        while day <= last_date:
+            data.append([day.isoformat(), float(day.day)])
+            day += datetime.timedelta(days=1)
+
+        response = {}
+        for security_symbol in security_symbols.split(','):
+            results = {}
+            for calculation_code in calculation_codes.split(','):
+                results[calculation_code] = {'meta': {'status': 'ok'},
+                    'data': [] if security_symbol in self.empty_symbols else data}
+            response[security_symbol] = {'meta': {'status': 'ok'}, 'results': results}
+
+        return json.dumps({'response': response, 'meta': {'url': url, 'status': 'ok'}}).encode('utf-8')
+
+
+def mock_series_urlopen(request):
+    return MockSeriesHttpResponse(request)
+
+class MockEventsHttpResponse(MockHttpResponse):
+    """
+    Builds a dividends or splits response out of `events` for whatever
+    symbols are in the requested url, from the requested start_date on.
+    """
+
+    requested_urls = []
+    events = {'dividends': [], 'splits': []}
+
+    def read(self):
+        url = self.request.get_full_url()
+        self.requested_urls.append(url)
+        url_path, _, query = url.partition('?')
+        params = dict(param.split('=') for param in query.split('&') if param)
+        security_symbols, event_type = url_path.split('/')[-2:]
+        date_field = 'ex_date' if event_type == 'dividends' else 'day'
+        events = [event for event in self.events[event_type] if event[date_field] >= params.get('start_date', '')]
+        response = dict((security_symbol, {'meta': {'status': 'ok'}, 'results': events})
+            for security_symbol in security_symbols.split(','))
+        return json.dumps({'response': response, 'meta': {'url': url, 'status': 'ok'}}).encode('utf-8')
+
+
+def mock_adjustment_urlopen(request):
+    if '/series/' in request.get_full_url():
+        return MockSeriesHttpResponse(request)
+    return MockEventsHttpResponse(request)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the MockHttpResponse payloads over keep-alive http connections.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # handlers are created once per connection
+        self.server.connections_opened += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        url = 'https://ycharts.com{0}'.format(self.path)
+        payload = MockHttpResponse.URL_RESPONSE_INDEX.get(url)
+        if payload is None:
+            self.send_payload(404, b'')
+        else:
+            self.send_payload(200, json.dumps(payload).encode('utf-8'))
+
+    def send_payload(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThrottlingRequestHandler(StubRequestHandler):
+    """
+    Answers the first `throttled_requests` requests of the server with a 429.
+    """
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            is_throttled = self.server.requests <= self.server.throttled_requests
+
+        if is_throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            StubRequestHandler.do_GET(self)
+
+
+class CompressingRequestHandler(StubRequestHandler):
+    """
+    Compresses payloads with the first of gzip and deflate the request accepts.
+    """
+
+    def send_payload(self, status, body):
+        accept_encoding = self.headers.get('Accept-Encoding', '')
+        if 'gzip' in accept_encoding:
+            content_encoding, body = 'gzip', gzip.compress(body)
+        elif 'deflate' in accept_encoding:
+            content_encoding, body = 'deflate', zlib.compress(body)
+        else:
+            return StubRequestHandler.send_payload(self, status, body)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', content_encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SeriesRequestHandler(StubRequestHandler):
+    """
+    Serves MockSeriesHttpResponse series, with a 404 for the urls of any of
+    the `failing_symbols`.
+    """
+
+    failing_symbols = set()
+
+    def do_GET(self):
+        url = 'https://ycharts.com{0}'.format(self.path)
+        security_symbols = url.partition('?')[0].split('/')[-3].split(',')
+        if self.failing_symbols.intersection(security_symbols):
+            self.send_payload(404, b'')
+        else:
+            self.send_payload(200, MockSeriesHttpResponse(Request(url)).read())
+
+
+class PagedRequestHandler(StubRequestHandler):
+    """
+    Serves MockPagedHttpResponse pages.
+    """
+
+    def do_GET(self):
+        url = 'https://ycharts.com{0}'.format(self.path)
+        self.send_payload(200, MockPagedHttpResponse(Request(url)).read())
+
+
+class FilterRequestHandler(StubRequestHandler):
+    """
+    Serves MockFilterHttpResponse securities, with a 400 for any combination of filters.
+    """
+
+    def do_GET(self):
+        url = 'https://ycharts.com{0}'.format(self.path)
+        if len(parse_qsl(urlsplit(url).query)) > 2:
+            self.send_payload(400, b'')
+        else:
+            self.send_payload(200, MockFilterHttpResponse(Request(url)).read())
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """
+    Local stand-in for the YCharts api that counts the connections opened to it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, handler_class=StubRequestHandler):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), handler_class)
+        self.connections_opened = 0
+        self.requests = 0
+        self.throttled_requests = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/api'.format(self.server_address[1])
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
 #########################################
 #####           TEST CASES          #####
 #########################################
@@ -271,12 +629,37 @@ class ClientTestCase(TestCase):
         self.assertEqual(pagination_info['num_pages'], 1)
         self.assertEqual(pagination_info['current_page_num'], 1)
 
+    @mock.patch('pycharts.base.urlopen', mock_filter_urlopen)
+    def test_multi_filter_securities_request(self):
+        MockFilterHttpResponse.requested_urls = []
+        MockFilterHttpResponse.reject_combinations = False
+        securities_rsp = self.client.get_securities(exchange='NYSE', is_reit='true')
+        self.assertEqual([security['symbol'] for security in securities_rsp['response']], ['O', 'WELL'])
+        self.assertEqual(MockFilterHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies?page=1&exchange=NYSE&is_reit=true'])
+
+    @mock.patch('pycharts.base.urlopen', mock_filter_urlopen)
+    def test_rejected_multi_filter_securities_request(self):
+        MockFilterHttpResponse.requested_urls = []
+        MockFilterHttpResponse.reject_combinations = True
+        securities_rsp = self.client.get_securities(exchange='NYSE', is_reit='true', sector='Real Estate')
+        self.assertEqual([security['symbol'] for security in securities_rsp['response']], ['O', 'WELL'])
+        self.assertEqual(securities_rsp['meta']['pagination_info']['num_pages'], 1)
+        self.assertEqual(securities_rsp['meta']['pagination_info']['num_items'], 2)
+        # one scan per filter
+        self.assertEqual(len(MockFilterHttpResponse.requested_urls), 3)
+
     def test_400_bad_filter_securities_request(self):
         with self.assertRaises(exceptions.PyChartsRequestException) as cm:
             self.client.get_securities(bad_filter='bad_value')
 
         self.assertEqual(cm.exception.error_code, 400)
 
+        with self.assertRaises(exceptions.PyChartsRequestException) as cm:
+            self.client.get_securities(exchange='NYSE', bad_filter='bad_value')
+
+        self.assertEqual(cm.exception.error_code, 400)
+
     @mock.patch('pycharts.base.urlopen', mock_urlopen)
     def test_successful_dividend_request(self):
         start_date = datetime.datetime(2015, 1, 1)
@@ -340,5 +723,1375 @@ class ClientTestCase(TestCase):
         expected_data = [['2016-09-12', 99999.00]]
         self.assertEqual(calculation_query_data, expected_data)
 
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_batched_point_request(self):
+        MockBatchHttpResponse.requested_urls = []
+        security_symbols = ['SYM{0}'.format(i) for i in range(250)]
+        calculation_codes = ['code{0}'.format(i) for i in range(150)]
+        point_rsp = self.client.get_points(security_symbols, calculation_codes)
+        # 3 symbol batches x 2 code batches
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 6)
+        for url in MockBatchHttpResponse.requested_urls:
+            symbols, _, codes = url.split('/')[-3:]
+            self.assertTrue(len(symbols.split(',')) <= 100)
+            self.assertTrue(len(codes.split(',')) <= 100)
+        # assertions
+        self.assertEqual(point_rsp['meta']['status'], 'ok')
+        self.assertEqual(list(point_rsp['response'].keys()), security_symbols)
+        for security_response_data in point_rsp['response'].values():
+            self.assertEqual(security_response_data['meta']['status'], 'ok')
+            self.assertEqual(sorted(security_response_data['results'].keys()), sorted(calculation_codes))
+
+    @mock.patch('pycharts.base.urlopen', mock_paged_urlopen)
+    def test_iter_securities(self):
+        MockPagedHttpResponse.requested_urls = []
+        securities = list(self.client.iter_securities(prefetch_pages=2, exchange='NYSE'))
+        self.assertEqual([security['symbol'] for security in securities], ['SYM{0}'.format(i) for i in range(1, 11)])
+        self.assertEqual(sorted(MockPagedHttpResponse.requested_urls),
+            ['https://ycharts.com/api/v3/companies?page={0}&exchange=NYSE'.format(page) for page in range(1, 6)])
+
+    @mock.patch('pycharts.base.urlopen', mock_paged_urlopen)
+    def test_iter_securities_stops_early(self):
+        MockPagedHttpResponse.requested_urls = []
+        securities = self.client.iter_securities(prefetch_pages=1)
+        self.assertEqual([next(securities)['symbol'] for _ in range(3)], ['SYM1', 'SYM2', 'SYM3'])
+        securities.close()
+        # the first page, the page being consumed and at most one prefetched page
+        self.assertTrue(len(MockPagedHttpResponse.requested_urls) <= 3)
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_small_point_request_is_not_batched(self):
+        MockBatchHttpResponse.requested_urls = []
+        self.client.get_points(['AAPL', 'MSFT'], ['price'])
+        self.assertEqual(MockBatchHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies/AAPL,MSFT/points/price'])
+
+
+class RequestCoalescerTestCase(TestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.client = CompanyClient('api_key', coalescer=self.coalescer)
+        MockBatchHttpResponse.requested_urls = []
+
+    def wait_for_calls(self, num_calls):
+        for _ in range(500):
+            if self.coalescer.calls >= num_calls:
+                return
+            time.sleep(0.01)
+
+    def run_threads(self, target, num_threads):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        def slow_urlopen(request):
+            # hold the request until every thread has joined it
+            self.wait_for_calls(5)
+            return mock_batch_urlopen(request)
+
+        with mock.patch('pycharts.base.urlopen', slow_urlopen):
+            results = self.run_threads(lambda: self.client.get_points(['AAPL', 'MSFT'], ['price']), 5)
+
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 1)
+        self.assertEqual(self.coalescer.coalesced, 4)
+        self.assertEqual(len(results), 5)
+        for point_rsp in results:
+            self.assertEqual(point_rsp, results[0])
+        # every caller gets its own copy of the response
+        self.assertFalse(results[0] is results[1])
+
+    def test_exceptions_are_shared(self):
+        def slow_urlopen(request):
+            self.wait_for_calls(3)
+            return mock_urlopen(request)
+
+        def get_info():
+            try:
+                return self.client.get_info(['TOOMANY'], ['name'])
+            except exceptions.PyChartsRequestTooLongException as too_long_error:
+                return too_long_error
+
+        with mock.patch('pycharts.base.urlopen', slow_urlopen):
+            results = self.run_threads(get_info, 3)
+
+        self.assertEqual(self.coalescer.coalesced, 2)
+        for result in results:
+            self.assertTrue(isinstance(result, exceptions.PyChartsRequestTooLongException))
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_sequential_requests_are_not_coalesced(self):
+        self.client.get_points(['AAPL'], ['price'])
+        self.client.get_points(['AAPL'], ['price'])
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 2)
+        self.assertEqual(self.coalescer.coalesced, 0)
+
+
+class BatchingClientTestCase(TestCase):
+
+    def setUp(self):
+        self.client = BatchingClient(CompanyClient('api_key'), window=0.05)
+        MockBatchHttpResponse.requested_urls = []
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_point_queries_are_merged(self):
+        aapl_future = self.client.submit_points('AAPL', 'price')
+        msft_future = self.client.submit_points(['MSFT'], ['price', 'pe_ratio'])
+        dated_future = self.client.submit_points('AAPL', 'price', query_date=-1)
+        aapl_rsp = aapl_future.result()
+        msft_rsp = msft_future.result()
+        dated_future.result()
+
+        self.assertEqual(sorted(MockBatchHttpResponse.requested_urls), [
+            'https://ycharts.com/api/v3/companies/AAPL,MSFT/points/price,pe_ratio',
+            'https://ycharts.com/api/v3/companies/AAPL/points/price?date=-1',
+        ])
+        self.assertEqual(self.client.queries, 3)
+        self.assertEqual(self.client.dispatched_queries, 2)
+        # each caller gets the slice it asked for
+        self.assertEqual(list(aapl_rsp['response']), ['AAPL'])
+        self.assertEqual(list(aapl_rsp['response']['AAPL']['results']), ['price'])
+        self.assertEqual(list(msft_rsp['response']), ['MSFT'])
+        self.assertEqual(sorted(msft_rsp['response']['MSFT']['results']), ['pe_ratio', 'price'])
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_flush(self):
+        self.client.window = 60
+        future = self.client.submit_info(['AAPL'], ['name'])
+        self.client.flush()
+        self.assertEqual(future.result()['response']['AAPL']['results']['name']['data'], ['2016-09-15', 1.0])
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_compact_results(self):
+        self.client.client.compact_results = True
+        points_future = self.client.submit_points(['AAPL'], ['price'])
+        info_future = self.client.submit_info(['MSFT'], ['name'])
+        self.assertTrue(isinstance(points_future.result(), PointsTable))
+        self.assertTrue(isinstance(info_future.result(), InfoTable))
+        self.assertEqual(points_future.result().symbols, ['AAPL'])
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_result_errors_reach_every_caller(self):
+        self.client.window = 60
+        self.client.client.compact_results = True
+        futures = [self.client.submit_info([security_symbol], ['name']) for security_symbol in ('AAPL', 'MSFT')]
+        with mock.patch('pycharts.batching.InfoTable.from_response', side_effect=ValueError('bad response')):
+            self.client.flush()
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(timeout=1)
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_points_are_answered_from_the_point_in_time_store(self):
+        store = PointInTimeStore()
+        store.ingest_series('companies', 'AAPL', 'price', [['2016-09-02', 2.0]], start_date='2016-09-01',
+            end_date='2016-09-10')
+        self.client.client.point_in_time_store = store
+        aapl_future = self.client.submit_points('AAPL', 'price', query_date=datetime.datetime(2016, 9, 5))
+        msft_future = self.client.submit_points('MSFT', 'price', query_date=datetime.datetime(2016, 9, 5))
+        self.assertEqual(aapl_future.result()['response']['AAPL']['results']['price']['data'], ['2016-09-02', 2.0])
+        self.assertEqual(list(msft_future.result()['response']), ['MSFT'])
+        # only the point missing from the store is fetched
+        self.assertEqual(MockBatchHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies/MSFT/points/price?date=2016-09-05'])
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_exceptions_reach_every_caller(self):
+        futures = [self.client.submit_info(['TOOMANY'], ['name']) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(exceptions.PyChartsRequestTooLongException):
+                future.result()
+
+
+class ColumnarSeriesTestCase(TestCase):
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_columnar_series_request(self):
+        client = CompanyClient('api_key', columnar_series=True)
+        series_rsp = client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        series = series_rsp['response']['AAPL']['results']['price']['data']
+        self.assertTrue(isinstance(series, ColumnarSeries))
+        self.assertEqual(len(series), 4)
+        self.assertEqual(list(series.raw_values), [105.44, 107.95, 111.77, 115.39])
+        self.assertEqual(series.days[0], (datetime.date(2016, 9, 12) - datetime.date(1970, 1, 1)).days)
+        self.assertEqual(series.to_data(), [['2016-09-12', 105.44], ['2016-09-13', 107.95],
+            ['2016-09-14', 111.77], ['2016-09-15', 115.39]])
+
+    def test_null_values(self):
+        series = ColumnarSeries.from_data([['2016-09-12', None], ['2016-09-13', 1.5]])
+        self.assertNotEqual(series.raw_values[0], series.raw_values[0])
+        self.assertEqual(series.to_data(), [['2016-09-12', None], ['2016-09-13', 1.5]])
+        # the value buffer can be shared without copies
+        self.assertEqual(memoryview(series.raw_values).format, 'd')
+
+
+class CompactResultsTestCase(TestCase):
+
+    def setUp(self):
+        self.points_rsp = {
+            'response': {
+                'AAPL': {'meta': {'status': 'ok'}, 'results': {
+                    'price': {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 115.39]},
+                    'pe_ratio': {'meta': {'status': 'ok'}, 'data': ['2016-09-14', None]},
+                    'bad_code': {'meta': {'status': 'error', 'error_code': 400, 'error_message': 'Invalid code'}},
+                }},
+                'MSFT': {'meta': {'status': 'ok'}, 'results': {
+                    'price': {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 57.21]},
+                    'pe_ratio': {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 'n/a']},
+                    'bad_code': {'meta': {'status': 'ok'}, 'data': None},
+                }},
+                'NOTASYMBOL': {'meta': {'status': 'error', 'error_code': 404, 'error_message': 'Not found'}},
+            },
+            'meta': {'status': 'ok', 'url': 'http://ycharts.com/api/v3/companies/AAPL,MSFT/points/price'},
+        }
+
+    def test_points_table_lookups(self):
+        points = PointsTable.from_response(self.points_rsp)
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points.get('AAPL', 'price'), Point(datetime.date(2016, 9, 15), 115.39))
+        self.assertEqual(points.get('AAPL', 'pe_ratio').value, None)
+        self.assertEqual(points.get('AAPL', 'bad_code'), None)
+        self.assertEqual(points.get('NOTASYMBOL', 'price'), None)
+        self.assertEqual(points.get('MSFT', 'pe_ratio'), ['2016-09-15', 'n/a'])
+        self.assertEqual(points.for_code('price'), {
+            'AAPL': Point(datetime.date(2016, 9, 15), 115.39), 'MSFT': Point(datetime.date(2016, 9, 15), 57.21)})
+        self.assertEqual(sorted(points.for_symbol('AAPL')), ['pe_ratio', 'price'])
+        self.assertEqual(sorted(points.errors), [('AAPL', 'bad_code'), ('NOTASYMBOL', None)])
+
+    def test_points_table_round_trip(self):
+        self.assertEqual(PointsTable.from_response(self.points_rsp).to_response(), self.points_rsp)
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_compact_client_results(self):
+        client = CompanyClient('api_key', compact_results=True)
+        points = client.get_points(['AAPL'], ['price'])
+        self.assertTrue(isinstance(points, PointsTable))
+        self.assertEqual(points.get('MSFT', 'price').value, 57.21)
+        info = client.get_info(['AAPL'], ['name'])
+        self.assertTrue(isinstance(info, InfoTable))
+        self.assertEqual(info.get('AAPL', 'name'), 'Apple')
+        self.assertEqual(info.for_code('name'), {'AAPL': 'Apple'})
+        self.assertEqual(info.to_response(), CompanyClient('api_key').get_info(['AAPL'], ['name']))
+
+
+class FramesTestCase(TestCase):
+
+    def setUp(self):
+        self.points_rsp = {
+            'response': {
+                'AAPL': {'meta': {'status': 'ok'}, 'results': {
+                    'price': {'meta': {'status': 'ok'}, 'data': ['2016-09-15', 115.39]},
+                    'bad_code': {'meta': {'status': 'error', 'error_code': 400, 'error_message': 'Invalid code'},
+                        'data': None},
+                }},
+                'NOTASYMBOL': {'meta': {'status': 'error', 'error_code': 404, 'error_message': 'Not found'}},
+            },
+            'meta': {'status': 'ok'},
+        }
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_series_columns(self):
+        client = CompanyClient('api_key')
+        series_rsp = client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        columns = frames.series_columns(series_rsp)
+        self.assertEqual(columns['symbol'], ['AAPL'] * 4)
+        self.assertEqual(columns['code'], ['price'] * 4)
+        self.assertEqual(list(columns['value']), [105.44, 107.95, 111.77, 115.39])
+        self.assertEqual(columns['date'][0], (datetime.date(2016, 9, 12) - datetime.date(1970, 1, 1)).days)
+        # columnar series are copied over as is
+        columnar_rsp = CompanyClient('api_key', columnar_series=True).get_series(
+            ['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        self.assertEqual(frames.series_columns(columnar_rsp), columns)
+
+    def test_point_columns_leave_out_errors(self):
+        columns = frames.point_columns(self.points_rsp)
+        self.assertEqual(columns['symbol'], ['AAPL'])
+        self.assertEqual(columns['code'], ['price'])
+        self.assertEqual(list(columns['value']), [115.39])
+
+    def test_error_columns(self):
+        columns = frames.error_columns(self.points_rsp)
+        self.assertEqual(columns, {
+            'symbol': ['AAPL', 'NOTASYMBOL'],
+            'code': ['bad_code', None],
+            'error_code': [400, 404],
+            'error_message': ['Invalid code', 'Not found'],
+        })
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_info_and_event_columns(self):
+        client = CompanyClient('api_key')
+        info_columns = frames.info_columns(client.get_info(['AAPL'], ['name']))
+        self.assertEqual(info_columns, {'symbol': ['AAPL'], 'code': ['name'], 'value': ['Apple']})
+        event_columns = frames.event_columns(client.get_stock_splits(['AAPL'],
+            split_end_date=datetime.datetime(2014, 1, 1)))
+        self.assertEqual(event_columns, {'symbol': ['AAPL'], 'day': ['1987-06-16'],
+            'is_stock_dividend': ['false'], 'ratio': [2.0], 'status': ['executed']})
+
+    @unittest.skipIf(frames.pandas is None, 'pandas is not installed')
+    def test_points_to_frame(self):
+        frame = frames.points_to_frame(self.points_rsp)
+        self.assertEqual(list(frame.columns), ['symbol', 'code', 'date', 'value'])
+        wide_frame = frames.points_to_frame(self.points_rsp, layout='wide')
+        self.assertEqual(wide_frame.loc['AAPL', 'price'], 115.39)
+        self.assertEqual(len(frames.errors_to_frame(self.points_rsp)), 2)
+
+    @unittest.skipIf(frames.pandas is not None, 'pandas is installed')
+    def test_frames_require_pandas(self):
+        with self.assertRaises(ImportError):
+            frames.points_to_frame(self.points_rsp)
+
+
+class InstrumentationTestCase(TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.collector = MetricsCollector()
+        self.client = CompanyClient('api_key', cache=ResponseCache(), hooks=[self.events.append, self.collector])
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_request_events(self):
+        self.client.get_points(['AAPL'], ['price'])
+        self.assertEqual([event.name for event in self.events], ['request_start', 'response_received', 'parse_complete'])
+        self.assertEqual(len(set(event.request_id for event in self.events)), 1)
+        parse_event = self.events[-1]
+        self.assertEqual(parse_event.endpoint, 'points')
+        self.assertEqual((parse_event.num_symbols, parse_event.num_codes), (1, 1))
+        self.assertTrue(parse_event.num_bytes > 0)
+        self.assertFalse(parse_event.cache_hit)
+        self.assertTrue(parse_event.elapsed >= parse_event.parse_time >= 0)
+
+        self.client.get_points(['AAPL'], ['price'])
+        self.assertTrue(self.events[-1].cache_hit)
+        summary = self.collector.summary()['points']
+        self.assertEqual((summary['requests'], summary['cache_hits']), (2, 1))
+        self.assertEqual(self.collector.get_histogram('points', 'latency').count, 2)
+        self.assertEqual(self.collector.get_histogram('points', 'network_time').count, 1)
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_error_events(self):
+        with self.assertRaises(exceptions.PyChartsRequestTooLongException):
+            self.client.get_info(['TOOMANY'], ['name'])
+        self.assertEqual([event.name for event in self.events], ['request_start', 'response_received', 'error'])
+        self.assertTrue(isinstance(self.events[-1].exception, exceptions.PyChartsRequestTooLongException))
+        self.assertEqual(self.collector.summary()['info']['errors'], 1)
+
+    def test_stream_events(self):
+        with StubServer() as server:
+            self.client.BASE_URL = server.base_url
+            list(self.client.stream_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10)))
+        self.assertEqual([event.name for event in self.events], ['request_start', 'response_received', 'parse_complete'])
+        self.assertEqual(self.events[-1].endpoint, 'series')
+        self.assertEqual(self.events[-1].num_bytes, None)
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_logging_hook(self):
+        client = CompanyClient('api_key', hooks=[LoggingHook(slow_request_time=0)])
+        with self.assertLogs('pycharts', level='WARNING') as logs:
+            client.get_points(['AAPL'], ['price'])
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('points request of 1 symbols and 1 codes', logs.output[0])
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram((1, 2, 4, 8))
+        for value in (0.5, 1.5, 1.5, 3, 100):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 2)
+        self.assertEqual(histogram.percentile(99), 100)
+        self.assertEqual(histogram.max, 100)
+        self.assertEqual(Histogram((1,)).percentile(50), None)
+
+
+class JsonDecoderTestCase(TestCase):
+
+    def setUp(self):
+        self.payload = MockHttpResponse.URL_RESPONSE_INDEX[
+            'https://ycharts.com/api/v3/companies/AAPL/series/price?start_date=2016-09-10']
+        self.body = json.dumps(self.payload).encode('utf-8')
+
+    def test_json_decoder(self):
+        self.assertEqual(decoding.JsonDecoder().decode(self.body), self.payload)
+
+    @unittest.skipIf(decoding.orjson is None, 'orjson is not installed')
+    def test_orjson_decoder(self):
+        self.assertEqual(decoding.OrjsonDecoder().decode(self.body), self.payload)
+        self.assertEqual(decoding.get_json_decoder().name, 'orjson')
+
+    @unittest.skipIf(decoding.msgspec is None, 'msgspec is not installed')
+    def test_msgspec_decoders(self):
+        self.assertEqual(decoding.MsgspecDecoder().decode(self.body), self.payload)
+        typed_rsp = decoding.MsgspecDecoder(typed=True).decode(self.body)
+        self.assertEqual(typed_rsp['meta']['status'], 'ok')
+        self.assertEqual(typed_rsp['response'], self.payload['response'])
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_client_decoders(self):
+        for json_decoder in ('json', decoding.JsonDecoder()):
+            client = CompanyClient('api_key', json_decoder=json_decoder)
+            series_rsp = client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+            self.assertEqual(series_rsp, self.payload)
+
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            CompanyClient('api_key', json_decoder='yaml')
+
+    def test_gc_is_restored_after_large_bodies(self):
+        body = json.dumps({'meta': {'status': 'ok'}, 'response': ['x' * 1024] * 1024}).encode('utf-8')
+        self.assertTrue(gc.isenabled())
+        with mock.patch('gc.disable') as disable:
+            decoding.JsonDecoder().decode(body)
+            self.assertEqual(disable.call_count, 0)
+            decoding.JsonDecoder(pause_gc=True).decode(body)
+            decoding.JsonDecoder(pause_gc=True).decode(self.body)
+        self.assertEqual(disable.call_count, 1)
+        self.assertTrue(gc.isenabled())
+        # a collector disabled by the caller stays disabled
+        gc.disable()
+        try:
+            decoding.JsonDecoder(pause_gc=True).decode(body)
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+class LazyImportTestCase(TestCase):
+
+    def get_loaded_modules(self, code):
+        loaded_modules = subprocess.check_output([sys.executable, '-c', code + (
+            '\nimport sys; print(",".join(sorted(sys.modules)))')], cwd=os.path.dirname(os.path.abspath(__file__)))
+        return set(loaded_modules.decode('utf-8').strip().split(','))
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ needs python 3.7 or later')
+    def test_clients_are_imported_on_first_access(self):
+        loaded_modules = self.get_loaded_modules('import pycharts')
+        for module in ('pycharts.base', 'pycharts.aio', 'urllib.request', 'asyncio', 'concurrent.futures'):
+            self.assertNotIn(module, loaded_modules)
+
+        loaded_modules = self.get_loaded_modules('import pycharts; pycharts.CompanyClient')
+        self.assertIn('pycharts.clients', loaded_modules)
+        for module in ('pycharts.aio', 'pycharts.bulk', 'pycharts.frames', 'asyncio', 'multiprocessing', 'numpy'):
+            self.assertNotIn(module, loaded_modules)
+
+    def test_feature_modules_are_imported_on_first_use(self):
+        loaded_modules = self.get_loaded_modules('from pycharts.clients import CompanyClient')
+        for module in ('pycharts.compression', 'pycharts.decoding', 'pycharts.instrumentation',
+                'pycharts.streaming', 'pycharts.resampling', 'pycharts.results', 'pycharts.series_store',
+                'pycharts.columnar', 'orjson', 'msgspec'):
+            self.assertNotIn(module, loaded_modules)
+
+        loaded_modules = self.get_loaded_modules('from pycharts.clients import CompanyClient; '
+            'CompanyClient("api_key")')
+        self.assertIn('pycharts.decoding', loaded_modules)
+        for module in ('pycharts.streaming', 'pycharts.resampling', 'pycharts.results', 'pycharts.series_store'):
+            self.assertNotIn(module, loaded_modules)
+
+    def test_star_import_leaves_out_heavy_modules(self):
+        loaded_modules = self.get_loaded_modules('from pycharts import *')
+        self.assertIn('pycharts.clients', loaded_modules)
+        for module in ('pycharts.aio', 'pycharts.bulk', 'pycharts.frames', 'asyncio', 'pandas'):
+            self.assertNotIn(module, loaded_modules)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'module __getattr__ needs python 3.7 or later')
+    def test_lazy_attributes(self):
+        import pycharts
+        self.assertTrue(pycharts.CompanyClient is CompanyClient)
+        self.assertTrue(pycharts.frames is frames)
+        self.assertIn('AsyncCompanyClient', dir(pycharts))
+        with self.assertRaises(AttributeError):
+            pycharts.NotAClient
+
+
+class ResamplingTestCase(TestCase):
+
+    # daily series and the series the server resamples and aggregates it into
+    DAILY_DATA = [['2016-09-28', 1.0], ['2016-09-29', 2.0], ['2016-09-30', None], ['2016-10-03', 4.0],
+        ['2016-10-04', 5.0], ['2016-10-17', 6.0], ['2017-01-03', 7.0]]
+    RESAMPLED_DATA = {
+        ('weekly', 'mean', None): [['2016-10-02', 1.5], ['2016-10-09', 4.5], ['2016-10-23', 6.0],
+            ['2017-01-08', 7.0]],
+        ('weekly', 'min', None): [['2016-10-02', 1.0], ['2016-10-09', 4.0], ['2016-10-23', 6.0],
+            ['2017-01-08', 7.0]],
+        ('monthly', 'last', None): [['2016-09-30', 2.0], ['2016-10-31', 6.0], ['2017-01-31', 7.0]],
+        ('monthly', 'first', 'ffill'): [['2016-09-30', 1.0], ['2016-10-31', 4.0], ['2016-11-30', 4.0],
+            ['2016-12-31', 4.0], ['2017-01-31', 7.0]],
+        ('monthly', 'last', 'bfill'): [['2016-09-30', 2.0], ['2016-10-31', 6.0], ['2016-11-30', 7.0],
+            ['2016-12-31', 7.0], ['2017-01-31', 7.0]],
+        ('quarterly', 'sum', None): [['2016-09-30', 3.0], ['2016-12-31', 15.0], ['2017-03-31', 7.0]],
+        ('yearly', 'max', None): [['2016-12-31', 6.0], ['2017-12-31', 7.0]],
+        ('daily', 'last', 'ffill'): [['2016-09-28', 1.0], ['2016-09-29', 2.0], ['2016-09-30', 2.0],
+            ['2016-10-01', 2.0], ['2016-10-02', 2.0], ['2016-10-03', 4.0]],
+    }
+    AGGREGATED_DATA = {
+        'min': [['2016-09-28', 1.0]],
+        'max': [['2017-01-03', 7.0]],
+        'sum': [['2017-01-03', 25.0]],
+        'first': [['2016-09-28', 1.0]],
+        'last': [['2017-01-03', 7.0]],
+    }
+
+    def setUp(self):
+        MockSeriesHttpResponse.requested_urls = []
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 15)
+
+    def test_resample(self):
+        for (resample_frequency, resample_function, fill_method), data in self.RESAMPLED_DATA.items():
+            resampled_data = resampling.resample(self.DAILY_DATA, resample_frequency, resample_function, fill_method)
+            self.assertEqual(resampled_data[:len(data)], data)
+        self.assertEqual(len(resampling.resample(self.DAILY_DATA, 'weekly', 'last', 'ffill')), 15)
+        self.assertEqual(resampling.resample(self.DAILY_DATA, 'daily')[2], ['2016-09-30', None])
+        columnar_data = resampling.resample(ColumnarSeries.from_data(self.DAILY_DATA), 'monthly', 'last')
+        self.assertEqual(columnar_data.to_data(), self.RESAMPLED_DATA['monthly', 'last', None])
+
+    def test_aggregate(self):
+        for aggregate_function, data in self.AGGREGATED_DATA.items():
+            self.assertEqual(resampling.aggregate(self.DAILY_DATA, aggregate_function), data)
+        self.assertAlmostEqual(resampling.aggregate(self.DAILY_DATA, 'mean')[0][1], 25.0 / 6)
+        self.assertEqual(resampling.aggregate([['2016-09-28', None]], 'max'), [])
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            resampling.aggregate(self.DAILY_DATA, 'median')
+
+    @unittest.skipIf(importlib.util.find_spec('numpy') is None, 'numpy is not installed')
+    def test_numpy_resampling_matches(self):
+        series = ColumnarSeries.from_data(self.DAILY_DATA)
+        for resample_frequency in resampling.RESAMPLE_FREQUENCIES:
+            for resample_function in resampling.RESAMPLE_FUNCTIONS:
+                period_ends, values = resampling._resample_numpy(series, resample_frequency, resample_function)
+                expected_period_ends, expected_values = resampling._resample_arrays(series, resample_frequency,
+                    resample_function)
+                self.assertEqual(list(period_ends), list(expected_period_ends))
+                for value, expected_value in zip(values, expected_values):
+                    if math.isnan(expected_value):
+                        self.assertTrue(math.isnan(value))
+                    else:
+                        self.assertAlmostEqual(value, expected_value)
+
+    @mock.patch('pycharts.base.urlopen', mock_series_urlopen)
+    def test_views_share_one_request(self):
+        client = CompanyClient('api_key', cache=ResponseCache(), local_resampling=True)
+        series_rsp = client.get_series(['AAPL'], ['price'], resample_frequency='weekly', resample_function='mean')
+        self.assertEqual(series_rsp['response']['AAPL']['results']['price']['data'],
+            [['2016-09-04', 2.5], ['2016-09-11', 8.0], ['2016-09-18', 13.5]])
+        series_rsp = client.get_series(['AAPL'], ['price'], resample_frequency='monthly')
+        self.assertEqual(series_rsp['response']['AAPL']['results']['price']['data'], [['2016-09-30', 15.0]])
+        series_rsp = client.get_series(['AAPL'], ['price'], aggregate_function='max')
+        self.assertEqual(series_rsp['response']['AAPL']['results']['price']['data'], [['2016-09-15', 15.0]])
+        self.assertEqual(MockSeriesHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies/AAPL/series/price'])
+
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            client.get_series(['AAPL'], ['price'], resample_frequency='hourly')
+
+
+class ResponseCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.client = CompanyClient('api_key', cache=self.cache)
+        MockBatchHttpResponse.requested_urls = []
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_cached_point_request(self):
+        point_rsp = self.client.get_points(['AAPL', 'MSFT'], ['price', 'pe_ratio'])
+        cached_point_rsp = self.client.get_points(['MSFT', 'AAPL'], ['pe_ratio', 'price'])
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 1)
+        self.assertEqual(point_rsp, cached_point_rsp)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        # other params are cached separately
+        self.client.get_points(['AAPL', 'MSFT'], ['price', 'pe_ratio'], query_date=-1)
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 2)
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_responses_are_cached_per_api_key(self):
+        other_client = CompanyClient('other_api_key', cache=self.cache)
+        self.client.get_points(['AAPL'], ['price'])
+        other_client.get_points(['AAPL'], ['price'])
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 2)
+        self.assertEqual(len(self.cache), 2)
+
+    @mock.patch('pycharts.base.urlopen', mock_urlopen)
+    def test_error_responses_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(exceptions.PyChartsRequestTooLongException):
+                self.client.get_info(['TOOMANY'], ['name'])
+        self.assertEqual(len(self.cache), 0)
+
+    @mock.patch('pycharts.base.urlopen', mock_batch_urlopen)
+    def test_cached_responses_expire(self):
+        self.cache.ttls['points'] = 60
+        with mock.patch('pycharts.cache.time.monotonic', return_value=1000):
+            self.client.get_points(['AAPL'], ['price'])
+        with mock.patch('pycharts.cache.time.monotonic', return_value=1059):
+            self.client.get_points(['AAPL'], ['price'])
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 1)
+        with mock.patch('pycharts.cache.time.monotonic', return_value=1060):
+            self.client.get_points(['AAPL'], ['price'])
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 2)
+
+    def test_least_recently_used_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', b'1', 'info')
+        cache.set('b', b'2', 'info')
+        cache.get('a')
+        cache.set('c', b'3', 'info')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), b'1')
+        self.assertEqual(cache.get('c'), b'3')
+        self.assertEqual(cache.evictions, 1)
+
+    def test_size_bounded_eviction(self):
+        cache = ResponseCache(max_bytes=20)
+        cache.set('a', b'123456789', 'info')
+        cache.set('b', b'123456789', 'info')
+        self.assertEqual(len(cache), 2)
+        cache.set('c', b'123456789', 'info')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.num_bytes, 20)
+        self.assertEqual(cache.get('a'), None)
+        # responses bigger than the cache are never stored
+        cache.set('d', b'x' * 100, 'info')
+        self.assertEqual(cache.get('d'), None)
+
+
+@mock.patch('pycharts.base.urlopen', mock_series_urlopen)
+class SeriesStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = CompanyClient('api_key', series_store=SeriesStore(self.directory.name))
+        MockSeriesHttpResponse.requested_urls = []
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 15)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_series_data(self, series_rsp, security_symbol='AAPL', calculation_code='price'):
+        return series_rsp['response'][security_symbol]['results'][calculation_code]['data']
+
+    def test_only_the_tail_is_fetched(self):
+        series_rsp = self.client.get_series(['AAPL', 'MSFT'], ['price'])
+        self.assertEqual(len(self.get_series_data(series_rsp)), 15)
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 16)
+        series_rsp = self.client.get_series(['AAPL', 'MSFT'], ['price'])
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/AAPL,MSFT/series/price?start_date=2016-09-15')
+        for security_symbol in ('AAPL', 'MSFT'):
+            data = self.get_series_data(series_rsp, security_symbol)
+            self.assertEqual(len(data), 16)
+            self.assertEqual(data[0], ['2016-09-01', 1.0])
+            self.assertEqual(data[-1], ['2016-09-16', 16.0])
+
+    def test_series_without_data_are_topped_up(self):
+        self.client.get_series(['AAPL', 'NODATA'], ['price'])
+        with mock.patch('pycharts.base._get_today', return_value='2016-09-15'):
+            series_rsp = self.client.get_series(['AAPL', 'NODATA'], ['price'])
+        # the empty series does not make the whole history be fetched again
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/AAPL,NODATA/series/price?start_date=2016-09-15')
+        self.assertEqual(len(self.get_series_data(series_rsp)), 15)
+        self.assertEqual(self.get_series_data(series_rsp, 'NODATA'), [])
+        self.client.get_series(['NODATA'], ['price'])
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/NODATA/series/price?start_date=2016-09-15')
+
+    def test_stored_range_is_sliced(self):
+        self.client.get_series(['AAPL'], ['price'])
+        series_rsp = self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        data = self.get_series_data(series_rsp)
+        self.assertEqual(data[0], ['2016-09-10', 10.0])
+        self.assertEqual(data[-1], ['2016-09-15', 15.0])
+
+    def test_past_range_is_not_fetched(self):
+        self.client.get_series(['AAPL'], ['price'])
+        series_rsp = self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 2),
+            query_end_date=datetime.datetime(2016, 9, 5))
+        self.assertEqual(len(MockSeriesHttpResponse.requested_urls), 1)
+        self.assertEqual(self.get_series_data(series_rsp),
+            [['2016-09-02', 2.0], ['2016-09-03', 3.0], ['2016-09-04', 4.0], ['2016-09-05', 5.0]])
+
+    def test_uncovered_series_are_fetched_in_full(self):
+        self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        # the stored series starts after the requested start date
+        series_rsp = self.client.get_series(['AAPL'], ['price'])
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/AAPL/series/price')
+        self.assertEqual(len(self.get_series_data(series_rsp)), 15)
+        # resampled series are stored separately
+        self.client.get_series(['AAPL'], ['price'], resample_frequency='weekly')
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/AAPL/series/price?resample_frequency=weekly')
+
+
+def mock_point_in_time_urlopen(request):
+    if '/series/' in request.get_full_url():
+        return MockSeriesHttpResponse(request)
+    return MockBatchHttpResponse(request)
+
+
+class AdjustmentTestCase(TestCase):
+
+    def setUp(self):
+        MockSeriesHttpResponse.requested_urls = []
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 15)
+        MockEventsHttpResponse.requested_urls = []
+        MockEventsHttpResponse.events = {
+            'dividends': [{'ex_date': '2016-09-13', 'dividend_amount': 1.2, 'dividend_type': 'normal'}],
+            'splits': [{'day': '2016-09-10', 'ratio': 2.0, 'status': 'executed'},
+                {'day': '2016-09-14', 'ratio': 3.0, 'status': 'announced'}],
+        }
+
+    def test_factors(self):
+        series = adjustment.AdjustedSeries.from_data([['2016-09-01', 10.0], ['2016-09-02', None],
+            ['2016-09-05', 12.0], ['2016-09-06', 6.0]])
+        series.apply_events(adjustment._parse_events('split', [{'day': '2016-09-05', 'ratio': 2.0}]) +
+            adjustment._parse_events('dividend', [{'ex_date': '2016-09-05', 'dividend_amount': 2.0},
+                {'ex_date': '2016-09-07', 'dividend_amount': 1.0}]))
+        # the dividend goes ex after a missing value, and the last one after the last date
+        self.assertEqual(list(series.factors), [0.4, 0.4, 1.0, 1.0])
+        self.assertEqual(len(series.events), 2)
+        adjusted_data = series.to_adjusted().to_data()
+        self.assertEqual(adjusted_data[0], ['2016-09-01', 4.0])
+        self.assertEqual(adjusted_data[1], ['2016-09-02', None])
+
+    @mock.patch('pycharts.base.urlopen', mock_adjustment_urlopen)
+    def test_series_are_updated_incrementally(self):
+        engine = adjustment.AdjustmentEngine(CompanyClient('api_key'))
+        series = engine.get_adjusted_series(['AAPL', 'MSFT'])['AAPL']
+        self.assertEqual(list(series.factors), [0.45] * 9 + [0.9] * 3 + [1.0] * 3)
+        self.assertEqual(series.adjusted_values[8], 9.0 * 0.45)
+        self.assertEqual(len(MockEventsHttpResponse.requested_urls), 2)
+
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 16)
+        MockEventsHttpResponse.events['splits'].append({'day': '2016-09-16', 'ratio': 4.0, 'status': 'executed'})
+        series = engine.get_adjusted_series(['AAPL'])['AAPL']
+        self.assertEqual(MockSeriesHttpResponse.requested_urls[-1],
+            'https://ycharts.com/api/v3/companies/AAPL/series/price?start_date=2016-09-15')
+        self.assertEqual(sorted(MockEventsHttpResponse.requested_urls[2:]), [
+            'https://ycharts.com/api/v3/companies/AAPL/dividends?start_date=2016-09-15',
+            'https://ycharts.com/api/v3/companies/AAPL/splits?start_date=2016-09-15'])
+        self.assertEqual(len(series), 16)
+        self.assertEqual(list(series.factors), [0.1125] * 9 + [0.225] * 3 + [0.25] * 3 + [1.0])
+
+    def test_series_need_dividends(self):
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            adjustment.AdjustmentEngine(IndicatorClient('api_key'))
+
+
+class PointInTimeStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.store = PointInTimeStore()
+        MockSeriesHttpResponse.requested_urls = []
+        MockBatchHttpResponse.requested_urls = []
+
+    def test_as_of_queries_within_fetched_range(self):
+        self.store.ingest_series('companies', 'AAPL', 'price', [['2016-09-02', 2.0], ['2016-09-06', 6.0],
+            ['2016-09-07', None]], start_date='2016-09-01', end_date='2016-09-10')
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 5)),
+            ['2016-09-02', 2.0])
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 10)),
+            ['2016-09-07', None])
+        # no value on or after the start of the range, or past its end
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 1)), None)
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 11)), None)
+        # only open ended series answer latest queries
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price'), None)
+        self.assertEqual(self.store.get_point('companies', 'MSFT', 'price', datetime.datetime(2016, 9, 5)), None)
+        self.assertEqual((self.store.hits, self.store.misses), (2, 4))
+
+    def test_ranges_are_merged(self):
+        self.store.ingest_point('companies', 'AAPL', 'price', ['2016-09-02', 2.0], datetime.datetime(2016, 9, 4))
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 3)),
+            ['2016-09-02', 2.0])
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 6)), None)
+        self.store.ingest_series('companies', 'AAPL', 'price', [['2016-09-06', 6.0]], start_date='2016-09-05',
+            end_date='2016-09-08')
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 5)),
+            ['2016-09-02', 2.0])
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 8)),
+            ['2016-09-06', 6.0])
+        # a point dated after the queried date says nothing about the range
+        self.store.ingest_point('companies', 'AAPL', 'price', ['2016-09-20', 20.0], datetime.datetime(2016, 9, 10))
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 10)), None)
+
+    def test_latest_queries_expire(self):
+        data = [['2016-09-01', 1.0], ['2016-09-02', 2.0], ['2016-09-05', 5.0]]
+        self.store.ingest_series('companies', 'AAPL', 'price', ColumnarSeries.from_data(data))
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price'), ['2016-09-05', 5.0])
+        # relative periods are left to the server
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', -1), None)
+        self.store.latest_ttl = 0
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price'), None)
+        self.assertEqual(self.store.get_point('companies', 'AAPL', 'price', datetime.datetime(2016, 9, 4)),
+            ['2016-09-02', 2.0])
+
+    @mock.patch('pycharts.base.urlopen', mock_point_in_time_urlopen)
+    def test_client_points_are_answered_from_the_store(self):
+        client = CompanyClient('api_key', point_in_time_store=self.store)
+        client.get_series(['AAPL', 'MSFT'], ['price'], query_start_date=datetime.datetime(2016, 9, 1),
+            query_end_date=datetime.datetime(2016, 9, 30))
+        points_rsp = client.get_points(['AAPL', 'MSFT'], ['price'], datetime.datetime(2016, 9, 20))
+        self.assertEqual(MockBatchHttpResponse.requested_urls, [])
+        self.assertEqual(points_rsp['response']['MSFT']['results']['price']['data'], ['2016-09-15', 15.0])
+
+        # only the codes missing from the store are fetched
+        points_rsp = client.get_points(['AAPL', 'MSFT'], ['price', 'pe_ratio'], datetime.datetime(2016, 9, 20))
+        self.assertEqual(MockBatchHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies/AAPL,MSFT/points/pe_ratio?date=2016-09-20'])
+        self.assertEqual(points_rsp['response']['AAPL']['results']['price']['data'], ['2016-09-15', 15.0])
+        self.assertEqual(points_rsp['response']['AAPL']['results']['pe_ratio']['data'], ['2016-09-15', 1.0])
+
+        # fetched points are added to the store
+        client.get_points(['AAPL'], ['pe_ratio'], datetime.datetime(2016, 9, 18))
+        self.assertEqual(len(MockBatchHttpResponse.requested_urls), 1)
+
+        client.compact_results = True
+        points = client.get_points(['AAPL'], ['price'], datetime.datetime(2016, 9, 10))
+        self.assertEqual(points.get('AAPL', 'price'), Point(datetime.date(2016, 9, 10), 10.0))
+
+    @mock.patch('pycharts.base.urlopen', mock_point_in_time_urlopen)
+    def test_client_relative_points_are_fetched(self):
+        self.store.ingest_series('companies', 'AAPL', 'price', [['2016-09-01', 1.0], ['2016-09-02', 2.0]])
+        client = CompanyClient('api_key', point_in_time_store=self.store)
+        client.get_points(['AAPL'], ['price'])
+        self.assertEqual(MockBatchHttpResponse.requested_urls, [])
+        client.get_points(['AAPL'], ['price'], -1)
+        self.assertEqual(MockBatchHttpResponse.requested_urls,
+            ['https://ycharts.com/api/v3/companies/AAPL/points/price?date=-1'])
+
+
+class BulkJobTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        MockSeriesHttpResponse.requested_urls = []
+        SeriesRequestHandler.failing_symbols = set()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_shard(self, shard_index):
+        with open(get_shard_path(self.directory.name, shard_index, 'csv'), newline='') as shard_file:
+            return list(csv.reader(shard_file))[1:]
+
+    def test_failed_shards_are_resumed(self):
+        with StubServer(SeriesRequestHandler) as server:
+            job = BulkJob.from_spec({'security_type': 'companies', 'security_symbols': ['AAPL', 'MSFT', 'IBM'],
+                'calculation_codes': ['price', 'pe_ratio'], 'query_start_date': '2016-09-11', 'shard_size': 2,
+                'base_url': server.base_url})
+            SeriesRequestHandler.failing_symbols = {'IBM'}
+            with self.assertLogs('pycharts', level='INFO') as logs:
+                result = run_bulk_job(job, 'api_key', self.directory.name, processes=2)
+            self.assertTrue(any('Shard 1 of 2 failed' in message for message in logs.output))
+            self.assertEqual((result['num_shards'], result['exported'], sorted(result['failed'])), (2, [0], [1]))
+            self.assertEqual(result['num_rows'], 2 * 2 * 5)
+            self.assertEqual(self.read_shard(0)[0], ['AAPL', 'price', '2016-09-11', '11.0'])
+            self.assertFalse(os.path.exists(get_shard_path(self.directory.name, 1, 'csv')))
+
+            # only the failed shard is exported again
+            SeriesRequestHandler.failing_symbols = set()
+            num_requests = len(MockSeriesHttpResponse.requested_urls)
+            result = run_bulk_job(job, 'api_key', self.directory.name, processes=2)
+            self.assertEqual((result['exported'], result['skipped'], result['failed']), ([1], [0], {}))
+            self.assertEqual(MockSeriesHttpResponse.requested_urls[num_requests:],
+                ['https://ycharts.com/api/v3/companies/IBM/series/price,pe_ratio?start_date=2016-09-11'])
+            self.assertEqual(len(self.read_shard(1)), 10)
+
+    def test_invalid_jobs(self):
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            BulkJob.from_spec({'security_type': 'bonds', 'security_symbols': ['AAPL'], 'calculation_codes': ['price']})
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            BulkJob.from_spec({'security_type': 'companies', 'calculation_codes': ['price']})
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            BulkJob.from_spec({'security_type': 'companies', 'security_symbols': ['AAPL'], 'codes': ['price']})
+
+        job = BulkJob('companies', ['price'], ['AAPL'])
+        with mock.patch('pycharts.bulk.BulkJob.build_shards', return_value=[]):
+            run_bulk_job(job, 'api_key', self.directory.name)
+            # the directory is bound to the job it was first run with
+            with self.assertRaises(exceptions.PyChartsRequestException):
+                run_bulk_job(BulkJob('companies', ['pe_ratio'], ['AAPL']), 'api_key', self.directory.name)
+
+
+class StreamingTestCase(TestCase):
+
+    def build_client(self, server):
+        client = CompanyClient('api_key')
+        client.BASE_URL = server.base_url
+        return client
+
+    def test_streamed_series_request(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            results = list(client.stream_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10)))
+
+        self.assertEqual(len(results), 1)
+        security_symbol, calculation_code, calculation_data = results[0]
+        self.assertEqual(security_symbol, 'AAPL')
+        self.assertEqual(calculation_code, 'price')
+        self.assertEqual(calculation_data['meta']['status'], 'ok')
+        self.assertEqual(calculation_data['data'], [['2016-09-12', 105.44], ['2016-09-13', 107.95],
+            ['2016-09-14', 111.77], ['2016-09-15', 115.39]])
+
+    def test_streamed_securities_request(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            securities = list(client.stream_securities())
+
+        self.assertEqual(securities, [{'name': 'Apple', 'symbol': 'AAPL'}, {'name': 'Microsoft', 'symbol': 'MSFT'}])
+
+    def test_streamed_payload_errors(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            with self.assertRaises(exceptions.PyChartsRequestTooLongException):
+                list(client.stream_series(['TOOMANY'], ['price']))
+            with self.assertRaises(exceptions.PyChartsRequestUrlNotFoundException):
+                list(client.stream_series(['MISSING'], ['price']))
+
+    def test_json_items_across_chunks(self):
+        document = {
+            'response': {
+                'M:FCNTX': {
+                    'meta': {'status': 'ok'},
+                    'results': {
+                        'net_asset_value': {'meta': {'status': 'ok'}, 'data': [['2016-09-12', None], ['2016-09-13', 1e3]]},
+                        'name': {'meta': {'status': 'ok'}, 'data': 'Fidelity\u00ae \\ "Contrafund" [{}]'},
+                    },
+                },
+            },
+            'meta': {'status': 'ok'},
+        }
+        payload = json.dumps(document, ensure_ascii=False, indent=2).encode('utf-8')
+        for chunk_size in (1, 3, 16, 1024):
+            items = list(iter_json_items(BytesIO(payload), [('response', '*', 'results')], chunk_size))
+            self.assertEqual(items, [
+                (('response',), document['response']),
+                (('meta',), document['meta']),
+            ])
+            items = list(iter_json_items(BytesIO(payload), CompanyClient.SERIES_STREAM_PATHS, chunk_size))
+            self.assertEqual(items, [
+                (('response', 'M:FCNTX', 'meta'), {'status': 'ok'}),
+                (('response', 'M:FCNTX', 'results', 'net_asset_value'), document['response']['M:FCNTX']['results']['net_asset_value']),
+                (('response', 'M:FCNTX', 'results', 'name'), document['response']['M:FCNTX']['results']['name']),
+                (('meta',), document['meta']),
+            ])
+
+
+@mock.patch('pycharts.base.urlopen', mock_series_urlopen)
+class SeriesWindowTestCase(TestCase):
+
+    def setUp(self):
+        self.client = CompanyClient('api_key', series_window=datetime.timedelta(days=5))
+        MockSeriesHttpResponse.requested_urls = []
+        MockSeriesHttpResponse.last_date = datetime.date(2016, 9, 15)
+
+    def test_series_is_split_into_windows(self):
+        series_rsp = self.client.get_series(['AAPL', 'MSFT'], ['price', 'pe_ratio'],
+            query_start_date=datetime.datetime(2016, 9, 1), query_end_date=datetime.datetime(2016, 9, 15))
+        self.assertEqual(sorted(MockSeriesHttpResponse.requested_urls), [
+            'https://ycharts.com/api/v3/companies/AAPL,MSFT/series/price,pe_ratio?start_date=2016-09-01&end_date=2016-09-06',
+            'https://ycharts.com/api/v3/companies/AAPL,MSFT/series/price,pe_ratio?start_date=2016-09-06&end_date=2016-09-11',
+            'https://ycharts.com/api/v3/companies/AAPL,MSFT/series/price,pe_ratio?start_date=2016-09-11&end_date=2016-09-15',
+        ])
+        expected_data = [['2016-09-{0:02d}'.format(day), float(day)] for day in range(1, 16)]
+        for security_symbol in ('AAPL', 'MSFT'):
+            for calculation_code in ('price', 'pe_ratio'):
+                calculation_data = series_rsp['response'][security_symbol]['results'][calculation_code]
+                self.assertEqual(calculation_data['data'], expected_data)
+
+    def test_non_positive_windows_are_rejected(self):
+        for series_window in (datetime.timedelta(0), datetime.timedelta(days=-5)):
+            with self.assertRaises(exceptions.PyChartsRequestException):
+                CompanyClient('api_key', series_window=series_window)
+
+    def test_errors_of_later_windows_are_kept(self):
+        def mock_window_urlopen(request):
+            series_rsp = json.loads(MockSeriesHttpResponse(request).read().decode('utf-8'))
+            if 'start_date=2016-09-06' in request.get_full_url():
+                series_rsp['response']['AAPL']['results']['pe_ratio'] = {'meta': {'status': 'error',
+                    'error_code': 500, 'error_message': 'Server error'}}
+                series_rsp['response']['MSFT'] = {'meta': {'status': 'error', 'error_code': 500,
+                    'error_message': 'Server error'}}
+            return mock.Mock(headers={}, read=mock.Mock(return_value=json.dumps(series_rsp).encode('utf-8')))
+
+        with mock.patch('pycharts.base.urlopen', mock_window_urlopen):
+            series_rsp = self.client.get_series(['AAPL', 'MSFT'], ['price', 'pe_ratio'],
+                query_start_date=datetime.datetime(2016, 9, 1), query_end_date=datetime.datetime(2016, 9, 15))
+        aapl_results = series_rsp['response']['AAPL']['results']
+        self.assertEqual(len(aapl_results['price']['data']), 15)
+        self.assertEqual(aapl_results['pe_ratio']['meta']['status'], 'error')
+        self.assertEqual(series_rsp['response']['MSFT']['meta']['status'], 'error')
+
+    def test_short_and_resampled_series_are_not_split(self):
+        self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 12),
+            query_end_date=datetime.datetime(2016, 9, 15))
+        self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 1),
+            query_end_date=datetime.datetime(2016, 9, 15), resample_frequency='weekly')
+        self.client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 1),
+            query_end_date=datetime.datetime(2016, 9, 15), fill_method='ffill')
+        self.assertEqual(len(MockSeriesHttpResponse.requested_urls), 3)
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export_series(self, format):
+        path = os.path.join(self.directory.name, 'series.{0}'.format(format))
+        with StubServer() as server:
+            client = CompanyClient('api_key')
+            client.BASE_URL = server.base_url
+            num_rows = client.export_series(['AAPL'], ['price'], path, format=format,
+                query_start_date=datetime.datetime(2016, 9, 10))
+        return path, num_rows
+
+    def test_csv_export(self):
+        path, num_rows = self.export_series('csv')
+        self.assertEqual(num_rows, 4)
+        with open(path) as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows, [
+            ['symbol', 'code', 'date', 'value'],
+            ['AAPL', 'price', '2016-09-12', '105.44'],
+            ['AAPL', 'price', '2016-09-13', '107.95'],
+            ['AAPL', 'price', '2016-09-14', '111.77'],
+            ['AAPL', 'price', '2016-09-15', '115.39'],
+        ])
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_parquet_export(self):
+        import pyarrow.parquet
+        path, num_rows = self.export_series('parquet')
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('value').to_pylist(), [105.44, 107.95, 111.77, 115.39])
+
+    def test_invalid_export_format(self):
+        client = CompanyClient('api_key')
+        with self.assertRaises(exceptions.PyChartsRequestException):
+            client.export_series(['AAPL'], ['price'], os.path.join(self.directory.name, 'series.xls'), format='xls')
+
+
+class CompressionTestCase(TestCase):
+
+    def setUp(self):
+        self.payload = MockHttpResponse.URL_RESPONSE_INDEX[
+            'https://ycharts.com/api/v3/companies/AAPL/series/price?start_date=2016-09-10']
+
+    def build_client(self, server, **kwargs):
+        client = CompanyClient('api_key', **kwargs)
+        client.BASE_URL = server.base_url
+        return client
+
+    def test_compressed_responses(self):
+        with StubServer(CompressingRequestHandler) as server:
+            pooled_connections = ConnectionPool()
+            self.addCleanup(pooled_connections.close)
+            for connection_pool in (None, pooled_connections):
+                client = self.build_client(server, connection_pool=connection_pool)
+                series_rsp = client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+                self.assertEqual(series_rsp, self.payload)
+                self.assertEqual(client.transfer_stats.responses, 1)
+                self.assertEqual(client.transfer_stats.raw_bytes, len(json.dumps(self.payload)))
+                self.assertNotEqual(client.transfer_stats.compressed_bytes, client.transfer_stats.raw_bytes)
+
+    def test_compressed_stream(self):
+        with StubServer(CompressingRequestHandler) as server:
+            client = self.build_client(server)
+            results = list(client.stream_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10)))
+        self.assertEqual(results[0][2], self.payload['response']['AAPL']['results']['price'])
+        self.assertEqual(client.transfer_stats.responses, 1)
+
+    def test_stream_with_unsupported_encoding_is_closed(self):
+        response = mock.Mock(headers={'Content-Encoding': 'compress'})
+        with mock.patch('pycharts.base.urlopen', return_value=response):
+            with self.assertRaises(ValueError):
+                list(CompanyClient('api_key').stream_series(['AAPL'], ['price']))
+        response.close.assert_called_once_with()
+
+    def test_uncompressed_responses(self):
+        with StubServer(CompressingRequestHandler) as server:
+            client = self.build_client(server, compression=False)
+            client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10))
+        self.assertEqual(client.transfer_stats.compression_ratio, 1.0)
+
+    def test_raw_deflate_stream(self):
+        body = json.dumps(self.payload).encode('utf-8')
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        compressed_body = compressor.compress(body) + compressor.flush()
+        transfer_stats = TransferStats()
+        reader = DecompressingReader(BytesIO(compressed_body), 'deflate', transfer_stats, chunk_size=16)
+        chunks = []
+        while True:
+            chunk = reader.read(10)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks), body)
+        self.assertEqual((transfer_stats.compressed_bytes, transfer_stats.raw_bytes), (len(compressed_body), len(body)))
+
+
+class ConnectionPoolTestCase(TestCase):
+
+    def build_client(self, server, connection_pool):
+        client = CompanyClient('api_key', connection_pool=connection_pool)
+        client.BASE_URL = server.base_url
+        return client
+
+    def test_connections_are_reused(self):
+        with StubServer() as server:
+            connection_pool = ConnectionPool(max_connections=2)
+            client = self.build_client(server, connection_pool)
+            for _ in range(5):
+                point_rsp = client.get_points(['AAPL'], ['price'])
+                self.assertEqual(point_rsp['response']['AAPL']['results']['price']['data'], ['2016-09-15', 115.39])
+            info_rsp = client.get_info(['AAPL'], ['name'])
+            self.assertEqual(info_rsp['response']['AAPL']['results']['name']['data'], 'Apple')
+            connection_pool.close()
+
+        self.assertEqual(connection_pool.connections_opened, 1)
+        self.assertEqual(server.connections_opened, 1)
+
+    def test_concurrent_requests_are_bounded(self):
+        with StubServer() as server:
+            connection_pool = ConnectionPool(max_connections=2)
+            client = self.build_client(server, connection_pool)
+            threads = [threading.Thread(target=client.get_points, args=(['AAPL'], ['price'])) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            connection_pool.close()
+
+        self.assertTrue(server.connections_opened <= 2)
+
+    def test_idle_connections_expire(self):
+        with StubServer() as server:
+            connection_pool = ConnectionPool(idle_timeout=0)
+            client = self.build_client(server, connection_pool)
+            for _ in range(3):
+                client.get_info(['AAPL'], ['name'])
+            connection_pool.close()
+
+        self.assertEqual(server.connections_opened, 3)
+
+    def test_http_errors_are_mapped(self):
+        with StubServer() as server:
+            connection_pool = ConnectionPool()
+            client = self.build_client(server, connection_pool)
+            with self.assertRaises(exceptions.PyChartsRequestUrlNotFoundException):
+                client.get_info(['MISSING'], ['name'])
+            # the connection is still usable after an error response
+            client.get_info(['AAPL'], ['name'])
+            connection_pool.close()
+
+        self.assertEqual(server.connections_opened, 1)
+
+
+class ThrottleTestCase(TestCase):
+
+    def build_client(self, server, throttle):
+        client = CompanyClient('api_key', throttle=throttle)
+        client.BASE_URL = server.base_url
+        return client
+
+    def test_throttled_requests_are_retried(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        throttle = Throttle(concurrency_limiter=concurrency_limiter, max_retries=3)
+        with StubServer(ThrottlingRequestHandler) as server:
+            server.throttled_requests = 2
+            client = self.build_client(server, throttle)
+            info_rsp = client.get_info(['AAPL'], ['name'])
+
+        self.assertEqual(info_rsp['response']['AAPL']['results']['name']['data'], 'Apple')
+        self.assertEqual(server.requests, 3)
+        self.assertEqual(throttle.retries, 2)
+        # cut in half twice, then raised by one success
+        self.assertEqual(concurrency_limiter.limit, 2.5)
+
+    def test_retries_are_bounded(self):
+        throttle = Throttle(max_retries=1)
+        with StubServer(ThrottlingRequestHandler) as server:
+            server.throttled_requests = 5
+            client = self.build_client(server, throttle)
+            with self.assertRaises(HTTPError) as cm:
+                client.get_info(['AAPL'], ['name'])
+
+        self.assertEqual(cm.exception.code, 429)
+        self.assertEqual(server.requests, 2)
+
+    def test_client_errors_are_not_retried(self):
+        throttle = Throttle()
+        with StubServer(ThrottlingRequestHandler) as server:
+            client = self.build_client(server, throttle)
+            with self.assertRaises(exceptions.PyChartsRequestUrlNotFoundException):
+                client.get_info(['MISSING'], ['name'])
+
+        self.assertEqual(server.requests, 1)
+
+    def test_retry_delays(self):
+        throttle = Throttle(backoff_base=1, backoff_max=10)
+        self.assertEqual(throttle.get_retry_delay(0, '3'), 3)
+        self.assertEqual(throttle.get_retry_delay(0, '120'), 10)
+        for attempt in range(6):
+            self.assertTrue(0 <= throttle.get_retry_delay(attempt) <= min(10, 2 ** attempt))
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started_at = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        # the first token is there already, the next four take 20ms each
+        self.assertTrue(time.monotonic() - started_at >= 0.075)
+        self.assertTrue(TokenBucket.for_api_key('shared_key', 10) is TokenBucket.for_api_key('shared_key', 20))
+
+
+@unittest.skipIf(aio is None, 'asyncio clients need python 3.5 or later')
+class AsyncClientTestCase(TestCase):
+    # queries are run without async syntax, so that this file still parses on python 3.4
+
+    def run_async(self, client, *awaitables):
+        """
+        Returns:
+            the results of the awaitables, run on a new event loop.
+        """
+        return self.run_on_loop(client, lambda loop: loop.run_until_complete(asyncio.gather(*awaitables)))
+
+    def iterate_async(self, client, async_iterator):
+        """
+        Returns:
+            list of the items of an async iterator, run on a new event loop.
+        """
+        def iterate(loop):
+            items = []
+            while True:
+                try:
+                    items.append(loop.run_until_complete(async_iterator.__anext__()))
+                except StopAsyncIteration:
+                    return items
+
+        return self.run_on_loop(client, iterate)
+
+    def run_on_loop(self, client, run):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return run(loop)
+        finally:
+            loop.run_until_complete(client.close())
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def build_client(self, server, **kwargs):
+        client = aio.AsyncCompanyClient('api_key', **kwargs)
+        client.BASE_URL = server.base_url
+        return client
+
+    def test_compressed_async_requests(self):
+        with StubServer(CompressingRequestHandler) as server:
+            client = self.build_client(server)
+            series_rsp, = self.run_async(client,
+                client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10)))
+        self.assertEqual(series_rsp['response']['AAPL']['results']['price']['data'][0], ['2016-09-12', 105.44])
+        self.assertTrue(client.transfer_stats.compressed_bytes < client.transfer_stats.raw_bytes)
+
+    def test_successful_async_requests(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            responses = self.run_async(client,
+                client.get_points(['AAPL'], ['price']),
+                client.get_series(['AAPL'], ['price'], query_start_date=datetime.datetime(2016, 9, 10)),
+                client.get_info(['AAPL'], ['name']),
+                client.get_securities(),
+                client.get_dividends('AAPL', ex_start_date=datetime.datetime(2015, 1, 1)),
+                client.get_stock_splits('AAPL', split_end_date=datetime.datetime(2014, 1, 1)),
+                client.get_stock_spinoffs('GGP', spinoff_end_date=datetime.datetime(2014, 1, 1)),
+            )
+
+        point_rsp, series_rsp, info_rsp, securities_rsp, dividend_rsp, split_rsp, spinoff_rsp = responses
+        self.assertEqual(point_rsp['response']['AAPL']['results']['price']['data'], ['2016-09-15', 115.39])
+        self.assertEqual(len(series_rsp['response']['AAPL']['results']['price']['data']), 4)
+        self.assertEqual(info_rsp['response']['AAPL']['results']['name']['data'], 'Apple')
+        self.assertEqual(securities_rsp['meta']['pagination_info']['num_items'], 2)
+        self.assertEqual(dividend_rsp['response']['AAPL']['results'][0]['dividend_amount'], 0.47)
+        self.assertEqual(split_rsp['response']['AAPL']['results'][0]['ratio'], 2.0)
+        self.assertEqual(spinoff_rsp['response']['GGP']['results'][0]['child_company_symbol'], 'NYU')
+
+    def test_async_iter_securities(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            securities = self.iterate_async(client, client.iter_securities())
+
+        self.assertEqual([security['symbol'] for security in securities], ['AAPL', 'MSFT'])
+
+    def test_async_iter_securities_prefetches_pages(self):
+        MockPagedHttpResponse.requested_urls = []
+        with StubServer(PagedRequestHandler) as server:
+            client = self.build_client(server)
+            securities = self.iterate_async(client, client.iter_securities(prefetch_pages=2))
+        self.assertEqual([security['symbol'] for security in securities], ['SYM{0}'.format(i) for i in range(1, 11)])
+        self.assertEqual(len(MockPagedHttpResponse.requested_urls), 5)
+
+        MockPagedHttpResponse.requested_urls = []
+        with StubServer(PagedRequestHandler) as server:
+            client = self.build_client(server)
+            securities = client.iter_securities(prefetch_pages=1)
+
+            def stop_early(loop):
+                first_securities = [loop.run_until_complete(securities.__anext__()) for _ in range(3)]
+                loop.run_until_complete(securities.aclose())
+                return first_securities
+
+            first_securities = self.run_on_loop(client, stop_early)
+        self.assertEqual([security['symbol'] for security in first_securities], ['SYM1', 'SYM2', 'SYM3'])
+        # the first page and the page being consumed, with no page fetched ahead of it
+        self.assertEqual(len(MockPagedHttpResponse.requested_urls), 2)
+
+    def test_async_rejected_multi_filter_securities_request(self):
+        MockFilterHttpResponse.requested_urls = []
+        with StubServer(FilterRequestHandler) as server:
+            client = self.build_client(server)
+            securities_rsp, = self.run_async(client,
+                client.get_securities(exchange='NYSE', is_reit='true', sector='Real Estate'))
+        self.assertEqual([security['symbol'] for security in securities_rsp['response']], ['O', 'WELL'])
+        self.assertEqual(securities_rsp['meta']['pagination_info']['num_items'], 2)
+        # one scan per filter
+        self.assertEqual(len(MockFilterHttpResponse.requested_urls), 3)
+
+    def test_async_concurrency_is_bounded(self):
+        with StubServer() as server:
+            connection_pool = aio.AsyncConnectionPool(max_connections=2)
+            client = self.build_client(server, connection_pool=connection_pool)
+            responses = self.run_async(client, *[client.get_info(['AAPL'], ['name']) for _ in range(10)])
+
+        self.assertEqual(len(responses), 10)
+        self.assertEqual(connection_pool.connections_opened, 2)
+        self.assertEqual(server.connections_opened, 2)
+
+    def test_streaming_methods_are_not_available(self):
+        client = aio.AsyncCompanyClient('api_key')
+        for method_name in ('stream_securities', 'stream_series', 'export_series'):
+            self.assertFalse(hasattr(client, method_name))
+            self.assertNotIn(method_name, dir(client))
+        with self.assertRaises(AttributeError):
+            aio.AsyncIndicatorClient('api_key').stream_series(['USGDP'])
+
+    def test_async_errors_are_mapped(self):
+        with StubServer() as server:
+            client = self.build_client(server)
+            with self.assertRaises(exceptions.PyChartsRequestUrlNotFoundException):
+                self.run_async(client, client.get_info(['MISSING'], ['name']))
+            with self.assertRaises(exceptions.PyChartsRequestTooLongException):
+                self.run_async(client, client.get_info(['TOOMANY'], ['name']))
+
 if __name__ == '__main__':
     unittest.main()